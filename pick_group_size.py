@@ -0,0 +1,47 @@
+import argparse
+
+from src.readers.opencv_reader import OpenCVReader
+from src.catalog.column_codec import ColumnCodec
+from src.catalog.column_type import ColumnType
+from src.catalog.models.df_column import DataFrameColumn
+from src.catalog.schema_utils import SchemaUtils
+from src.storage.group_size import estimate_group_size
+
+from src.config.constants import \
+    INPUT_VIDEO_FOLDER, \
+    TARGET_GROUP_SIZE_MB
+
+SAMPLE_FRAMES = 10
+
+def init_argparse() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        usage='%(prog)s FILE [--target-mb MB] [--codec CODEC]',
+        description="Pick a group size for a file in the data folder from its encoded frame size."
+    )
+    parser.add_argument('file')
+    parser.add_argument('--target-mb', type=float, default=TARGET_GROUP_SIZE_MB)
+    parser.add_argument('--codec', choices=[codec.name for codec in ColumnCodec], default=ColumnCodec.RAW.name)
+    return parser
+
+def measure_frame_bytes(file_name: str, codec: ColumnCodec) -> int:
+    """
+    Returns the average encoded size of the first few frames of the video
+    """
+    reader = OpenCVReader(file_url = f'{INPUT_VIDEO_FOLDER}/{file_name}.mp4', batch_size = SAMPLE_FRAMES)
+    field = SchemaUtils.get_petastorm_column(
+        DataFrameColumn('data', ColumnType.NDARRAY,
+                        array_dimensions=[reader.video_height(), reader.video_width(), 3],
+                        codec=codec))
+    batch = next(reader.read())
+    total_bytes = sum(len(field.codec.encode(field, frame)) for frame in batch.frames.data)
+    return int(total_bytes // len(batch.frames))
+
+def main() -> None:
+    parser = init_argparse()
+    args = parser.parse_args()
+    frame_bytes = measure_frame_bytes(args.file, ColumnCodec[args.codec])
+    print(f'Frame size: {frame_bytes} bytes')
+    print(f'Group size: {estimate_group_size(frame_bytes, args.target_mb)} frames')
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,7 @@ import argparse
 from src.readers.opencv_reader import OpenCVReader
 from src.storage.petastorm_storage_engine import PetastormStorageEngine
 from src.catalog.models.df_metadata import DataFrameMetadata
+from src.catalog.catalog_manager import CatalogManager
 from src.catalog.models.df_column import DataFrameColumn
 from src.catalog.column_type import ColumnType
 from src.models.storage.batch import Batch
@@ -22,12 +23,16 @@ def init_argparse() -> argparse.ArgumentParser:
     return parser
 
 def read_file(file_name: str, output_file: str) -> None:
-    dataframe_metadata = DataFrameMetadata(file_name, f'{INPUT_VIDEO_FOLDER}/{file_name}.mp4')
-    dataframe_columns = [
-        DataFrameColumn('id', ColumnType.INTEGER),
-        DataFrameColumn('data', ColumnType.NDARRAY, array_dimensions= [540, 960, 3])
-    ]
-    dataframe_metadata.schema = dataframe_columns
+    file_url = f'{INPUT_VIDEO_FOLDER}/{file_name}.mp4'
+    if CatalogManager().has_table(file_url):
+        dataframe_metadata = CatalogManager().get_table(file_url)
+    else:
+        dataframe_metadata = DataFrameMetadata(file_name, file_url)
+        dataframe_columns = [
+            DataFrameColumn('id', ColumnType.INTEGER),
+            DataFrameColumn('data', ColumnType.NDARRAY, array_dimensions= [540, 960, 3])
+        ]
+        dataframe_metadata.schema = dataframe_columns
 
     storage_engine = PetastormStorageEngine()
 
@@ -3,6 +3,7 @@ import cv2
 import glob
 import argparse
 
+from src.models.storage.batch import Batch
 from src.config.constants import \
     INPUT_VIDEO_FOLDER, \
     TRANSACTION_STORAGE_FOLDER
@@ -20,7 +21,7 @@ def read_serialized_image(input_file_path: str, output_file_path: str) -> None:
     frames = None
 
     for name in glob.glob(f'{input_file_path}_*'):
-        batch = pd.read_pickle(name)
+        batch = Batch.from_file(name).frames
         if frames is None:
             frames = batch
         else:
@@ -1,4 +1,11 @@
 python test/benchmark/num_updates_benchmark.py
 python test/benchmark/percent_updated_benchmark.py
 python test/benchmark/recovery_benchmark.py
-python test/benchmark/video_length_update_benchmark.py
\ No newline at end of file
+python test/benchmark/video_length_update_benchmark.py
+python test/benchmark/codec_benchmark.py
+python test/benchmark/group_size_benchmark.py
+python test/benchmark/ingest_benchmark.py
+python test/benchmark/update_operation_benchmark.py
+python test/benchmark/parallel_update_benchmark.py
+python test/benchmark/image_compression_benchmark.py
+python test/benchmark/row_group_benchmark.py
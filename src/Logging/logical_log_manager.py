@@ -1,11 +1,20 @@
 import os
 from enum import Enum
-from typing import List
+from typing import Iterator, List, Tuple
 import pickle
+import numpy as np
 
 from src.transaction.object_update_arguments import ObjectUpdateArguments
 from src.transaction.util import apply_object_update_arguments_to_buffer_manager, \
-                                 apply_before_deltas_to_buffer_manager
+                                 apply_before_deltas_to_buffer_manager, \
+                                 get_groups_with_images, \
+                                 get_group_image_path, \
+                                 select_frames_in_range
+from src.transaction.snapshot_manager import SnapshotManager, SnapshotNotFoundException
+from src.transaction.undo_buffer import is_in_memory_image_path, parse_in_memory_image_path
+from src.Logging.redo_planner import RedoPlanner, RedoStep
+from src.transaction.delta_image import read_image
+from src.models.storage.batch import Batch, to_frame_column
 from src.config.constants import TRANSACTION_STORAGE_FOLDER
 from src.utils.logging_manager import LoggingLevel, LoggingManager
 from src.transaction.opencv_update_processor import OpenCVUpdateProcessor
@@ -27,7 +36,7 @@ class LogRecordType(Enum):
     PPHYSICAL_CLR = 11
 
 class LogicalLogManager():
-    def __init__(self, buffer_manager, log_file_name='transactions.log'):
+    def __init__(self, buffer_manager, log_file_name='transactions.log', plan_redo=True, batch_redo=True):
         self.log_file_path = f'{TRANSACTION_STORAGE_FOLDER}/{log_file_name}'
         # setup log file if needed
         if not os.path.isdir(TRANSACTION_STORAGE_FOLDER):
@@ -39,6 +48,9 @@ class LogicalLogManager():
                 pass
 
         self.last_lsn = {}
+        # txn_id -> lsn of the commit or txnend record of each finished
+        # transaction whose images may still be on disk
+        self.finished_txns = {}
 
         self.log_file = open(self.log_file_path, "rb+")
         # Seek to end of log
@@ -46,6 +58,15 @@ class LogicalLogManager():
 
         self.update_processor = OpenCVUpdateProcessor()
         self.buffer_manager = buffer_manager
+        self.snapshot_manager = SnapshotManager()
+        # Redo group by group, shortening the records of each group using the
+        # rules of the update processor
+        self.plan_redo = plan_redo
+        # Redo group by group, reading each group once, applying all its
+        # records in memory and flushing it once
+        self.batch_redo = batch_redo
+        # Number of record applications the last planned redo skipped
+        self.redo_applications_saved = 0
 
     def __del__(self):
         self.log_file.close()
@@ -53,6 +74,29 @@ class LogicalLogManager():
     def flush(self):
         self.log_file.flush()
 
+    def get_end_lsn(self) -> int:
+        """
+        Returns the LSN the next log record will be written at
+        """
+        return self.log_file.seek(0, 2)
+
+    def _read_records(self, start_lsn: int) -> Iterator[Tuple[int, LogRecordType, int, bytes]]:
+        """
+        Yields the lsn, type, txn_id and contents of every record from
+        start_lsn to the end of the log. Moves the file position.
+        """
+        offset = start_lsn
+        self.log_file.seek(offset)
+        while True:
+            len_bytes = self.log_file.read(4)
+            if len(len_bytes) == 0:
+                break
+            entry_len = int.from_bytes(len_bytes, byteorder='little')
+            rest_of_entry = self.log_file.read(entry_len - 4)
+            record_type, record_txn_id, _ = self.parse_record_header(rest_of_entry)
+            yield offset, record_type, record_txn_id, rest_of_entry
+            offset += entry_len
+
     # structure common to all log records:
     #  length  record_type  txn_id  prev_lsn  [fields]
     #  int32                 int32    int32
@@ -60,6 +104,9 @@ class LogicalLogManager():
     #  length   data
     #   int32
     def _write_log_record(self, record_type: LogRecordType, txn_id: int, fields: [bytes] = []) -> int:
+        # Rollback and recovery move the file position, records are always
+        # appended
+        self.log_file.seek(0, 2)
         record_type = record_type.value.to_bytes(1, byteorder='little')
         txn_id_bytes = txn_id.to_bytes(4, byteorder='little')
 
@@ -104,8 +151,9 @@ class LogicalLogManager():
 
     def log_commit_txn_record(self, txn_id: int) -> None:
         LoggingManager().log(f'Commit txn {txn_id}', LoggingLevel.INFO)
+        self.finished_txns[txn_id] = self._write_log_record(LogRecordType.COMMIT, txn_id)
+        # The transaction is only committed once its commit record is on disk
         self.log_file.flush()
-        self._write_log_record(LogRecordType.COMMIT, txn_id)
         del self.last_lsn[txn_id]
 
     def log_abort_txn_record(self, txn_id: int) -> None:
@@ -114,7 +162,7 @@ class LogicalLogManager():
     
     def log_txnend_record(self, txn_id: int) -> None:
         LoggingManager().log(f'End txn {txn_id}', LoggingLevel.INFO)
-        self._write_log_record(LogRecordType.TXNEND, txn_id)
+        self.finished_txns[txn_id] = self._write_log_record(LogRecordType.TXNEND, txn_id)
     
     def log_logical_clr_record(self, txn_id: int, dataframe_metadata: DataFrameMetadata, update_arguments: ObjectUpdateArguments, undo_next_lsn: int) -> int:
         # write log record that includes txn_id, dataframe_metadata, reversed update operation, and undo next lsn
@@ -143,6 +191,92 @@ class LogicalLogManager():
             undo_next_lsn.to_bytes(4, byteorder='little', signed=True)
         ])
 
+    def _rebuild_before_images(self, txn_id: int, dataframe_metadata: DataFrameMetadata,
+                               update_arguments: ObjectUpdateArguments, record_lsn: int) -> str:
+        """
+        Rebuilds the frames a logically logged update changed as they were
+        before it: the snapshot of each of their groups, with the updates of
+        committed transactions and the transaction's own earlier updates
+        logged since the snapshot replayed on it. The frames are saved like
+        the before images of a physically logged update, whose base path is
+        returned.
+        """
+        before_delta_path = f'{TRANSACTION_STORAGE_FOLDER}/{txn_id}/{dataframe_metadata.file_url}.undo{record_lsn}'
+        os.makedirs(os.path.dirname(before_delta_path), exist_ok=True)
+
+        group_nums = self.buffer_manager.get_groups_in_range(dataframe_metadata,
+                                                             update_arguments.start_frame,
+                                                             update_arguments.end_frame)
+        snapshot_lsns = {}
+        for group_num in group_nums:
+            snapshot = self.snapshot_manager.get_snapshot(dataframe_metadata, group_num)
+            if snapshot is None:
+                raise SnapshotNotFoundException(dataframe_metadata.file_url, group_num)
+            snapshot_lsns[group_num] = snapshot[0]
+        if len(group_nums) == 0:
+            return before_delta_path
+
+        # Transactions are not concurrent, so any other transaction logged
+        # before record_lsn committed before it, or was rolled back
+        committed_txns = set()
+        replays = []
+        for lsn, record_type, record_txn_id, rest_of_entry in self._read_records(min(snapshot_lsns.values())):
+            if lsn >= record_lsn:
+                break
+            if record_type == LogRecordType.COMMIT:
+                committed_txns.add(record_txn_id)
+            elif record_type == LogRecordType.LOGICAL_UPDATE:
+                record_metadata, record_update_arguments = self.parse_logical_update_record(rest_of_entry)
+                if record_metadata.file_url == dataframe_metadata.file_url:
+                    replays.append((lsn, record_txn_id, record_update_arguments, None))
+            elif record_type == LogRecordType.PHYSICAL_UPDATE:
+                # Like redo, only replayed on groups it saved a before image for
+                record_metadata, record_update_arguments, record_before_delta_path = self.parse_physical_update_record(rest_of_entry)
+                # Same as undo, the transaction's own images kept in memory
+                # were spilled or are of groups never updated
+                if record_txn_id == txn_id and is_in_memory_image_path(record_before_delta_path):
+                    record_before_delta_path = parse_in_memory_image_path(record_before_delta_path)[0]
+                if record_metadata.file_url == dataframe_metadata.file_url:
+                    replays.append((lsn, record_txn_id, record_update_arguments, record_before_delta_path))
+            elif record_type == LogRecordType.PPHYSICAL_UPDATE:
+                record_metadata, _, after_delta_path = self.parse_pphysical_update_record(rest_of_entry)
+                if record_metadata.file_url == dataframe_metadata.file_url:
+                    replays.append((lsn, record_txn_id, None, after_delta_path))
+        replays = [replay for replay in replays if replay[1] in committed_txns or replay[1] == txn_id]
+
+        for group_num in group_nums:
+            frames = select_frames_in_range(self.snapshot_manager.read_snapshot(dataframe_metadata, group_num).frames,
+                                            update_arguments.start_frame,
+                                            update_arguments.end_frame)
+            ids = frames.id.to_numpy()
+            data = frames.data.to_numpy().copy()
+            num_replayed = 0
+            for lsn, _, replay_update_arguments, image_path in replays:
+                if lsn < snapshot_lsns[group_num]:
+                    continue
+                if replay_update_arguments is not None:
+                    if image_path is not None and group_num not in get_groups_with_images(image_path):
+                        continue
+                    in_range = (ids >= replay_update_arguments.start_frame) & (ids <= replay_update_arguments.end_frame)
+                    if not in_range.any():
+                        continue
+                    data[in_range] = to_frame_column(self.update_processor.apply_batch(data[in_range], replay_update_arguments))
+                else:
+                    if group_num not in get_groups_with_images(image_path):
+                        continue
+                    after_frames = read_image(get_group_image_path(image_path, group_num))
+                    after_data = dict(zip(after_frames.id, after_frames.data))
+                    for i, frame_id in enumerate(ids):
+                        if frame_id in after_data:
+                            data[i] = after_data[frame_id]
+                num_replayed = num_replayed + 1
+
+            LoggingManager().log(f'Rebuilt group {group_num} from snapshot replaying {num_replayed} records', LoggingLevel.DEBUG)
+            before_frames = frames.copy(deep=False)
+            before_frames['data'] = data
+            Batch(before_frames).to_file(f'{before_delta_path}_{group_num}')
+        return before_delta_path
+
     def rollback_txn(self, txn_id: int) -> None:
         LoggingManager().log(f'Rollback txn {txn_id}', LoggingLevel.INFO)
         # read log file and undo txn's changes
@@ -156,9 +290,32 @@ class LogicalLogManager():
             self.log_file.seek(0, 2)
 
             record_type, read_txn_id, prev_lsn = self.parse_record_header(rest_of_entry)
+            record_lsn = lsn
             lsn = prev_lsn
+            # Undo logical update that can't be reversed
+            if record_type == LogRecordType.LOGICAL_UPDATE \
+                    and not self.update_processor.is_reversible(self.parse_logical_update_record(rest_of_entry)[1]):
+                dataframe_metadata, update_arguments = self.parse_logical_update_record(rest_of_entry)
+                before_delta_path = self._rebuild_before_images(txn_id, dataframe_metadata, update_arguments, record_lsn)
+                self.log_file.seek(0, 2)
+                clr_lsn = self.log_physical_clr_record(txn_id,
+                                                        dataframe_metadata,
+                                                        before_delta_path,
+                                                        lsn)
+
+                if PressurePointManager().has_pressure_point(PressurePoint(
+                    PressurePointLocation.LOGICAL_LOG_MANAGER_ROLLBACK_AFTER_CLR,
+                    PressurePointBehavior.EARLY_RETURN)):
+                        # Results in a log with a CLR record for testing purposes
+                        return
+
+                LoggingManager().log(f'Reverting txn_id {read_txn_id} file_url {dataframe_metadata.file_url} from snapshots with path {before_delta_path}', LoggingLevel.INFO)
+                apply_before_deltas_to_buffer_manager(self.buffer_manager,
+                                                        dataframe_metadata,
+                                                        before_delta_path,
+                                                        clr_lsn)
             # Undo logical update
-            if record_type == LogRecordType.LOGICAL_UPDATE:
+            elif record_type == LogRecordType.LOGICAL_UPDATE:
                 dataframe_metadata, update_arguments = self.parse_logical_update_record(rest_of_entry)
                 reversed_update_arguments = self.update_processor.reverse(update_arguments)
                 # log CLR to log file
@@ -184,6 +341,10 @@ class LogicalLogManager():
             # Undo physical update
             elif record_type == LogRecordType.PHYSICAL_UPDATE:
                 dataframe_metadata, update_arguments, before_delta_path = self.parse_physical_update_record(rest_of_entry)
+                # Before images kept in memory were spilled before the rollback,
+                # or lost in a crash for the groups the update was never flushed to
+                if is_in_memory_image_path(before_delta_path):
+                    before_delta_path = parse_in_memory_image_path(before_delta_path)[0]
                 # Log CLR to log file
                 clr_lsn = self.log_physical_clr_record(txn_id,
                                                         dataframe_metadata,
@@ -263,6 +424,101 @@ class LogicalLogManager():
     # Once all rollbacks done, clear the last_lsn table
     #   I think it should be sufficient to just call abort_txn here?
     #   it does rollback, writes an abort record, and removes from LSN table
+    def _redo_step(self, redo_step: RedoStep, group_nums: List[int] = None) -> None:
+        """
+        Redoes the record on the groups whose max lsn is lower than its lsn,
+        within group_nums if given
+        """
+        dataframe_metadata = redo_step.dataframe_metadata
+        if redo_step.is_logical:
+            LoggingManager().log(f'Redoing lsn {redo_step.lsn} file_url {dataframe_metadata.file_url} using {redo_step.update_arguments}', LoggingLevel.INFO)
+            apply_object_update_arguments_to_buffer_manager(self.buffer_manager,
+                                                            self.update_processor,
+                                                            dataframe_metadata,
+                                                            redo_step.update_arguments,
+                                                            redo_step.lsn,
+                                                            group_nums=group_nums if group_nums != None else redo_step.group_nums)
+        else:
+            LoggingManager().log(f'Redoing lsn {redo_step.lsn} file_url {dataframe_metadata.file_url} with path {redo_step.image_path}', LoggingLevel.INFO)
+            apply_before_deltas_to_buffer_manager(self.buffer_manager,
+                                                  dataframe_metadata,
+                                                  redo_step.image_path,
+                                                  redo_step.lsn,
+                                                  group_nums=group_nums)
+
+    def _redo_group(self, dataframe_metadata: DataFrameMetadata, group_num: int, redo_steps: List[RedoStep]) -> None:
+        """
+        Applies the records to the frames of the group in log order, and
+        installs and flushes the group once
+        """
+        batch = self.buffer_manager.read_slot(dataframe_metadata, group_num)
+        frames = batch.frames.copy(deep=False)
+        ids = frames.id.to_numpy()
+        data = frames.data.to_numpy().copy()
+        lsns = frames.lsn.to_numpy().copy()
+        positions = {frame_id: i for i, frame_id in enumerate(ids)}
+        for redo_step in redo_steps:
+            if redo_step.is_logical:
+                update_arguments = redo_step.update_arguments
+                in_range = (ids >= update_arguments.start_frame) & (ids <= update_arguments.end_frame)
+                if not in_range.any():
+                    continue
+                data[in_range] = to_frame_column(self.update_processor.apply_batch(data[in_range], update_arguments))
+                lsns[in_range] = redo_step.lsn
+            else:
+                image_frames = read_image(get_group_image_path(redo_step.image_path, group_num))
+                for frame_id, frame in zip(image_frames.id, image_frames.data):
+                    data[positions[frame_id]] = frame
+                    lsns[positions[frame_id]] = redo_step.lsn
+
+        frames['data'] = data
+        frames['lsn'] = lsns
+        self.buffer_manager.replace_slot(dataframe_metadata, Batch(frames))
+        self.buffer_manager.flush_group(dataframe_metadata, group_num)
+
+    def _redo_by_group(self, redo_steps: List[RedoStep]) -> None:
+        """
+        Redoes the records group by group. If plan_redo is set, the records
+        a group still needs are shortened by the redo planner before they
+        are applied.
+        """
+        redo_planner = RedoPlanner(self.update_processor)
+        # (file_url, group_num) -> (table, redo steps in log order)
+        group_steps = {}
+        for redo_step in redo_steps:
+            dataframe_metadata = redo_step.dataframe_metadata
+            if redo_step.is_logical:
+                group_nums = redo_step.group_nums
+                if group_nums == None:
+                    group_nums = self.buffer_manager.get_groups_in_range(dataframe_metadata,
+                                                                         redo_step.update_arguments.start_frame,
+                                                                         redo_step.update_arguments.end_frame)
+            else:
+                group_nums = get_groups_with_images(redo_step.image_path)
+            for group_num in group_nums:
+                group_steps.setdefault((dataframe_metadata.file_url, group_num), (dataframe_metadata, []))[1].append(redo_step)
+
+        for (file_url, group_num), (dataframe_metadata, steps) in group_steps.items():
+            group_lsn = self.buffer_manager.get_group_lsn(dataframe_metadata, group_num)
+            steps = [redo_step for redo_step in steps if redo_step.lsn > group_lsn]
+            planned_steps = steps
+            if self.plan_redo:
+                planned_steps = redo_planner.plan(steps,
+                                                  group_num * dataframe_metadata.group_size,
+                                                  (group_num + 1) * dataframe_metadata.group_size - 1)
+            if len(planned_steps) == 0:
+                continue
+            LoggingManager().log(f'Redoing {len(planned_steps)} of {len(steps)} records on {file_url} group {group_num}', LoggingLevel.DEBUG)
+            if self.batch_redo:
+                self._redo_group(dataframe_metadata, group_num, planned_steps)
+            else:
+                for redo_step in planned_steps:
+                    self._redo_step(redo_step, [group_num])
+
+        self.redo_applications_saved = redo_planner.applications_saved
+        if self.plan_redo:
+            LoggingManager().log(f'Redo planner saved {redo_planner.applications_saved} of {redo_planner.records_planned} record applications', LoggingLevel.INFO)
+
     def recover_log(self) -> None:
         # Analysis
         LoggingManager().log(f'Starting analysis phase', LoggingLevel.INFO)
@@ -281,6 +537,7 @@ class LogicalLogManager():
             self.last_lsn[record_txn_id] = offset
             if record_type == LogRecordType.COMMIT or record_type == LogRecordType.TXNEND:
                 del self.last_lsn[record_txn_id]
+                self.finished_txns[record_txn_id] = offset
 
             offset += entry_len
             assert offset == self.log_file.tell()
@@ -288,71 +545,56 @@ class LogicalLogManager():
 
         # Redo
         LoggingManager().log(f'Starting redo phase', LoggingLevel.INFO)
-        self.log_file.seek(0)
-        offset = 0
-        while True:
-            curr_lsn = offset
-            len_bytes = self.log_file.read(4)
-            if len(len_bytes) == 0:
-                break
-            entry_len = int.from_bytes(len_bytes, byteorder='little')
-            rest_of_entry = self.log_file.read(entry_len - 4)
-
-            record_type, record_txn_id, _ = self.parse_record_header(rest_of_entry)
-            LoggingManager().log(f'Got type {record_type} txn_id {record_txn_id} at offset {offset}', LoggingLevel.INFO)
+        redo_steps = []
+        for curr_lsn, record_type, record_txn_id, rest_of_entry in self._read_records(0):
+            LoggingManager().log(f'Got type {record_type} txn_id {record_txn_id} at offset {curr_lsn}', LoggingLevel.INFO)
+            _, _, prev_lsn = self.parse_record_header(rest_of_entry)
             # Redo logical update
             if record_type == LogRecordType.LOGICAL_UPDATE:
                 dataframe_metadata, update_arguments = self.parse_logical_update_record(rest_of_entry)
-                LoggingManager().log(f'Redoing logical update file_url {dataframe_metadata.file_url} using {update_arguments}', LoggingLevel.INFO)
-                apply_object_update_arguments_to_buffer_manager(self.buffer_manager,
-                                                                self.update_processor,
-                                                                dataframe_metadata,
-                                                                update_arguments,
-                                                                curr_lsn)
+                redo_steps.append(RedoStep(curr_lsn, record_txn_id, prev_lsn, dataframe_metadata,
+                                           update_arguments=update_arguments))
             # Redo physical update
             elif record_type == LogRecordType.PHYSICAL_UPDATE:
-                dataframe_metadata, update_arguments, _ = self.parse_physical_update_record(rest_of_entry)
-                LoggingManager().log(f'Redoing physical update file_url {dataframe_metadata.file_url} using {update_arguments}', LoggingLevel.INFO)
-                apply_object_update_arguments_to_buffer_manager(self.buffer_manager,
-                                                                self.update_processor,
-                                                                dataframe_metadata,
-                                                                update_arguments,
-                                                                curr_lsn)
+                dataframe_metadata, update_arguments, before_delta_path = self.parse_physical_update_record(rest_of_entry)
+                # Only groups with a before image were updated, a deferred
+                # update may not have been applied to every group in its range
+                group_nums = get_groups_with_images(before_delta_path)
+                # Before images of an active transaction kept in memory were
+                # spilled before any slot was flushed, so the groups without a
+                # spilled one never had the update flushed
+                if is_in_memory_image_path(before_delta_path) and record_txn_id in self.last_lsn:
+                    group_nums = get_groups_with_images(parse_in_memory_image_path(before_delta_path)[0])
+                redo_steps.append(RedoStep(curr_lsn, record_txn_id, prev_lsn, dataframe_metadata,
+                                           update_arguments=update_arguments,
+                                           group_nums=group_nums))
             # Redo pphysical update
             elif record_type == LogRecordType.PPHYSICAL_UPDATE:
                 dataframe_metadata, _, after_delta_path = self.parse_pphysical_update_record(rest_of_entry)
-                LoggingManager().log(f'Redoing pphysical update file_url {dataframe_metadata.file_url} with path {after_delta_path}', LoggingLevel.INFO)
-                apply_before_deltas_to_buffer_manager(self.buffer_manager,
-                                                      dataframe_metadata,
-                                                      after_delta_path,
-                                                      curr_lsn)
+                redo_steps.append(RedoStep(curr_lsn, record_txn_id, prev_lsn, dataframe_metadata,
+                                           image_path=after_delta_path))
             # Redo logical CLR
             elif record_type == LogRecordType.LOGICAL_CLR:
-                dataframe_metadata, update_arguments, _ = self.parse_logical_clr_record(rest_of_entry)
-                LoggingManager().log(f'Redoing logical clr file_url {dataframe_metadata.file_url} using {update_arguments}', LoggingLevel.INFO)
-                apply_object_update_arguments_to_buffer_manager(self.buffer_manager,
-                                                                self.update_processor,
-                                                                dataframe_metadata,
-                                                                update_arguments,
-                                                                curr_lsn)
+                dataframe_metadata, update_arguments, undo_next_lsn = self.parse_logical_clr_record(rest_of_entry)
+                redo_steps.append(RedoStep(curr_lsn, record_txn_id, prev_lsn, dataframe_metadata,
+                                           update_arguments=update_arguments,
+                                           undo_next_lsn=undo_next_lsn))
             # Redo physical CLR
             elif record_type == LogRecordType.PHYSICAL_CLR:
                 dataframe_metadata, before_delta_path, undo_next_lsn = self.parse_physical_clr_record(rest_of_entry)
-                LoggingManager().log(f'Redoing physical CLR file_url {dataframe_metadata.file_url} with path {before_delta_path}', LoggingLevel.INFO)
-                apply_before_deltas_to_buffer_manager(self.buffer_manager,
-                                                      dataframe_metadata,
-                                                      before_delta_path,
-                                                      curr_lsn)
+                redo_steps.append(RedoStep(curr_lsn, record_txn_id, prev_lsn, dataframe_metadata,
+                                           image_path=before_delta_path))
             # Redo pphysical CLR
             elif record_type == LogRecordType.PPHYSICAL_CLR:
                 dataframe_metadata, before_delta_path, undo_next_lsn = self.parse_pphysical_clr_record(rest_of_entry)
-                LoggingManager().log(f'Redoing pphysical CLR file_url {dataframe_metadata.file_url} with path {before_delta_path}', LoggingLevel.INFO)
-                apply_before_deltas_to_buffer_manager(self.buffer_manager,
-                                                      dataframe_metadata,
-                                                      before_delta_path,
-                                                      curr_lsn)
-            offset += entry_len
-            assert offset == self.log_file.tell()
+                redo_steps.append(RedoStep(curr_lsn, record_txn_id, prev_lsn, dataframe_metadata,
+                                           image_path=before_delta_path))
+
+        if self.plan_redo or self.batch_redo:
+            self._redo_by_group(redo_steps)
+        else:
+            for redo_step in redo_steps:
+                self._redo_step(redo_step)
 
         # Undo
         # Since we're not worrying about concurrent transactions, we can rollback
@@ -0,0 +1,112 @@
+from typing import List
+
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.transaction.object_update_arguments import ObjectUpdateArguments
+from src.transaction.opencv_update_processor import OpenCVUpdateProcessor
+
+class RedoStep():
+    def __init__(self, lsn: int, txn_id: int, prev_lsn: int, dataframe_metadata: DataFrameMetadata,
+                 update_arguments: ObjectUpdateArguments = None, image_path: str = None,
+                 undo_next_lsn: int = None, group_nums: List[int] = None):
+        """
+        A log record to redo
+        Attributes:
+            lsn (int): lsn of the record, which redo stamps the frames with
+            txn_id (int): transaction that logged the record
+            prev_lsn (int): lsn of the previous record of the transaction
+            dataframe_metadata (DataFrameMetadata): table the record changes
+            update_arguments (ObjectUpdateArguments): update applied by the
+                record, None if it installs images
+            image_path (str): base path of the images installed by the
+                record, None if it applies an update
+            undo_next_lsn (int): set for logical CLRs, the prev_lsn of the
+                update they compensate
+            group_nums (List[int]): groups a logical update is applied to,
+                all groups in its range if None
+        """
+        self.lsn = lsn
+        self.txn_id = txn_id
+        self.prev_lsn = prev_lsn
+        self.dataframe_metadata = dataframe_metadata
+        self.update_arguments = update_arguments
+        self.image_path = image_path
+        self.undo_next_lsn = undo_next_lsn
+        self.group_nums = group_nums
+
+    @property
+    def is_logical(self) -> bool:
+        return self.update_arguments is not None
+
+    @property
+    def is_logical_clr(self) -> bool:
+        return self.undo_next_lsn is not None
+
+class RedoPlanner():
+    def __init__(self, opencv_update_processor: OpenCVUpdateProcessor):
+        """
+        Shortens the records redone on a group using the rules the update
+        processor declares for its operations. Updates are compared on the
+        frames of the group they cover, so two records with different ranges
+        may still cancel out on a group.
+        """
+        self.opencv_update_processor = opencv_update_processor
+        self.records_planned = 0
+        self.applications_saved = 0
+
+    def _clip(self, update_arguments: ObjectUpdateArguments, start_frame: int, end_frame: int) -> ObjectUpdateArguments:
+        return ObjectUpdateArguments(update_arguments.function_name,
+                                     max(update_arguments.start_frame, start_frame),
+                                     min(update_arguments.end_frame, end_frame),
+                                     **update_arguments.kwargs)
+
+    def plan(self, steps: List[RedoStep], start_frame: int, end_frame: int) -> List[RedoStep]:
+        """
+        Returns steps equivalent to steps, which are the records to redo on
+        the group with frames [start_frame, end_frame] in log order. Each
+        planned step has the lsn of the last record it replaces.
+        """
+        planned = []
+        # Whether each planned step is a single record from steps, only those
+        # can be cancelled by their CLR
+        unmerged = []
+        for step in steps:
+            if not step.is_logical:
+                # Installing images ends the run
+                planned.append(step)
+                unmerged.append(True)
+                continue
+
+            clipped_step = RedoStep(step.lsn, step.txn_id, step.prev_lsn, step.dataframe_metadata,
+                                    update_arguments=self._clip(step.update_arguments, start_frame, end_frame),
+                                    undo_next_lsn=step.undo_next_lsn,
+                                    group_nums=step.group_nums)
+            if len(planned) == 0 or not planned[-1].is_logical:
+                planned.append(clipped_step)
+                unmerged.append(True)
+                continue
+
+            last_step = planned[-1]
+            # An update followed by its own CLR nets to nothing
+            if step.is_logical_clr and unmerged[-1] and not last_step.is_logical_clr \
+                    and last_step.txn_id == step.txn_id and last_step.prev_lsn == step.undo_next_lsn:
+                planned.pop()
+                unmerged.pop()
+                continue
+
+            simplified = self.opencv_update_processor.simplify(last_step.update_arguments, clipped_step.update_arguments)
+            if simplified == None:
+                planned.append(clipped_step)
+                unmerged.append(True)
+                continue
+
+            planned.pop()
+            unmerged.pop()
+            if len(simplified) > 0:
+                planned.append(RedoStep(step.lsn, step.txn_id, step.prev_lsn, step.dataframe_metadata,
+                                        update_arguments=simplified[0],
+                                        group_nums=step.group_nums))
+                unmerged.append(False)
+
+        self.records_planned = self.records_planned + len(steps)
+        self.applications_saved = self.applications_saved + len(steps) - len(planned)
+        return planned
@@ -1,6 +1,7 @@
 import numpy as np
+import pandas as pd
 import os
-from typing import Iterator, List
+from typing import Callable, Iterator, List
 from petastorm.codecs import CompressedImageCodec, NdarrayCodec, ScalarCodec
 from petastorm.etl.dataset_metadata import materialize_dataset
 from petastorm.unischema import Unischema, UnischemaField, dict_to_spark_row
@@ -25,6 +26,8 @@ class BufferManagerSlot():
         self._dataframe_metadata = dataframe_metadata
         self._rows = rows
         self._dirty = False
+        # Lowest lsn of the changes not flushed yet, None if clean
+        self._rec_lsn = None
     
     @property
     def dataframe_metadata(self):
@@ -50,6 +53,25 @@ class BufferManagerSlot():
     @dirty.setter
     def dirty(self, dirty):
         self._dirty = dirty
+        if not dirty:
+            self._rec_lsn = None
+
+    @property
+    def rec_lsn(self):
+        return self._rec_lsn
+
+    def track_changes(self, rows: Batch, previous_lsn: int = None) -> None:
+        """
+        Lowers rec_lsn to the lsn of the rows changed, which are those with
+        an lsn above previous_lsn if given. Rows without an lsn count as
+        changed by the first record.
+        """
+        lsns = rows.frames['lsn'] if 'lsn' in rows.frames.columns else None
+        if lsns is not None and previous_lsn is not None:
+            lsns = lsns[lsns > previous_lsn]
+        rec_lsn = 0 if lsns is None or len(lsns) == 0 else int(lsns.min())
+        if self._rec_lsn is None or rec_lsn < self._rec_lsn:
+            self._rec_lsn = rec_lsn
 
 
 class BufferManager():
@@ -59,13 +81,39 @@ class BufferManager():
         self._storage_engine = storage_engine
         # beginning of list denotes least recently used, end of list denotes most recently used
         self._lru = []
+        # Called with the table and group number before a group is read
+        self._read_hook = None
+        # Called before a dirty slot is written to the storage engine
+        self._flush_hook = None
+
+    @property
+    def size(self) -> int:
+        """
+        Number of slots, i.e. groups that can be buffered at once
+        """
+        return self._size
+
+    def set_read_hook(self, read_hook: Callable[[DataFrameMetadata, int], None]) -> None:
+        """
+        Sets a function called before every read_slot, e.g. to apply updates
+        that were deferred to the group before it is read. None removes it.
+        """
+        self._read_hook = read_hook
+
+    def set_flush_hook(self, flush_hook: Callable[[], None]) -> None:
+        """
+        Sets a function called before every dirty slot is flushed, e.g. to
+        write out what recovery needs to undo the changes in it. None
+        removes it.
+        """
+        self._flush_hook = flush_hook
     
     def _get_slot(self, table: DataFrameMetadata, group_num: int) -> (BufferManagerSlot, int):
         i = 0
         while i < len(self._slots):
             if self._slots[i] != None \
                 and table == self._slots[i].dataframe_metadata \
-                and group_num == self._slots[i].rows.get_group_num():
+                and group_num == self._slots[i].rows.get_group_num(table.group_size):
                     return self._slots[i], i
             i = i + 1
         return None, None
@@ -86,25 +134,54 @@ class BufferManager():
         self._lru = list(filter(lambda curr_slot_num: curr_slot_num != slot_num, self._lru)) + [slot_num]
     
     def write_slot(self, table: DataFrameMetadata, rows: Batch) -> None:
-        LoggingManager().log(f'Writing table {table.file_url} group {rows.get_group_num()}', LoggingLevel.DEBUG)
-        slot, slot_num = self._get_slot(table, rows.get_group_num())
+        group_num = rows.get_group_num(table.group_size)
+        LoggingManager().log(f'Writing table {table.file_url} group {group_num}', LoggingLevel.DEBUG)
+        slot, slot_num = self._get_slot(table, group_num)
         if slot == None:
             LoggingManager().log(f'Getting table from storage engine', LoggingLevel.DEBUG)
-            batch = list(self._storage_engine.read(table, group_num=rows.get_group_num()))[0]
+            batch = list(self._storage_engine.read(table, group_num=group_num))[0]
             slot_num = self._get_free_slot()
             self._slots[slot_num] = BufferManagerSlot(table, batch)
 
+        self._slots[slot_num].track_changes(rows)
         df = self._slots[slot_num].rows.frames
-        for index, row in rows.frames.iterrows():
-            for column in rows.frames.columns:
-                if column == 'id':
-                    continue
-                df.loc[df.id == row.id, column] = [row[column]]
+        # Rows are matched to the slot's by id, each column is merged at once
+        positions = pd.Index(df.id).get_indexer(rows.frames.id)
+        found = positions >= 0
+        for column in rows.frames.columns:
+            if column == 'id':
+                continue
+            values = df[column].to_numpy().copy()
+            values[positions[found]] = rows.frames[column].to_numpy()[found]
+            df[column] = values
         
         self._slots[slot_num].dirty = True
         self._update_lru(slot_num)
 
+    def replace_slot(self, table: DataFrameMetadata, rows: Batch) -> None:
+        """
+        Replaces every row of the group of rows, which must be the whole
+        group. Nothing is read from the storage engine if it isn't buffered.
+        """
+        group_num = rows.get_group_num(table.group_size)
+        LoggingManager().log(f'Replacing table {table.file_url} group {group_num}', LoggingLevel.DEBUG)
+        slot, slot_num = self._get_slot(table, group_num)
+        if slot == None:
+            slot_num = self._get_free_slot()
+            self._slots[slot_num] = BufferManagerSlot(table, rows)
+            self._slots[slot_num].dirty = True
+            self._slots[slot_num].track_changes(rows)
+        else:
+            previous_lsn = None
+            if 'lsn' in slot.rows.frames.columns and len(slot.rows.frames) > 0:
+                previous_lsn = int(slot.rows.frames['lsn'].max())
+            slot.track_changes(rows, previous_lsn)
+            slot.rows = rows
+        self._update_lru(slot_num)
+
     def read_slot(self, table: DataFrameMetadata, group_num) -> Batch:
+        if self._read_hook != None:
+            self._read_hook(table, group_num)
         slot, slot_num = self._get_slot(table, group_num)
         batch = None
         if slot == None:
@@ -121,10 +198,17 @@ class BufferManager():
     
     def flush_slot(self, slot_num: int) -> None:
         if self._slots[slot_num] != None and self._slots[slot_num].dirty:
+            if self._flush_hook != None:
+                self._flush_hook()
             LoggingManager().log(f'Flushing slot {slot_num}', LoggingLevel.DEBUG)
             self._storage_engine.write(self._slots[slot_num].dataframe_metadata, self._slots[slot_num].rows)
             self._slots[slot_num].dirty = False
 
+    def flush_group(self, table: DataFrameMetadata, group_num: int) -> None:
+        slot, slot_num = self._get_slot(table, group_num)
+        if slot != None:
+            self.flush_slot(slot_num)
+
     def flush_all_slots(self) -> None:
         LoggingManager().log(f'Flushing buffer manager', LoggingLevel.INFO)
         with concurrent.futures.ThreadPoolExecutor() as executor:
@@ -141,6 +225,35 @@ class BufferManager():
             self.discard_slot(i)
             i = i + 1
     
-    def get_group_lsn(self, table: DataFrameMetadata, group_num: int):
-        batch = self.read_slot(table, group_num)
-        batch.frames['lsn'].max()
+    def get_group_lsn(self, table: DataFrameMetadata, group_num: int) -> int:
+        """
+        Returns the max LSN of a group. If the group is not buffered, the LSN
+        comes from the table manifest, or if there is none only the id and lsn
+        columns are read from the storage engine, so the frames are never
+        decoded and no slot is used.
+        """
+        slot, slot_num = self._get_slot(table, group_num)
+        if slot != None:
+            return int(slot.rows.frames['lsn'].max())
+
+        manifest_lsn = self._storage_engine.get_group_max_lsn(table, group_num)
+        if manifest_lsn != None:
+            return manifest_lsn
+
+        LoggingManager().log(f'Probing table {table.file_url} group {group_num} lsn from storage engine', LoggingLevel.DEBUG)
+        batch = list(self._storage_engine.read(table, columns=['id', 'lsn'], group_num=group_num))[0]
+        return int(batch.frames['lsn'].max())
+
+    def redo_point(self) -> int:
+        """
+        Returns the lowest lsn of the changes not flushed yet, records below
+        it never need to be redone. None if every slot is clean.
+        """
+        rec_lsns = [slot.rec_lsn if slot.rec_lsn != None else 0
+                    for slot in list(self._slots) if slot != None and slot.dirty]
+        if len(rec_lsns) == 0:
+            return None
+        return min(rec_lsns)
+
+    def get_groups_in_range(self, table: DataFrameMetadata, start_frame: int, end_frame: int) -> List[int]:
+        return self._storage_engine.groups_in_range(table, start_frame, end_frame)
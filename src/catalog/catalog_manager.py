@@ -0,0 +1,157 @@
+import os
+import pickle
+import threading
+from typing import Dict
+
+from src.catalog.column_codec import ColumnCodec
+from src.catalog.column_type import ColumnType
+from src.catalog.models.df_column import DataFrameColumn
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.utils.file_utils import atomic_write
+from src.utils.logging_manager import LoggingLevel, LoggingManager
+from src.config.constants import CATALOG_FOLDER, \
+                                 CATALOG_FILE_NAME
+
+class TableNotInCatalogException(Exception):
+    def __init__(self, table):
+        super(TableNotInCatalogException, self).__init__(table)
+
+class CatalogManager():
+    """
+    Persistent catalog of every table created in the storage engines.
+    Each table gets a stable integer id, and its schema, group size, codec
+    and frame count are stored in a single file in its own folder, which
+    outlives clearing the stores.
+    The file is loaded once into an in-memory index, and the
+    DataFrameMetadata built for each table is cached, so log records and
+    buffer slots can refer to tables by id without rebuilding schemas.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(CatalogManager, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance.load()
+        return cls._instance
+
+    @property
+    def catalog_path(self) -> str:
+        return f'{CATALOG_FOLDER}/{CATALOG_FILE_NAME}'
+
+    def load(self) -> None:
+        """
+        (Re)loads the catalog from disk, dropping any cached metadata
+        """
+        with self._lock:
+            self._next_id = 1
+            # table id -> catalog entry
+            self._tables = {}
+            # file_url -> table id
+            self._file_urls = {}
+            # table id -> DataFrameMetadata
+            self._metadata_cache = {}
+
+            if not os.path.isfile(self.catalog_path):
+                return
+            with open(self.catalog_path, 'rb') as catalog_file:
+                data = pickle.loads(catalog_file.read())
+            self._next_id = data['next_id']
+            for table_id, entry in data['tables'].items():
+                self._tables[table_id] = entry
+                self._file_urls[entry['file_url']] = table_id
+            LoggingManager().log(f'Loaded {len(self._tables)} tables from catalog', LoggingLevel.DEBUG)
+
+    def _save(self) -> None:
+        os.makedirs(CATALOG_FOLDER, exist_ok=True)
+        data = {
+            'next_id': self._next_id,
+            'tables': self._tables
+        }
+        atomic_write(self.catalog_path, pickle.dumps(data))
+
+    def _column_to_dict(self, column: DataFrameColumn) -> Dict:
+        return {
+            'name': column.name,
+            'type': column.type.name,
+            'is_nullable': column.is_nullable,
+            'array_dimensions': column.array_dimensions,
+            'codec': column.codec.name
+        }
+
+    def _column_from_dict(self, data: Dict) -> DataFrameColumn:
+        return DataFrameColumn(data['name'],
+                               ColumnType[data['type']],
+                               is_nullable=data['is_nullable'],
+                               array_dimensions=data['array_dimensions'],
+                               codec=ColumnCodec[data['codec']])
+
+    def _build_metadata(self, entry: Dict) -> DataFrameMetadata:
+        dataframe_metadata = DataFrameMetadata(entry['name'],
+                                               entry['file_url'],
+                                               identifier_id=entry['identifier_column'],
+                                               group_size=entry['group_size'])
+        dataframe_metadata.schema = [self._column_from_dict(column) for column in entry['columns']]
+        dataframe_metadata.id = entry['id']
+        return dataframe_metadata
+
+    def register_table(self, table: DataFrameMetadata, frame_count: int = None) -> int:
+        """
+        Adds the table to the catalog, or replaces its entry if a table with
+        the same file_url was registered before, keeping its id. Sets and
+        returns the id of the table.
+        """
+        with self._lock:
+            table_id = self._file_urls.get(table.file_url)
+            if table_id is None:
+                table_id = self._next_id
+                self._next_id = self._next_id + 1
+            elif frame_count is None:
+                frame_count = self._tables[table_id]['frame_count']
+
+            table.id = table_id
+            self._tables[table_id] = {
+                'id': table_id,
+                'name': table.name,
+                'file_url': table.file_url,
+                'identifier_column': table.identifier_column,
+                'group_size': table.group_size,
+                'frame_count': frame_count,
+                'columns': [self._column_to_dict(column) for column in table.schema.column_list]
+            }
+            self._file_urls[table.file_url] = table_id
+            self._metadata_cache[table_id] = table
+            self._save()
+            LoggingManager().log(f'Registered table {table.file_url} with id {table_id}', LoggingLevel.DEBUG)
+            return table_id
+
+    def set_frame_count(self, table: DataFrameMetadata, frame_count: int) -> None:
+        with self._lock:
+            if table.id not in self._tables:
+                raise TableNotInCatalogException(table.file_url)
+            self._tables[table.id]['frame_count'] = frame_count
+            self._save()
+
+    def get_frame_count(self, table: DataFrameMetadata) -> int:
+        """
+        Returns the number of frames in the table, or None if unknown
+        """
+        if table.id not in self._tables:
+            raise TableNotInCatalogException(table.file_url)
+        return self._tables[table.id]['frame_count']
+
+    def has_table(self, file_url: str) -> bool:
+        return file_url in self._file_urls
+
+    def get_table_by_id(self, table_id: int) -> DataFrameMetadata:
+        with self._lock:
+            if table_id not in self._tables:
+                raise TableNotInCatalogException(table_id)
+            if table_id not in self._metadata_cache:
+                self._metadata_cache[table_id] = self._build_metadata(self._tables[table_id])
+            return self._metadata_cache[table_id]
+
+    def get_table(self, file_url: str) -> DataFrameMetadata:
+        if file_url not in self._file_urls:
+            raise TableNotInCatalogException(file_url)
+        return self.get_table_by_id(self._file_urls[file_url])
@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+class ColumnCodec(Enum):
+    # Stored as a raw numpy array, no compression
+    RAW = 1
+    # Lossless image compression, slow to encode but small on disk
+    PNG = 2
+    # Lossy image compression, frames will not round trip exactly
+    JPEG = 3
+    # Lossless zstd compression of the raw numpy array
+    ZSTD = 4
@@ -2,6 +2,7 @@ from typing import List
 
 from ast import literal_eval
 
+from src.catalog.column_codec import ColumnCodec
 from src.catalog.column_type import ColumnType
 
 class DataFrameColumn():
@@ -10,12 +11,14 @@ class DataFrameColumn():
                  type: ColumnType,
                  is_nullable: bool = False,
                  array_dimensions: List[int] = [],
-                 metadata_id: int = None):
+                 metadata_id: int = None,
+                 codec: ColumnCodec = ColumnCodec.RAW):
         self._name = name
         self._type = type
         self._is_nullable = is_nullable
         self._array_dimensions = str(array_dimensions)
         self._metadata_id = metadata_id
+        self._codec = codec
 
     @property
     def id(self):
@@ -41,6 +44,10 @@ class DataFrameColumn():
     def array_dimensions(self, value):
         self._array_dimensions = str(value)
 
+    @property
+    def codec(self):
+        return self._codec
+
     @property
     def metadata_id(self):
         return self._metadata_id
@@ -57,7 +64,7 @@ class DataFrameColumn():
         column_str += "["
         column_str += ', '.join(['%d'] * len(self.array_dimensions)) \
                       % tuple(self.array_dimensions)
-        column_str += "])"
+        column_str += "], %s)" % self._codec.name
 
         return column_str
 
@@ -67,4 +74,5 @@ class DataFrameColumn():
             self.is_nullable == other.is_nullable and \
             self.array_dimensions == other.array_dimensions and \
             self.name == other.name and \
-            self.type == other.type
\ No newline at end of file
+            self.type == other.type and \
+            self.codec == other.codec
\ No newline at end of file
@@ -4,14 +4,19 @@ import pickle
 from src.catalog.df_schema import DataFrameSchema
 from src.catalog.models.df_column import DataFrameColumn
 from src.catalog.column_type import ColumnType
+from src.catalog.column_codec import ColumnCodec
+from src.config.constants import BATCH_SIZE
 from pathlib import Path
 
 class DataFrameMetadata():
-    def __init__(self, name: str, file_url: str, identifier_id='id'):
+    def __init__(self, name: str, file_url: str, identifier_id='id', group_size: int = BATCH_SIZE):
         self._name = name
         self._file_url = file_url
         self._schema = None
         self._unique_identifier_column = identifier_id
+        self._group_size = group_size
+        # Assigned by the catalog when the table is registered
+        self._id = None
 
     @property
     def schema(self):
@@ -25,6 +30,10 @@ class DataFrameMetadata():
     def id(self):
         return self._id
 
+    @id.setter
+    def id(self, table_id):
+        self._id = table_id
+
     @property
     def name(self):
         return self._name
@@ -41,14 +50,34 @@ class DataFrameMetadata():
     def identifier_column(self):
         return self._unique_identifier_column
 
+    @property
+    def group_size(self):
+        """
+        Number of frames stored in each group of the table
+        """
+        return self._group_size
+
+    @property
+    def frame_codec(self):
+        for column in self.schema.column_list:
+            if column.name == 'data':
+                return column.codec
+        return ColumnCodec.RAW
+
     def __eq__(self, other):
-        # return self.id == other.id and \
+        if self.id is not None and other.id is not None:
+            return self.id == other.id
         return self.file_url == other.file_url and \
             self.schema == other.schema and \
             self.identifier_column == other.identifier_column and \
+            self.group_size == other.group_size and \
             self.name == other.name
     
     def serialize(self) -> bytes:
+        # Tables in the catalog are only referred to by their id
+        if self._id is not None:
+            return pickle.dumps({'table_id': self._id})
+
         height = 0
         width = 0
         has_lsn = False
@@ -62,18 +91,26 @@ class DataFrameMetadata():
             'file_url': self._file_url,
             'height': height,
             'width': width,
-            'has_lsn': has_lsn
+            'has_lsn': has_lsn,
+            'codec': self.frame_codec.name,
+            'group_size': self._group_size
         }
         return pickle.dumps(data)
     
     @classmethod
     def deserialize(cls, data) -> DataFrameMetadata:
         data_dict = pickle.loads(data)
-        
-        dataframe_metadata = DataFrameMetadata(Path(data_dict['file_url']).stem, data_dict['file_url'])
+        if 'table_id' in data_dict:
+            # Imported here since the catalog builds DataFrameMetadata objects
+            from src.catalog.catalog_manager import CatalogManager
+            return CatalogManager().get_table_by_id(data_dict['table_id'])
+
+        dataframe_metadata = DataFrameMetadata(Path(data_dict['file_url']).stem, data_dict['file_url'],
+                                               group_size=data_dict.get('group_size', BATCH_SIZE))
         dataframe_columns = [
             DataFrameColumn('id', ColumnType.INTEGER),
-            DataFrameColumn('data', ColumnType.NDARRAY, array_dimensions= [data_dict['height'], data_dict['width'], 3]),
+            DataFrameColumn('data', ColumnType.NDARRAY, array_dimensions= [data_dict['height'], data_dict['width'], 3],
+                            codec=ColumnCodec[data_dict.get('codec', ColumnCodec.RAW.name)]),
         ]
         if data_dict['has_lsn']:
             dataframe_columns.append(DataFrameColumn('lsn', ColumnType.INTEGER))
@@ -1,17 +1,38 @@
 import numpy as np
+from petastorm.codecs import CompressedImageCodec
 from petastorm.codecs import NdarrayCodec
 from petastorm.codecs import ScalarCodec
 from petastorm.unischema import Unischema
 from petastorm.unischema import UnischemaField
 from pyspark.sql.types import IntegerType, FloatType, StringType
 
+from src.catalog.column_codec import ColumnCodec
 from src.catalog.column_type import ColumnType
+from src.catalog.zstd_ndarray_codec import ZstdNdarrayCodec
+from src.config.constants import JPEG_QUALITY
 from src.utils.logging_manager import LoggingLevel
 from src.utils.logging_manager import LoggingManager
 
 
 class SchemaUtils(object):
 
+    @staticmethod
+    def get_petastorm_codec(column_codec):
+        petastorm_codec = None
+        if column_codec == ColumnCodec.RAW:
+            petastorm_codec = NdarrayCodec()
+        elif column_codec == ColumnCodec.PNG:
+            petastorm_codec = CompressedImageCodec('png')
+        elif column_codec == ColumnCodec.JPEG:
+            petastorm_codec = CompressedImageCodec('jpeg', quality=JPEG_QUALITY)
+        elif column_codec == ColumnCodec.ZSTD:
+            petastorm_codec = ZstdNdarrayCodec()
+        else:
+            LoggingManager().log("Invalid column codec: " + str(column_codec),
+                                 LoggingLevel.ERROR)
+
+        return petastorm_codec
+
     @staticmethod
     def get_petastorm_column(df_column):
 
@@ -47,7 +68,8 @@ class SchemaUtils(object):
             petastorm_column = UnischemaField(column_name,
                                               np.uint8,
                                               column_array_dimensions,
-                                              NdarrayCodec(),
+                                              SchemaUtils.get_petastorm_codec(
+                                                  df_column.codec),
                                               column_is_nullable)
         else:
             LoggingManager().log("Invalid column type: " + str(column_type),
@@ -0,0 +1,35 @@
+import zstandard
+from io import BytesIO
+
+import numpy as np
+from petastorm.codecs import NdarrayCodec
+
+from src.config.constants import ZSTD_COMPRESSION_LEVEL
+
+
+class ZstdNdarrayCodec(NdarrayCodec):
+    """
+    Encodes a numpy ndarray the same way as NdarrayCodec, but compresses
+    the serialized array with zstd. The class name is pickled into the
+    petastorm dataset metadata, so it must not be renamed.
+    Attributes:
+        level (int, optional): zstd compression level
+    """
+    def __init__(self, level=ZSTD_COMPRESSION_LEVEL):
+        self._level = level
+
+    @property
+    def level(self):
+        return self._level
+
+    def encode(self, unischema_field, value):
+        # The parent class validates the dtype and shape of the frame
+        serialized = super().encode(unischema_field, value)
+        return bytearray(zstandard.ZstdCompressor(level=self._level).compress(bytes(serialized)))
+
+    def decode(self, unischema_field, value):
+        memfile = BytesIO(zstandard.ZstdDecompressor().decompress(bytes(value)))
+        return np.load(memfile)
+
+    def __str__(self):
+        return f'{type(self).__name__}({self._level})'
@@ -2,5 +2,58 @@ PETASTORM_STORAGE_FOLDER = 'store'
 SHADOW_PETASTORM_STORAGE_FOLDER = 'shadow_store'
 INPUT_VIDEO_FOLDER = 'data'
 TRANSACTION_STORAGE_FOLDER = 'transaction_storage'
+# Kept apart from the data folders so log records can still be resolved
+# after the stores are cleared
+CATALOG_FOLDER = 'catalog'
 BENCHMARK_DATA_FOLDER = 'benchmark_data'
-BATCH_SIZE = 50
\ No newline at end of file
+BATCH_SIZE = 50
+JPEG_QUALITY = 90
+ZSTD_COMPRESSION_LEVEL = 3
+MANIFEST_FILE_NAME = '_manifest'
+CATALOG_FILE_NAME = '_catalog'
+# Number of raw frames the parquet row groups of a group are sized for,
+# small enough that frame range reads can skip most of a group using row
+# group statistics
+ROW_GROUP_FRAMES = 10
+# Upper bound on the size of a parquet row group
+ROW_GROUP_SIZE_MB = 16
+# Default target size of a group when picking a group size for a table
+TARGET_GROUP_SIZE_MB = 128
+# Number of groups read concurrently when scanning a whole table
+SCAN_WORKERS = 4
+# Number of decoded batches the workers of a parallel video read can get
+# ahead of the consumer
+DECODE_QUEUE_SIZE = 4
+# Seconds a parallel video read waits for a batch before checking that its
+# workers are still alive
+DECODE_POLL_TIMEOUT = 1
+# Max number of batches waiting between stages of the ingest pipeline
+INGEST_QUEUE_SIZE = 4
+# Number of threads writing groups during ingest
+INGEST_WRITERS = 4
+# Max number of released batch buffers kept by a reader for reuse
+FRAME_BUFFER_POOL_SIZE = 4
+# Number of worker processes applying updates in parallel
+UPDATE_WORKERS = 4
+# Max number of deferred updates queued for a table before they are applied
+DEFERRED_UPDATE_LIMIT = 16
+# Number of frames each update operation is timed on to calibrate its cost
+CALIBRATION_FRAMES = 8
+# Folder under the transaction storage folder holding group snapshots
+SNAPSHOT_FOLDER_NAME = 'snapshots'
+# A group snapshot is retaken once this many bytes of log were written
+# after it, bounding the records replayed when undoing from it
+SNAPSHOT_MAX_LOG_DISTANCE = 64 * 1024
+# zstd level of compressed before and after images, low since they are
+# written on the update path
+IMAGE_COMPRESSION_LEVEL = 1
+# File in a transaction's folder its images are appended to when using an
+# image store
+IMAGE_STORE_FILE_NAME = 'images'
+# Seconds between runs of the transaction storage garbage collector
+GC_INTERVAL_SECONDS = 5
+# Max bytes of transaction storage the garbage collector deletes per second
+GC_MAX_BYTES_PER_SECOND = 256 * 1024 * 1024
+# Max bytes of before images kept in memory by an undo buffer before the
+# oldest are spilled to disk
+UNDO_BUFFER_MAX_BYTES = 256 * 1024 * 1024
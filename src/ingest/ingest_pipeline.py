@@ -0,0 +1,152 @@
+import queue
+import threading
+import pandas as pd
+
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.models.storage.batch import Batch
+from src.readers.abstract_reader import AbstractReader
+from src.utils.logging_manager import LoggingLevel, LoggingManager
+from src.config.constants import INGEST_QUEUE_SIZE, INGEST_WRITERS
+
+# Put on a queue once its producer is done
+_END_OF_STREAM = None
+
+class IngestPipeline():
+    def __init__(self, storage_engine, table: DataFrameMetadata, reader: AbstractReader,
+                 num_writers=INGEST_WRITERS, queue_size=INGEST_QUEUE_SIZE):
+        """
+        Streams a video into a storage engine with three stages running
+        concurrently, connected by bounded queues:
+            decode: iterates the reader, which may itself decode in parallel
+            group builder: reassembles decoded batches into whole groups of
+                the table, since a group is written in one piece
+            writers: a pool of threads writing groups to the storage engine
+        A full queue blocks its producer, so at most a few batches per stage
+        are in memory regardless of the video length.
+        Attributes:
+            storage_engine: engine the table was created in
+            table (DataFrameMetadata): table to write into
+            reader (AbstractReader): source of the frames
+            num_writers (int): number of concurrent group writers. Engines
+                appending to a single dataset should use 1.
+            queue_size (int): max number of batches waiting between stages
+        """
+        self.storage_engine = storage_engine
+        self.table = table
+        self.reader = reader
+        self.num_writers = max(1, num_writers)
+        self._decoded_queue = queue.Queue(queue_size)
+        self._group_queue = queue.Queue(queue_size)
+        self._stop = threading.Event()
+        self._error = None
+        self._error_lock = threading.Lock()
+        self._frames_written = 0
+        self._frames_written_lock = threading.Lock()
+
+    def _fail(self, error: Exception) -> None:
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+        self._stop.set()
+
+    def _put(self, target_queue: queue.Queue, item) -> bool:
+        """
+        Blocks while the queue is full. Returns False if the pipeline
+        failed in the meantime.
+        """
+        while not self._stop.is_set():
+            try:
+                target_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, source_queue: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return source_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _END_OF_STREAM
+
+    def _decode(self) -> None:
+        try:
+            for batch in self.reader.read():
+                if not self._put(self._decoded_queue, batch):
+                    return
+            self._put(self._decoded_queue, _END_OF_STREAM)
+        except Exception as e:
+            self._fail(e)
+
+    def _build_groups(self) -> None:
+        try:
+            # group_num -> list of partial DataFrames
+            partial_groups = {}
+            partial_sizes = {}
+            while True:
+                batch = self._get(self._decoded_queue)
+                if batch is _END_OF_STREAM:
+                    break
+                frames = batch.frames
+                group_nums = frames.id // self.table.group_size
+                if len(frames) == self.table.group_size and group_nums.nunique() == 1 \
+                        and group_nums.iloc[0] not in partial_groups:
+                    # Already a whole group, pass it through as is so its
+                    # buffer can go back to the reader once written
+                    if not self._put(self._group_queue, batch):
+                        return
+                    continue
+                for group_num, group_frames in frames.groupby(group_nums, sort=True):
+                    partial_groups.setdefault(group_num, []).append(group_frames)
+                    partial_sizes[group_num] = partial_sizes.get(group_num, 0) + len(group_frames)
+                    if partial_sizes[group_num] == self.table.group_size:
+                        if not self._put(self._group_queue, self._to_group(partial_groups.pop(group_num))):
+                            return
+                        del partial_sizes[group_num]
+
+            if self._stop.is_set():
+                return
+            # Only the last group of the video can be partial
+            for group_num in sorted(partial_groups.keys()):
+                if not self._put(self._group_queue, self._to_group(partial_groups[group_num])):
+                    return
+            for _ in range(self.num_writers):
+                self._put(self._group_queue, _END_OF_STREAM)
+        except Exception as e:
+            self._fail(e)
+
+    def _to_group(self, frames_list) -> Batch:
+        return Batch(pd.concat(frames_list, ignore_index=True))
+
+    def _write(self) -> None:
+        try:
+            while True:
+                group = self._get(self._group_queue)
+                if group is _END_OF_STREAM:
+                    return
+                LoggingManager().log(f'Writing group {group.get_group_num(self.table.group_size)}', LoggingLevel.DEBUG)
+                self.storage_engine.write(self.table, group)
+                with self._frames_written_lock:
+                    self._frames_written += len(group)
+                if group.frame_buffer is not None:
+                    self.reader.release_batch(group)
+        except Exception as e:
+            self._fail(e)
+
+    def run(self) -> int:
+        """
+        Writes every frame of the reader into the table and returns the
+        number of frames written. Re-raises the first error of any stage.
+        """
+        threads = [threading.Thread(target=self._decode), threading.Thread(target=self._build_groups)]
+        threads += [threading.Thread(target=self._write) for _ in range(self.num_writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._error is not None:
+            raise self._error
+        LoggingManager().log(f'Ingested {self._frames_written} frames into {self.table.file_url}', LoggingLevel.INFO)
+        return self._frames_written
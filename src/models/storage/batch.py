@@ -1,8 +1,12 @@
+import io
 import json
+import mmap
+import pickle
+import struct
 import numpy as np
 import pandas as pd
 
-from typing import List
+from typing import Dict, List, Tuple
 from pandas import DataFrame
 from src.utils.logging_manager import LoggingManager, LoggingLevel
 from src.config.constants import BATCH_SIZE
@@ -22,17 +26,65 @@ def as_batch(d):
         return d
 
 
+# Binary batch layout, all integers little endian:
+#   magic  num_buffers  metadata_length  [buffer_length]*num_buffers
+#   metadata (pickle protocol 5)  padding  [buffer  padding]*num_buffers
+# Buffers start at BUFFER_ALIGNMENT byte offsets, so that arrays
+# deserialized from a memory-mapped file are aligned views into it.
+BATCH_MAGIC = b'VLRB'
+BATCH_HEADER_FORMAT = '<4sII'
+BUFFER_ALIGNMENT = 64
+
+
+def _padding(offset: int) -> int:
+    return -offset % BUFFER_ALIGNMENT
+
+
+def _stack_column(values: pd.Series):
+    """
+    Returns the ndarrays of the column stacked into one contiguous array,
+    or None if the column isn't made of ndarrays of a single shape and type
+    """
+    if len(values) == 0 or values.dtype != object:
+        return None
+    first = values.iloc[0]
+    if not isinstance(first, np.ndarray):
+        return None
+    for value in values:
+        if not isinstance(value, np.ndarray) \
+                or value.shape != first.shape or value.dtype != first.dtype:
+            return None
+    stacked = np.empty((len(values),) + first.shape, dtype=first.dtype)
+    for i, value in enumerate(values):
+        stacked[i] = value
+    return stacked
+
+
+def to_frame_column(frames: np.ndarray) -> np.ndarray:
+    """
+    Returns an object array holding a view into frames, an array of shape
+    [N, H, W, C], for each frame, to be used as a DataFrame column
+    """
+    views = np.empty(len(frames), dtype=object)
+    for i in range(len(frames)):
+        views[i] = frames[i]
+    return views
+
+
 class Batch:
     """
     Data model used for storing a batch of frames
     Arguments:
         frames (DataFrame): pandas Dataframe holding frames data
         identifier_column (str): A column used to uniquely a row
+        frame_buffer (ndarray, optional): preallocated array the frames are
+            views of, handed back to its pool once the batch is released
     """
 
     def __init__(self,
                  frames=pd.DataFrame(),
-                 identifier_column='id'):
+                 identifier_column='id',
+                 frame_buffer=None):
         super().__init__()
         # store the batch with columns sorted
         if isinstance(frames, DataFrame):
@@ -44,6 +96,7 @@ class Batch:
                 Expected pandas.DataFrame')
         self._batch_size = len(frames)
         self._identifier_column = identifier_column
+        self._frame_buffer = frame_buffer
 
     @property
     def frames(self):
@@ -60,6 +113,26 @@ class Batch:
     def identifier_column(self):
         return self._identifier_column
 
+    @property
+    def frame_buffer(self):
+        return self._frame_buffer
+
+    @classmethod
+    def from_frame_array(cls, frames: np.ndarray, columns: Dict[str, List] = {},
+                         column_name='data', frame_buffer=None) -> 'Batch':
+        """
+        Creates a batch whose frames are views into frames, an array of
+        shape [N, H, W, C], without copying them
+        Arguments:
+            frames (ndarray): the stacked frames
+            columns (Dict[str, List]): the other columns of the batch
+            column_name (str): name of the frame column
+            frame_buffer (ndarray, optional): see Batch
+        """
+        data = dict(columns)
+        data[column_name] = to_frame_column(frames)
+        return cls(pd.DataFrame(data), frame_buffer=frame_buffer)
+
     def column_as_numpy_array(self, column_name='data'):
         return np.array(self._frames[column_name])
 
@@ -75,6 +148,95 @@ class Batch:
         return cls(frames=obj['frames'],
                    identifier_column=obj['identifier_column'])
 
+    def _serialize(self) -> Tuple[bytes, List[pickle.PickleBuffer]]:
+        columns = []
+        for name in self._frames.columns:
+            values = self._frames[name]
+            stacked = _stack_column(values)
+            if stacked is not None:
+                columns.append((name, True, stacked))
+            else:
+                columns.append((name, False, values.to_numpy()))
+        obj = {'columns': columns,
+               'identifier_column': self.identifier_column}
+        buffers = []
+        metadata = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+        return metadata, [buffer.raw() for buffer in buffers]
+
+    def _write_serialized(self, output) -> None:
+        metadata, buffers = self._serialize()
+        header = struct.pack(BATCH_HEADER_FORMAT, BATCH_MAGIC, len(buffers), len(metadata))
+        header += struct.pack(f'<{len(buffers)}Q', *[buffer.nbytes for buffer in buffers])
+        offset = len(header) + len(metadata)
+        output.write(header)
+        output.write(metadata)
+        for buffer in buffers:
+            output.write(b'\0' * _padding(offset))
+            offset = offset + _padding(offset)
+            output.write(buffer)
+            offset = offset + buffer.nbytes
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes the batch into a binary format where each ndarray column
+        is stored as one contiguous buffer instead of being encoded frame by
+        frame, see from_bytes
+        """
+        output = io.BytesIO()
+        self._write_serialized(output)
+        return output.getvalue()
+
+    def to_file(self, path: str) -> None:
+        with open(path, 'wb') as batch_file:
+            self._write_serialized(batch_file)
+
+    @classmethod
+    def from_bytes(cls, data) -> 'Batch':
+        """
+        Deserializes a batch written by to_bytes or to_file. The ndarray
+        columns are not copied, their frames are views into data.
+        Arguments:
+            data (bytes-like): serialized batch. Frames are only writable if
+                data is, e.g. a bytearray or a copy-on-write mmap.
+        """
+        data = memoryview(data)
+        header_size = struct.calcsize(BATCH_HEADER_FORMAT)
+        magic, num_buffers, metadata_length = struct.unpack_from(BATCH_HEADER_FORMAT, data)
+        if magic != BATCH_MAGIC:
+            raise ValueError('Not a serialized batch')
+        buffer_lengths = struct.unpack_from(f'<{num_buffers}Q', data, header_size)
+
+        offset = header_size + struct.calcsize(f'<{num_buffers}Q')
+        metadata = data[offset:offset + metadata_length]
+        offset = offset + metadata_length
+        buffers = []
+        for buffer_length in buffer_lengths:
+            offset = offset + _padding(offset)
+            buffers.append(data[offset:offset + buffer_length])
+            offset = offset + buffer_length
+
+        obj = pickle.loads(metadata, buffers=buffers)
+        frames = pd.DataFrame({name: to_frame_column(values) if stacked else values
+                               for name, stacked, values in obj['columns']})
+        return cls(frames, identifier_column=obj['identifier_column'])
+
+    @classmethod
+    def from_file(cls, path: str, memory_map=True) -> 'Batch':
+        """
+        Reads a batch written by to_file.
+        Arguments:
+            path (str): path of the file
+            memory_map (bool): map the file copy-on-write instead of reading
+                it, frames are then paged in on first access and changing
+                them never writes back to the file
+        """
+        with open(path, 'rb') as batch_file:
+            if memory_map:
+                data = mmap.mmap(batch_file.fileno(), 0, access=mmap.ACCESS_COPY)
+            else:
+                data = bytearray(batch_file.read())
+        return cls.from_bytes(data)
+
     def __str__(self):
         """
         For debug propose
@@ -238,7 +400,7 @@ class Batch:
         """ Resets the index of the data frame in the batch"""
         self._frames.reset_index(drop=True, inplace=True)
     
-    def get_group_num(self):
+    def get_group_num(self, group_size: int = BATCH_SIZE):
         if self._frames.shape[1] == 0:
             return -1
-        return int(self._frames.id.iloc[0] // BATCH_SIZE)
\ No newline at end of file
+        return int(self._frames.id.iloc[0] // group_size)
\ No newline at end of file
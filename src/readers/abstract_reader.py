@@ -1,9 +1,11 @@
 from abc import ABCMeta, abstractmethod
 from pathlib import Path
-from typing import Iterator, Dict
+from typing import Iterator, Dict, Callable, Tuple
+import numpy as np
 import pandas as pd
 
 from src.models.storage.batch import Batch
+from src.readers.frame_buffer_pool import FrameBufferPool
 from src.config.constants import BATCH_SIZE
 
 
@@ -16,6 +18,11 @@ class AbstractReader(metaclass=ABCMeta):
         file_url (str): path to read data from
         batch_size (int, optional): No. of frames to read in batch from video
         offset (int, optional): Start frame location in video
+        Readers implementing _frame_shape and _read_into decode frames
+        straight into preallocated [batch_size, H, W, C] buffers, which the
+        yielded batches are views of. Readers only implementing
+        _frame_shape get their frames copied into the buffers. Pass the batches back to
+        release_batch once done with them to recycle the buffers.
         """
 
     def __init__(self, file_url: str, batch_size=None,
@@ -27,6 +34,7 @@ class AbstractReader(metaclass=ABCMeta):
         self.file_url = file_url
         self.batch_size = batch_size
         self.offset = offset
+        self._buffer_pool = None
 
     def read(self) -> Iterator[Batch]:
         """
@@ -34,20 +42,79 @@ class AbstractReader(metaclass=ABCMeta):
         yields the batch to the caller
         """
 
-        data_batch = []
         # Fetch batch_size from Config if not provided
         if self.batch_size is None or self.batch_size < 0:
             if self.batch_size is None:
                 self.batch_size = BATCH_SIZE
 
+        frame_shape = self._frame_shape()
+        if frame_shape is not None:
+            yield from self._read_preallocated(frame_shape)
+            return
+
+        data_batch = []
+        batch_count = 0
         for data in self._read():
             data_batch.append(data)
-            if len(data_batch) % self.batch_size == 0:
+            batch_count += 1
+            if batch_count == self.batch_size:
                 yield Batch(pd.DataFrame(data_batch))
                 data_batch = []
+                batch_count = 0
         if data_batch:
             yield Batch(pd.DataFrame(data_batch))
 
+    def _read_preallocated(self, frame_shape: Tuple[int, ...]) -> Iterator[Batch]:
+        buffer_shape = (self.batch_size,) + tuple(frame_shape)
+        if self._buffer_pool is None or self._buffer_pool.shape != buffer_shape:
+            self._buffer_pool = FrameBufferPool(buffer_shape)
+
+        buffer = self._buffer_pool.acquire()
+        columns = {}
+        batch_count = 0
+
+        def next_frame() -> np.ndarray:
+            return buffer[batch_count]
+
+        for data in self._read_into(next_frame):
+            for key, value in data.items():
+                columns.setdefault(key, []).append(value)
+            batch_count += 1
+            if batch_count == self.batch_size:
+                yield Batch.from_frame_array(buffer, columns, frame_buffer=buffer)
+                buffer = self._buffer_pool.acquire()
+                columns = {}
+                batch_count = 0
+        if batch_count > 0:
+            yield Batch.from_frame_array(buffer[:batch_count], columns, frame_buffer=buffer)
+        else:
+            self._buffer_pool.release(buffer)
+
+    def release_batch(self, batch: Batch) -> None:
+        """
+        Hands the buffer of a batch yielded by this reader back for reuse.
+        The batch's frames must not be used afterwards.
+        """
+        if self._buffer_pool is not None:
+            self._buffer_pool.release(batch.frame_buffer)
+
+    def _frame_shape(self) -> Tuple[int, ...]:
+        """
+        Shape of every frame, for readers that can decode into preallocated
+        buffers. None otherwise.
+        """
+        return None
+
+    def _read_into(self, next_frame: Callable[[], np.ndarray]) -> Iterator[Dict]:
+        """
+        Only called if _frame_shape isn't None. For every frame, decodes it
+        into next_frame() and yields the frame's other columns. By default
+        the frames yielded by _read are copied into the buffers.
+        """
+        for row in self._read():
+            next_frame()[...] = row.pop('data')
+            yield row
+
     @abstractmethod
     def _read(self) -> Iterator[Dict]:
         """
@@ -0,0 +1,166 @@
+from typing import Iterator, Dict, List
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.models.storage.batch import Batch
+from src.utils.logging_manager import LoggingLevel, LoggingManager
+
+class ColumnarParquetReader():
+    def __init__(self, schema, columns=None, predicate=None, frame_range=None,
+                 cur_shard=None, shard_count=None):
+        """
+        Reads the parquet files of a petastorm store column by column
+        instead of through make_reader's row dicts. Each column of a parquet
+        row group is decoded in one pass, and ndarray columns are stacked
+        into a single contiguous array which the Batch's rows are views of.
+        Attributes:
+            schema (Unischema): petastorm schema of the store
+            columns (List[str], optional): Only read and decode these
+                columns. All columns are read if None.
+            predicate (PredicateBase, optional): instance of predicate object
+                to filter rows to be returned by reader
+            frame_range (Tuple[int, int], optional): Only read frames with
+                an id in [start, end]. Row groups whose id statistics don't
+                overlap the range are skipped.
+            cur_shard (int, optional): Shard number to load from if sharded
+            shard_count (int, optional): Specify total number of shards if
+                applicable. Like make_reader, the row groups of the files
+                are split between the shards.
+        """
+        self.schema = schema
+        self.columns = columns if columns is not None else list(schema.fields.keys())
+        self.predicate = predicate
+        self.frame_range = frame_range
+        self.cur_shard = cur_shard
+        self.shard_count = shard_count
+
+        # Columns needed to decide which rows are read, these are read and
+        # decoded first and the others only for the matching rows
+        self._filter_columns = []
+        if self.frame_range is not None:
+            self._filter_columns.append('id')
+        if self.predicate is not None:
+            self._filter_columns += [name for name in self.predicate.get_fields()
+                                     if name not in self._filter_columns]
+        self._other_columns = [name for name in self.columns if name not in self._filter_columns]
+
+    def _row_group_in_range(self, row_group_metadata) -> bool:
+        if self.frame_range is None:
+            return True
+        start_frame, end_frame = self.frame_range
+        for i in range(row_group_metadata.num_columns):
+            column = row_group_metadata.column(i)
+            if column.path_in_schema != 'id':
+                continue
+            statistics = column.statistics
+            if statistics is None or not statistics.has_min_max:
+                return True
+            return statistics.min <= end_frame and statistics.max >= start_frame
+        return True
+
+    def _decode_column(self, name: str, values: List) -> List:
+        field = self.schema.fields[name]
+        if field.codec:
+            return [field.codec.decode(field, value) if value is not None else None for value in values]
+        if field.numpy_dtype and issubclass(field.numpy_dtype, np.generic):
+            return [field.numpy_dtype(value) if value is not None else None for value in values]
+        return values
+
+    def _read_row_group(self, parquet_file, row_group: int) -> Dict[str, List]:
+        """
+        Returns the decoded columns of the matching rows of the row group
+        """
+        mask = None
+        decoded = {}
+        if self._filter_columns:
+            filter_table = parquet_file.read_row_group(row_group, columns=self._filter_columns)
+            for name in self._filter_columns:
+                decoded[name] = self._decode_column(name, filter_table.column(name).to_pylist())
+
+            num_rows = filter_table.num_rows
+            mask = [True] * num_rows
+            if self.frame_range is not None:
+                start_frame, end_frame = self.frame_range
+                mask = [start_frame <= frame_id <= end_frame for frame_id in decoded['id']]
+            if self.predicate is not None:
+                mask = [include and self.predicate.do_include({name: decoded[name][i] for name in self._filter_columns})
+                        for i, include in enumerate(mask)]
+            if not any(mask):
+                return {}
+            for name in self._filter_columns:
+                decoded[name] = [value for value, include in zip(decoded[name], mask) if include]
+
+        if self._other_columns:
+            other_table = parquet_file.read_row_group(row_group, columns=self._other_columns)
+            for name in self._other_columns:
+                values = other_table.column(name).to_pylist()
+                if mask is not None:
+                    values = [value for value, include in zip(values, mask) if include]
+                decoded[name] = self._decode_column(name, values)
+
+        return {name: decoded[name] for name in self.columns}
+
+    def read_columns(self, parquet_paths: List[str]) -> Iterator[Dict[str, List]]:
+        """
+        Yields the decoded columns of each parquet row group with matching
+        rows
+        """
+        row_group_index = 0
+        for parquet_path in parquet_paths:
+            parquet_file = pq.ParquetFile(parquet_path)
+            for row_group in range(parquet_file.metadata.num_row_groups):
+                row_group_index = row_group_index + 1
+                if self.shard_count is not None \
+                        and (row_group_index - 1) % self.shard_count != (self.cur_shard or 0):
+                    continue
+                if not self._row_group_in_range(parquet_file.metadata.row_group(row_group)):
+                    LoggingManager().log(f'Skipping row group {row_group} of {parquet_path}', LoggingLevel.DEBUG)
+                    continue
+                columns = self._read_row_group(parquet_file, row_group)
+                if columns:
+                    yield columns
+
+    def _to_series(self, name: str, values: List) -> pd.Series:
+        field = self.schema.fields[name]
+        if len(field.shape) == 0 or len(values) == 0 or any(value is None for value in values):
+            return pd.Series(values, dtype=object if len(field.shape) > 0 else None)
+
+        # Copy the frames into one contiguous array, the rows of the batch
+        # are views into it
+        stacked = np.empty((len(values),) + values[0].shape, dtype=values[0].dtype)
+        for i, value in enumerate(values):
+            stacked[i] = value
+        series = np.empty(len(values), dtype=object)
+        for i in range(len(values)):
+            series[i] = stacked[i]
+        return pd.Series(series)
+
+    def to_batch(self, columns: Dict[str, List]) -> Batch:
+        return Batch(pd.DataFrame({name: self._to_series(name, columns.get(name, []))
+                                   for name in self.columns}))
+
+    def read_batch(self, parquet_paths: List[str]) -> Batch:
+        """
+        Reads every matching row of the files into a single Batch
+        """
+        columns = {name: [] for name in self.columns}
+        for row_group_columns in self.read_columns(parquet_paths):
+            for name in self.columns:
+                columns[name] += row_group_columns[name]
+        return self.to_batch(columns)
+
+    def read_batches(self, parquet_paths: List[str], batch_size: int) -> Iterator[Batch]:
+        """
+        Reads every matching row of the files into Batches of batch_size
+        rows
+        """
+        columns = {name: [] for name in self.columns}
+        for row_group_columns in self.read_columns(parquet_paths):
+            for name in self.columns:
+                columns[name] += row_group_columns[name]
+            while len(columns[self.columns[0]]) >= batch_size:
+                yield self.to_batch({name: values[:batch_size] for name, values in columns.items()})
+                columns = {name: values[batch_size:] for name, values in columns.items()}
+        if len(columns[self.columns[0]]) > 0:
+            yield self.to_batch(columns)
@@ -0,0 +1,36 @@
+import threading
+import numpy as np
+from typing import Tuple
+
+from src.config.constants import FRAME_BUFFER_POOL_SIZE
+
+class FrameBufferPool():
+    def __init__(self, shape: Tuple[int, ...], dtype=np.uint8, size=FRAME_BUFFER_POOL_SIZE):
+        """
+        Small pool of preallocated frame buffers of a fixed shape, usually
+        [batch_size, H, W, C]. Batches wrap views of a buffer without
+        copying, so a buffer is only reused after it was explicitly
+        released, never just because a new batch is needed.
+        Attributes:
+            shape (Tuple[int]): shape of each buffer
+            dtype: dtype of each buffer
+            size (int): max number of released buffers kept for reuse
+        """
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.size = size
+        self._free = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> np.ndarray:
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        return np.empty(self.shape, dtype=self.dtype)
+
+    def release(self, buffer: np.ndarray) -> None:
+        if buffer is None or buffer.shape != self.shape or buffer.dtype != self.dtype:
+            return
+        with self._lock:
+            if len(self._free) < self.size and not any(free is buffer for free in self._free):
+                self._free.append(buffer)
@@ -1,14 +1,67 @@
 import cv2
-from typing import Iterator, Dict
+import math
+import numpy as np
+import multiprocessing as mp
+import traceback
+from queue import Empty
+import pandas as pd
+from typing import Iterator, Dict, List, Tuple, Callable
 
+from src.models.storage.batch import Batch
 from src.readers.abstract_reader import AbstractReader
 from src.utils.logging_manager import LoggingLevel
 from src.utils.logging_manager import LoggingManager
+from src.config.constants import BATCH_SIZE, DECODE_QUEUE_SIZE, DECODE_POLL_TIMEOUT
+
+
+class SegmentDecodeException(Exception):
+    def __init__(self, segment, worker_traceback):
+        super(SegmentDecodeException, self).__init__(f'Segment {segment}: {worker_traceback}')
+
+
+def _decode_segment(file_url: str, segment: int, start_frame: int, num_frames: int,
+                    start_frame_id: int, batch_size: int, include_lsn: bool, queue,
+                    slots=None) -> None:
+    """
+    Runs in a worker process. Decodes num_frames frames (or until the end of
+    the video if None) starting at start_frame and puts
+    (segment, Batch) on the queue, followed by (segment, None) once done.
+    If slots is given, a slot is taken before putting each batch.
+    """
+    try:
+        video = cv2.VideoCapture(file_url)
+        video.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+        data_batch = []
+        frame_id = start_frame_id
+        decoded = 0
+        while num_frames is None or decoded < num_frames:
+            _, frame = video.read()
+            if frame is None:
+                break
+            if not include_lsn:
+                data_batch.append({'id': frame_id, 'data': frame})
+            else:
+                data_batch.append({'id': frame_id, 'data': frame, 'lsn': -1})
+            frame_id += 1
+            decoded += 1
+            if len(data_batch) == batch_size:
+                if slots != None:
+                    slots.acquire()
+                queue.put((segment, Batch(pd.DataFrame(data_batch))))
+                data_batch = []
+        if data_batch:
+            if slots != None:
+                slots.acquire()
+            queue.put((segment, Batch(pd.DataFrame(data_batch))))
+        queue.put((segment, None))
+    except Exception:
+        queue.put((segment, traceback.format_exc()))
 
 
 class OpenCVReader(AbstractReader):
 
-    def __init__(self, *args, start_frame_id=0, include_lsn=False, **kwargs):
+    def __init__(self, *args, start_frame_id=0, include_lsn=False, num_workers=1, ordered=True, **kwargs):
         """
             Reads video using OpenCV and yields frame data.
             It will use the `start_frame_id` while annotating the
@@ -20,11 +73,142 @@ class OpenCVReader(AbstractReader):
                     It is different from offset. Offset defines where in video
                     should we start reading. And start_frame_id defines the id
                     we assign to first read frame.
+                num_workers (int): number of processes decoding the video.
+                    With more than one, the frames are split into that many
+                    contiguous segments of whole batches, each decoded by
+                    its own worker.
+                ordered (bool): with num_workers > 1, whether batches are
+                    yielded in frame order. Workers of later segments can
+                    only decode a few batches ahead of the one being read,
+                    so ordered=False is faster: batches are yielded as soon
+                    as they are decoded, each one still holds consecutive
+                    frames of a single group so they can be written out of
+                    order.
          """
         self._start_frame_id = start_frame_id
         self.include_lsn = include_lsn
+        self.num_workers = num_workers
+        self.ordered = ordered
         super().__init__(*args, **kwargs)
 
+    def read(self) -> Iterator[Batch]:
+        if self.num_workers <= 1:
+            yield from super().read()
+        else:
+            yield from self._read_parallel()
+
+    def _segments(self) -> List[Tuple[int, int]]:
+        """
+        Returns (start_frame, num_frames) of each segment, the last segment
+        runs until the end of the video since the frame count reported by
+        OpenCV is only an estimate for some containers
+        """
+        video_offset = self.offset if self.offset else 0
+        total_frames = max(0, self.video_frame_count() - video_offset)
+        # Segments hold whole batches, so a batch never spans two workers
+        segment_batches = max(1, math.ceil(math.ceil(total_frames / self.batch_size) / self.num_workers))
+        segment_frames = segment_batches * self.batch_size
+
+        segments = []
+        start_frame = video_offset
+        while start_frame < video_offset + total_frames:
+            segments.append((start_frame, segment_frames))
+            start_frame += segment_frames
+        if not segments:
+            segments.append((video_offset, None))
+        else:
+            segments[-1] = (segments[-1][0], None)
+        return segments
+
+    def _read_parallel(self) -> Iterator[Batch]:
+        if self.batch_size is None or self.batch_size < 0:
+            self.batch_size = BATCH_SIZE
+        video_offset = self.offset if self.offset else 0
+        segments = self._segments()
+        LoggingManager().log(f'Reading frames with {len(segments)} workers', LoggingLevel.INFO)
+
+        # Spawn rather than fork, OpenCV's internal threads don't survive a fork
+        context = mp.get_context('spawn')
+        # Workers can't decode far ahead of the consumer. In order reads
+        # give each segment its own queue, and a worker takes a slot before
+        # putting a batch. Segments waiting their turn share the
+        # DECODE_QUEUE_SIZE slots, the one being drained gets
+        # DECODE_QUEUE_SIZE slots of its own once its turn comes.
+        if self.ordered:
+            waiting_slots = max(1, DECODE_QUEUE_SIZE // len(segments))
+            queues = [context.Queue() for _ in segments]
+            slots = [context.Semaphore(waiting_slots) for _ in segments]
+        else:
+            shared_queue = context.Queue(DECODE_QUEUE_SIZE)
+            queues = [shared_queue for _ in segments]
+            slots = [None for _ in segments]
+
+        workers = []
+        for segment, (start_frame, num_frames) in enumerate(segments):
+            worker = context.Process(target=_decode_segment,
+                                     args=(self.file_url, segment, start_frame, num_frames,
+                                           self._start_frame_id + start_frame - video_offset,
+                                           self.batch_size, self.include_lsn, queues[segment],
+                                           slots[segment]),
+                                     daemon=True)
+            worker.start()
+            workers.append(worker)
+
+        try:
+            if self.ordered:
+                for segment in range(len(segments)):
+                    for _ in range(DECODE_QUEUE_SIZE - waiting_slots):
+                        slots[segment].release()
+                    yield from self._drain_segment(queues[segment], slots[segment], workers, segment)
+            else:
+                yield from self._drain(shared_queue, workers)
+            for worker in workers:
+                worker.join()
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+
+    def _get(self, queue, workers: List, segments: List[int]):
+        """
+        Returns the next (segment, batch) of the queue. Raises
+        SegmentDecodeException if the workers of all of segments died
+        without reporting an error, e.g. they were killed.
+        """
+        while True:
+            try:
+                return queue.get(timeout=DECODE_POLL_TIMEOUT)
+            except Empty:
+                if any(workers[segment].is_alive() for segment in segments):
+                    continue
+                # A worker flushes the queue before exiting
+                try:
+                    return queue.get_nowait()
+                except Empty:
+                    segment = segments[0]
+                    raise SegmentDecodeException(segment, f'worker exited with code {workers[segment].exitcode}')
+
+    def _drain_segment(self, queue, slots, workers: List, segment: int) -> Iterator[Batch]:
+        while True:
+            _, batch = self._get(queue, workers, [segment])
+            if batch is None:
+                return
+            elif isinstance(batch, str):
+                raise SegmentDecodeException(segment, batch)
+            slots.release()
+            yield batch
+
+    def _drain(self, queue, workers: List) -> Iterator[Batch]:
+        running = list(range(len(workers)))
+        while running:
+            segment, batch = self._get(queue, workers, running)
+            if batch is None:
+                running.remove(segment)
+            elif isinstance(batch, str):
+                raise SegmentDecodeException(segment, batch)
+            else:
+                yield batch
+
     def _read(self) -> Iterator[Dict]:
         video = cv2.VideoCapture(self.file_url)
         video_offset = self.offset if self.offset else 0
@@ -44,6 +228,43 @@ class OpenCVReader(AbstractReader):
             _, frame = video.read()
             frame_id += 1
     
+    def _frame_shape(self) -> Tuple[int, ...]:
+        height = self.video_height()
+        width = self.video_width()
+        if height <= 0 or width <= 0:
+            return None
+        return (height, width, 3)
+
+    def _read_into(self, next_frame: Callable[[], np.ndarray]) -> Iterator[Dict]:
+        video = cv2.VideoCapture(self.file_url)
+        video_offset = self.offset if self.offset else 0
+        video.set(cv2.CAP_PROP_POS_FRAMES, video_offset)
+
+        LoggingManager().log("Reading frames", LoggingLevel.INFO)
+
+        frame_id = self._start_frame_id
+        while True:
+            out = next_frame()
+            success, frame = video.read(out)
+            if not success or frame is None:
+                break
+            if frame is not out:
+                # OpenCV allocated a new array, e.g. the frame size changed
+                # mid stream, keep the batch contiguous anyway
+                out[...] = frame
+            if not self.include_lsn:
+                yield {'id': frame_id}
+            else:
+                yield {'id': frame_id, 'lsn': -1}
+            frame_id += 1
+
+    def video_frame_count(self) -> int:
+        video = cv2.VideoCapture(self.file_url)
+
+        if video.isOpened():
+            return int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+        return -1
+
     def video_width(self) -> int:
         video = cv2.VideoCapture(self.file_url)
 
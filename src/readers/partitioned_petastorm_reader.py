@@ -1,8 +1,13 @@
 from petastorm import make_reader
-from typing import Iterator, Dict
+from petastorm.etl.dataset_metadata import get_schema_from_dataset_url
+from typing import Iterator, Dict, List
+from collections import deque
+import glob
 import os
 
+from src.models.storage.batch import Batch
 from src.readers.abstract_reader import AbstractReader
+from src.readers.columnar_parquet_reader import ColumnarParquetReader
 from src.utils.logging_manager import LoggingLevel, LoggingManager
 
 class GroupDoesNotExistException(Exception):
@@ -11,23 +16,47 @@ class GroupDoesNotExistException(Exception):
 
 class PartitionedPetastormReader(AbstractReader):
     def __init__(self, *args, cur_shard=None, shard_count=None,
-                 predicate=None, group_num=None, **kwargs):
+                 predicate=None, group_num=None, columns=None, group_nums=None,
+                 frame_range=None, executor=None, scan_window=1, **kwargs):
         """
         Reads data from the petastorm parquet stores. Note this won't
         work for any arbitary parquet store apart from one materialized
-        using petastorm. In order to generalize, we might have to replace
-        `make_reader` with `make_batch_reader`.
+        using petastorm. Each group is read column by column into a single
+        Batch, unless the read is sharded without a frame_range, which goes
+        through make_reader.
         Attributes:
             cur_shard (int, optional): Shard number to load from if sharded
             shard_count (int, optional): Specify total number of shards if
                                       applicable
             predicate (PredicateBase, optional): instance of predicate object
                 to filter rows to be returned by reader
+            group_num (int, optional): Only read this group if set
+            columns (List[str], optional): Only read and decode these
+                columns. All columns are read if None.
+            group_nums (List[int], optional): Groups known to exist, e.g.
+                from the table manifest. If None, groups are discovered by
+                probing the filesystem.
+            frame_range (Tuple[int, int], optional): Only read frames with
+                an id in [start, end]. Parquet row groups are skipped using
+                their id statistics, so only rows near the range are read.
+            executor (Executor, optional): Long lived pool used to read
+                several groups concurrently. Each group is then yielded as
+                one Batch, in group order.
+            scan_window (int, optional): Max number of groups read ahead
+                of the consumer when an executor is given
         """
         self.cur_shard = cur_shard
         self.shard_count = shard_count
         self.predicate = predicate
         self.group_num = group_num
+        self.columns = columns
+        self.group_nums = group_nums
+        self.frame_range = frame_range
+        self.executor = executor
+        self.scan_window = max(1, scan_window)
+        # All groups of a table share the same schema, it is loaded from
+        # the first group read
+        self._schema = None
         super().__init__(*args, **kwargs)
         if self.cur_shard is not None and self.cur_shard <= 0:
             self.cur_shard = None
@@ -41,9 +70,79 @@ class PartitionedPetastormReader(AbstractReader):
     def _get_group_url(self, group_num: int) -> str:
         return f'{self.file_url}/group{group_num}'
 
+    def read(self) -> Iterator[Batch]:
+        if self.shard_count is not None and self.frame_range is None:
+            yield from super().read()
+        elif self.executor is None:
+            for curr_group_num in self._groups_to_scan():
+                batch = self._read_group_batch(curr_group_num)
+                if not batch.empty():
+                    yield batch
+        else:
+            yield from self._scan()
+
+    def _groups_to_scan(self) -> Iterator[int]:
+        if self.group_nums is not None:
+            yield from self.group_nums
+        elif self.group_num is not None:
+            yield self.group_num
+        else:
+            curr_group_num = 0
+            while os.path.isdir(self._get_group_dir(curr_group_num)):
+                yield curr_group_num
+                curr_group_num = curr_group_num + 1
+
+    def _get_schema(self, curr_group_num: int):
+        if self._schema is None:
+            self._schema = get_schema_from_dataset_url(self._get_group_url(curr_group_num))
+        return self._schema
+
+    def _read_group_batch(self, curr_group_num: int) -> Batch:
+        """
+        Reads the whole group as one Batch. This may run on the executor,
+        so nothing here starts a worker pool.
+        """
+        group_dir = self._get_group_dir(curr_group_num)
+        if self.group_nums is None and not os.path.isdir(group_dir):
+            raise GroupDoesNotExistException(group_dir)
+        columnar_reader = ColumnarParquetReader(self._get_schema(curr_group_num),
+                                                columns=self.columns,
+                                                predicate=self.predicate,
+                                                frame_range=self.frame_range,
+                                                cur_shard=self.cur_shard,
+                                                shard_count=self.shard_count)
+        return columnar_reader.read_batch(sorted(glob.glob(f'{group_dir}/*.parquet')))
+
+    def _scan(self) -> Iterator[Batch]:
+        """
+        Reads up to scan_window groups concurrently on the executor. The
+        futures are consumed in submission order, so batches come out in
+        group order and at most scan_window decoded groups are held in
+        memory at once.
+        """
+        pending = deque()
+        try:
+            for curr_group_num in self._groups_to_scan():
+                pending.append(self.executor.submit(self._read_group_batch, curr_group_num))
+                if len(pending) >= self.scan_window:
+                    batch = pending.popleft().result()
+                    if not batch.empty():
+                        yield batch
+            while pending:
+                batch = pending.popleft().result()
+                if not batch.empty():
+                    yield batch
+        finally:
+            # The consumer may stop early, don't read groups nobody wants
+            for future in pending:
+                future.cancel()
+
     def _read(self) -> Iterator[Dict]:
         # `Todo`: Generalize this reader
-        if(self.group_num == None):
+        if self.group_nums is not None:
+            for curr_group_num in self.group_nums:
+                yield from self._read_group(curr_group_num)
+        elif(self.group_num == None):
             curr_group_num = 0
             while os.path.isdir(self._get_group_dir(curr_group_num)): # ignore file:/ at beginning
                 yield from self._read_group(curr_group_num)
@@ -53,13 +152,18 @@ class PartitionedPetastormReader(AbstractReader):
     
     def _read_group(self, curr_group_num: int) -> Iterator[Dict]:
         group_dir = self._get_group_dir(curr_group_num)
-        if not os.path.isdir(group_dir):
+        if self.group_nums is None and not os.path.isdir(group_dir):
             raise GroupDoesNotExistException(group_dir)
         with make_reader(self._get_group_url(curr_group_num),
+                        schema_fields=self.columns,
                         shard_count=self.shard_count,
                         cur_shard=self.cur_shard,
                         predicate=self.predicate) \
                 as reader:
             for row in reader:
                 # print(f'ROW: {row.id}')
-                yield row._asdict()
+                row = row._asdict()
+                if self.frame_range is not None \
+                        and not self.frame_range[0] <= row['id'] <= self.frame_range[1]:
+                    continue
+                yield row
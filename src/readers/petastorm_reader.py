@@ -1,7 +1,12 @@
 from petastorm import make_reader
+from petastorm.etl.dataset_metadata import get_schema_from_dataset_url
 from typing import Iterator, Dict
+import glob
 
+from src.models.storage.batch import Batch
 from src.readers.abstract_reader import AbstractReader
+from src.readers.columnar_parquet_reader import ColumnarParquetReader
+from src.config.constants import BATCH_SIZE
 
 
 class PetastormReader(AbstractReader):
@@ -10,8 +15,8 @@ class PetastormReader(AbstractReader):
         """
         Reads data from the petastorm parquet stores. Note this won't
         work for any arbitary parquet store apart from one materialized
-        using petastorm. In order to generalize, we might have to replace
-        `make_reader` with `make_batch_reader`.
+        using petastorm. The store is read column by column into Batches,
+        unless the read is sharded, which goes through make_reader.
         Attributes:
             cur_shard (int, optional): Shard number to load from if sharded
             shard_count (int, optional): Specify total number of shards if
@@ -29,6 +34,19 @@ class PetastormReader(AbstractReader):
         if self.shard_count is not None and self.shard_count <= 0:
             self.shard_count = None
 
+    def read(self) -> Iterator[Batch]:
+        if self.shard_count is not None:
+            yield from super().read()
+            return
+
+        if self.batch_size is None or self.batch_size < 0:
+            self.batch_size = BATCH_SIZE
+        columnar_reader = ColumnarParquetReader(get_schema_from_dataset_url(self.file_url),
+                                                predicate=self.predicate)
+        # ignore file:/ at beginning
+        yield from columnar_reader.read_batches(sorted(glob.glob(f'{self.file_url[6:]}/*.parquet')),
+                                                self.batch_size)
+
     def _read(self) -> Iterator[Dict]:
         # `Todo`: Generalize this reader
         with make_reader(self.file_url,
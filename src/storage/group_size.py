@@ -0,0 +1,20 @@
+from src.config.constants import TARGET_GROUP_SIZE_MB
+
+
+def raw_frame_bytes(height: int, width: int, channels: int = 3) -> int:
+    """
+    Returns the size of an uncompressed uint8 frame
+    """
+    return height * width * channels
+
+def estimate_group_size(frame_bytes: int, target_group_size_mb: float = TARGET_GROUP_SIZE_MB) -> int:
+    """
+    Returns the number of frames to store in each group so that a group is
+    about target_group_size_mb, given the (possibly encoded) size of a frame.
+    Small frames (e.g. 240p) get large groups so per group overhead is
+    amortized, large frames (e.g. 4K) get small groups so an update or a
+    flush doesn't rewrite far more data than it touches.
+    """
+    if frame_bytes <= 0:
+        raise ValueError(f'Frame size must be positive, got {frame_bytes}')
+    return max(1, int((target_group_size_mb * 1024 * 1024) // frame_bytes))
@@ -1,7 +1,9 @@
 import numpy as np
 import os
 import shutil
-from typing import Iterator, List
+import threading
+import concurrent.futures
+from typing import Iterator, List, Tuple
 from petastorm.codecs import CompressedImageCodec, NdarrayCodec, ScalarCodec
 from petastorm.etl.dataset_metadata import materialize_dataset
 from petastorm.unischema import Unischema, UnischemaField, dict_to_spark_row
@@ -11,16 +13,30 @@ from pyspark.conf import SparkConf
 from pyspark.sql.types import IntegerType
 
 from src.catalog.models.df_metadata import DataFrameMetadata
+from src.catalog.catalog_manager import CatalogManager
 from src.models.storage.batch import Batch
-from src.readers.partitioned_petastorm_reader import PartitionedPetastormReader
+from src.readers.partitioned_petastorm_reader import PartitionedPetastormReader, GroupDoesNotExistException
+from src.storage.table_manifest import TableManifest
 from src.pressure_point.pressure_point_manager import PressurePointManager
 from src.pressure_point.pressure_point import PressurePoint, PressurePointLocation, PressurePointBehavior
 from src.config.constants import \
     PETASTORM_STORAGE_FOLDER, \
-    INPUT_VIDEO_FOLDER
+    INPUT_VIDEO_FOLDER, \
+    MANIFEST_FILE_NAME, \
+    ROW_GROUP_FRAMES, \
+    ROW_GROUP_SIZE_MB, \
+    SCAN_WORKERS
 
 class PartitionedPetastormStorageEngine():
-    def __init__(self):
+    def __init__(self, row_group_frames=ROW_GROUP_FRAMES):
+        """
+        Attributes:
+            row_group_frames (int, optional): number of frames each parquet
+                row group of a group is sized for, so frame range reads can
+                skip the others. If None, row groups are ROW_GROUP_SIZE_MB
+                and usually hold a whole group.
+        """
+        self.row_group_frames = row_group_frames
         spark_conf = SparkConf()
         spark_conf.setMaster('local')
         spark_conf.setAppName('VLR')
@@ -31,6 +47,19 @@ class PartitionedPetastormStorageEngine():
         self.spark_session = SparkSession.builder.config(conf = spark_conf).getOrCreate()
         self.spark_context = self.spark_session.sparkContext  
         self.spark_context.setLogLevel('ERROR')
+        # parquet only checks the size of a row group after this many rows,
+        # groups are too small for the default of 100
+        self.spark_context._jsc.hadoopConfiguration().setInt('parquet.page.size.row.check.min', 1)
+
+        # Groups can be written concurrently (e.g. BufferManager.flush_all_slots),
+        # so updates to a table's manifest are serialized
+        self._manifest_lock = threading.Lock()
+        # file_url -> (manifest file stat, TableManifest)
+        self._manifest_cache = {}
+
+        # Kept for the lifetime of the engine so full table scans don't
+        # start a new worker pool for every group
+        self._scan_executor = concurrent.futures.ThreadPoolExecutor(max_workers=SCAN_WORKERS)
 
     def _spark_url(self, table: DataFrameMetadata, group_num: int = None):
         """
@@ -46,9 +75,12 @@ class PartitionedPetastormStorageEngine():
         """
         Create an empty dataframe in petastorm.
         """
+        CatalogManager().register_table(table)
         shutil.rmtree(self._spark_url(table)[6:], ignore_errors=True)
         os.makedirs(self._spark_url(table)[6:])
-        pass
+        with self._manifest_lock:
+            self._manifest_cache.pop(table.file_url, None)
+            TableManifest(self._manifest_path(table), table.group_size).save()
         # empty_rdd = self.spark_context.emptyRDD()
 
         # with materialize_dataset(self.spark_session,
@@ -62,6 +94,97 @@ class PartitionedPetastormStorageEngine():
         #         .mode('overwrite') \
         #         .parquet(self._spark_url(table))
 
+    def _manifest_path(self, table: DataFrameMetadata) -> str:
+        return f'{self._spark_url(table)[6:]}/{MANIFEST_FILE_NAME}'
+
+    def _load_manifest(self, table: DataFrameMetadata) -> TableManifest:
+        # The manifest file is replaced on every write, and may be replaced
+        # behind our back (e.g. restoring a copy of the store), so the cached
+        # copy is only used while the file is unchanged
+        manifest_path = self._manifest_path(table)
+        try:
+            stat = os.stat(manifest_path)
+        except FileNotFoundError:
+            self._manifest_cache.pop(table.file_url, None)
+            return None
+        stat_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._manifest_cache.get(table.file_url)
+        if cached is not None and cached[0] == stat_key:
+            return cached[1]
+        manifest = TableManifest.load(manifest_path)
+        self._manifest_cache[table.file_url] = (stat_key, manifest)
+        return manifest
+
+    def get_manifest(self, table: DataFrameMetadata) -> TableManifest:
+        """
+        Returns the manifest of the table, or None if the table was written
+        without one.
+        """
+        with self._manifest_lock:
+            return self._load_manifest(table)
+
+    def _row_group_bytes(self, table: DataFrameMetadata) -> int:
+        """
+        Returns the parquet block size groups of the table are written with
+        """
+        max_bytes = ROW_GROUP_SIZE_MB * 2**20
+        if self.row_group_frames is None:
+            return max_bytes
+        for column in table.schema.column_list:
+            if column.name == 'data':
+                return min(max_bytes, self.row_group_frames * int(np.prod(column.array_dimensions)))
+        return max_bytes
+
+    def _group_dir_key(self, table: DataFrameMetadata, group_num: int):
+        try:
+            stat = os.stat(self._spark_url(table, group_num)[6:])
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _update_manifest(self, table: DataFrameMetadata, group_num: int, rows: Batch) -> None:
+        with self._manifest_lock:
+            manifest = self._load_manifest(table)
+            if manifest is None:
+                manifest = TableManifest(self._manifest_path(table), table.group_size)
+            manifest.update_group(group_num, rows, self._group_dir_key(table, group_num))
+            manifest.save()
+            self._manifest_cache.pop(table.file_url, None)
+
+    def groups_in_range(self, table: DataFrameMetadata, start_frame: int, end_frame: int) -> List[int]:
+        """
+        Returns the groups of the table holding any frame in
+        [start_frame, end_frame]
+        """
+        manifest = self.get_manifest(table)
+        if manifest is not None:
+            return manifest.groups_in_range(start_frame, end_frame)
+
+        # Tables written without a manifest, fall back to probing the filesystem
+        group_nums = []
+        curr_group = int(start_frame // table.group_size)
+        while curr_group <= int(end_frame // table.group_size) \
+                and os.path.isdir(self._spark_url(table, curr_group)[6:]):
+            group_nums.append(curr_group)
+            curr_group = curr_group + 1
+        return group_nums
+
+    def get_group_max_lsn(self, table: DataFrameMetadata, group_num: int) -> int:
+        """
+        Returns the max LSN of a group as stored on disk, or None if it
+        can't be trusted, i.e. the table has no manifest or the group was
+        rewritten without updating it (a crash between the two writes).
+        """
+        manifest = self.get_manifest(table)
+        if manifest is None:
+            return None
+        if not manifest.has_group(group_num):
+            raise GroupDoesNotExistException(self._spark_url(table, group_num)[6:])
+        entry = manifest.get_group(group_num)
+        if entry.dir_key is None or entry.dir_key != self._group_dir_key(table, group_num):
+            return None
+        return entry.max_lsn
+
     def write(self, table: DataFrameMetadata, rows: Batch):
         """
         Write rows into the dataframe.
@@ -78,8 +201,12 @@ class PartitionedPetastormStorageEngine():
         # print(f'Table schema: {table.schema.petastorm_schema}')
 
         with materialize_dataset(self.spark_session,
-                                 self._spark_url(table, rows.get_group_num()),
+                                 self._spark_url(table, rows.get_group_num(table.group_size)),
                                  table.schema.petastorm_schema):
+            # materialize_dataset only takes whole MB, the block size it saved
+            # is restored once the write is done
+            self.spark_context._jsc.hadoopConfiguration().setInt('parquet.block.size',
+                                                                  self._row_group_bytes(table))
 
             records = rows.frames
             columns = records.keys()
@@ -98,18 +225,26 @@ class PartitionedPetastormStorageEngine():
                 .coalesce(1) \
                 .write \
                 .mode('overwrite') \
-                .parquet(self._spark_url(table, rows.get_group_num()))
+                .parquet(self._spark_url(table, rows.get_group_num(table.group_size)))
+
+        self._update_manifest(table, rows.get_group_num(table.group_size), rows)
 
     def read(self, table: DataFrameMetadata, columns: List[
-            str] = None, predicate_func=None, group_num = None) -> Iterator[Batch]:
+            str] = None, predicate_func=None, group_num = None,
+            frame_range: Tuple[int, int] = None) -> Iterator[Batch]:
         """
         Reads the table and return a batch iterator for the
         tuples that passes the predicate func.
         Argument:
             table: table metadata object to write into
-            columns List[str]: A list of column names to be
-                considered in predicate_func
+            columns List[str]: A list of column names to be read. Columns
+                not in the list are never decoded. These are also the
+                columns considered in predicate_func
             predicate_func: customized predicate function returns bool
+            group_num: only read this group if set
+            frame_range: only read frames with an id in [start, end].
+                Groups outside the range are never opened, and inside a
+                group parquet row groups are skipped using their statistics
         Return:
             Iterator of Batch read.
         """
@@ -130,9 +265,33 @@ class PartitionedPetastormStorageEngine():
         if predicate_func and columns:
             predicate = in_lambda(columns, predicate_func)
 
+        group_nums = None
+        manifest = self.get_manifest(table)
+        if manifest is not None:
+            if group_num is None:
+                group_nums = manifest.group_nums()
+            elif manifest.has_group(group_num):
+                group_nums = [group_num]
+            else:
+                raise GroupDoesNotExistException(self._spark_url(table, group_num)[6:])
+
+        if frame_range is not None:
+            range_group_nums = self.groups_in_range(table, frame_range[0], frame_range[1])
+            if group_num is not None:
+                range_group_nums = [curr_group for curr_group in range_group_nums if curr_group == group_num]
+            group_nums = range_group_nums
+
+        # Scans over several groups read them concurrently, one Batch per group
+        executor = None
+        if group_num is None:
+            executor = self._scan_executor
+
         # ToDo: Handle the sharding logic. We might have to maintain a
         # context for deciding which shard to read
         petastorm_reader = PartitionedPetastormReader(
-            self._spark_url(table), predicate=predicate, group_num = group_num)
+            self._spark_url(table), batch_size=table.group_size,
+            predicate=predicate, group_num = group_num,
+            columns=columns, group_nums=group_nums, frame_range=frame_range,
+            executor=executor, scan_window=SCAN_WORKERS)
         for batch in petastorm_reader.read():
             yield batch
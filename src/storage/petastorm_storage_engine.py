@@ -10,6 +10,7 @@ from pyspark.conf import SparkConf
 from pyspark.sql.types import IntegerType
 
 from src.catalog.models.df_metadata import DataFrameMetadata
+from src.catalog.catalog_manager import CatalogManager
 from src.models.storage.batch import Batch
 from src.readers.petastorm_reader import PetastormReader
 from src.pressure_point.pressure_point_manager import PressurePointManager
@@ -42,6 +43,7 @@ class PetastormStorageEngine():
         """
         Create an empty dataframe in petastorm.
         """
+        CatalogManager().register_table(table)
         empty_rdd = self.spark_context.emptyRDD()
 
         with materialize_dataset(self.spark_session,
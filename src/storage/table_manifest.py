@@ -0,0 +1,120 @@
+from __future__ import annotations
+import os
+import pickle
+from typing import Dict, List
+
+from src.models.storage.batch import Batch
+from src.utils.file_utils import atomic_write
+from src.config.constants import BATCH_SIZE
+
+class GroupManifestEntry():
+    def __init__(self, start_frame: int, end_frame: int, row_count: int, max_lsn: int, dir_key=None):
+        self._start_frame = start_frame
+        self._end_frame = end_frame
+        self._row_count = row_count
+        self._max_lsn = max_lsn
+        # (inode, mtime) of the group directory when this entry was written
+        self._dir_key = dir_key
+
+    @property
+    def start_frame(self) -> int:
+        return self._start_frame
+
+    @property
+    def end_frame(self) -> int:
+        return self._end_frame
+
+    @property
+    def row_count(self) -> int:
+        return self._row_count
+
+    @property
+    def max_lsn(self) -> int:
+        return self._max_lsn
+
+    @property
+    def dir_key(self):
+        return self._dir_key
+
+    def to_dict(self) -> Dict:
+        return {
+            'start_frame': self.start_frame,
+            'end_frame': self.end_frame,
+            'row_count': self.row_count,
+            'max_lsn': self.max_lsn,
+            'dir_key': self.dir_key
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> GroupManifestEntry:
+        return GroupManifestEntry(data['start_frame'],
+                                  data['end_frame'],
+                                  data['row_count'],
+                                  data['max_lsn'],
+                                  data.get('dir_key'))
+
+class TableManifest():
+    """
+    Small per-table file describing every group written to the storage
+    engine, so group discovery, update planning and LSN checks don't need
+    to probe the filesystem or read the group's data files.
+    Attributes:
+        manifest_path (str): path of the manifest file
+        group_size (int): number of frames in each group of the table
+    """
+    def __init__(self, manifest_path: str, group_size: int = BATCH_SIZE):
+        self._manifest_path = manifest_path
+        self._group_size = group_size
+        self._groups = {}
+
+    @property
+    def manifest_path(self) -> str:
+        return self._manifest_path
+
+    @property
+    def group_size(self) -> int:
+        return self._group_size
+
+    def group_nums(self) -> List[int]:
+        return sorted(self._groups.keys())
+
+    def has_group(self, group_num: int) -> bool:
+        return group_num in self._groups
+
+    def get_group(self, group_num: int) -> GroupManifestEntry:
+        return self._groups[group_num]
+
+    def groups_in_range(self, start_frame: int, end_frame: int) -> List[int]:
+        return [group_num for group_num in self.group_nums()
+                if self._groups[group_num].start_frame <= end_frame
+                and self._groups[group_num].end_frame >= start_frame]
+
+    def update_group(self, group_num: int, rows: Batch, dir_key=None) -> None:
+        frames = rows.frames
+        max_lsn = int(frames['lsn'].max()) if 'lsn' in frames else -1
+        self._groups[group_num] = GroupManifestEntry(int(frames['id'].min()),
+                                                     int(frames['id'].max()),
+                                                     len(frames),
+                                                     max_lsn,
+                                                     dir_key)
+
+    def save(self) -> None:
+        data = {
+            'group_size': self._group_size,
+            'groups': {group_num: entry.to_dict() for group_num, entry in self._groups.items()}
+        }
+        atomic_write(self._manifest_path, pickle.dumps(data))
+
+    @classmethod
+    def load(cls, manifest_path: str) -> TableManifest:
+        """
+        Returns None if the table was written without a manifest
+        """
+        if not os.path.isfile(manifest_path):
+            return None
+        with open(manifest_path, 'rb') as manifest_file:
+            data = pickle.loads(manifest_file.read())
+        manifest = TableManifest(manifest_path, data.get('group_size', BATCH_SIZE))
+        for group_num, entry in data['groups'].items():
+            manifest._groups[group_num] = GroupManifestEntry.from_dict(entry)
+        return manifest
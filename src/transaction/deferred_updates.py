@@ -0,0 +1,149 @@
+import numpy as np
+from typing import Dict, List
+
+from src.buffer.buffer_manager import BufferManager
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.models.storage.batch import Batch, to_frame_column
+from src.transaction.object_update_arguments import ObjectUpdateArguments
+from src.transaction.opencv_update_processor import OpenCVUpdateProcessor
+from src.transaction.transaction_metadata import TransactionMetadata
+from src.transaction.delta_image import write_delta_image
+from src.utils.logging_manager import LoggingLevel, LoggingManager
+from src.config.constants import DEFERRED_UPDATE_LIMIT
+
+class DeferredUpdate():
+    def __init__(self, update_arguments: ObjectUpdateArguments, lsn: int,
+                 before_image_path: str, group_nums: List[int], txn_metadata: TransactionMetadata = None):
+        """
+        An update which was logged but not applied to the buffer manager yet
+        Attributes:
+            update_arguments (ObjectUpdateArguments): the update
+            lsn (int): lsn of its log record
+            before_image_path (str): base path its before images are saved
+                to when it is applied, None for logically logged updates
+            group_nums (List[int]): groups the update was not applied to yet
+            txn_metadata (TransactionMetadata): if set, before images only
+                hold the frames the transaction didn't save one for yet
+        """
+        self.update_arguments = update_arguments
+        self.lsn = lsn
+        self.before_image_path = before_image_path
+        self.remaining_groups = set(group_nums)
+        self.txn_metadata = txn_metadata
+
+class DeferredUpdateQueue():
+    def __init__(self, buffer_manager: BufferManager, opencv_update_processor: OpenCVUpdateProcessor,
+                 limit=DEFERRED_UPDATE_LIMIT, compress_images=False):
+        """
+        Queues the updates of a table in order, and applies every update
+        queued for a group in a single pass: the group is read from the
+        buffer manager once, each update is applied to the frames in its
+        range, and the group is written back once with the lsn of the last
+        update of each frame.
+
+        The before images of physically logged updates are saved during that
+        pass, from the frames as the earlier updates of the pass left them,
+        and before the group is written back. Their log record is written
+        when the update is queued, so a group without a before image file
+        for the record was never updated by it.
+
+        Pending updates of a group are applied before the group is read
+        through the buffer manager, and every pending update of a table is
+        applied once limit updates are queued for it. Before images are
+        compressed if compress_images is set.
+        """
+        self.buffer_manager = buffer_manager
+        self.opencv_update_processor = opencv_update_processor
+        self.limit = limit
+        self.compress_images = compress_images
+        # file_url -> (table, list of DeferredUpdate in log order)
+        self._queues = {}
+        self._applying = False
+
+    def enqueue(self, table: DataFrameMetadata, update_arguments: ObjectUpdateArguments,
+                lsn: int, before_image_path: str = None, txn_metadata: TransactionMetadata = None) -> None:
+        group_nums = self.buffer_manager.get_groups_in_range(table, update_arguments.start_frame, update_arguments.end_frame)
+        _, queue = self._queues.setdefault(table.file_url, (table, []))
+        queue.append(DeferredUpdate(update_arguments, lsn, before_image_path, group_nums, txn_metadata))
+        LoggingManager().log(f'Deferred {update_arguments} on {table.file_url}, {len(queue)} pending', LoggingLevel.DEBUG)
+
+        if len(queue) >= self.limit:
+            self.apply_table(table)
+
+    def has_pending_updates(self, table: DataFrameMetadata = None) -> bool:
+        if table is None:
+            return len(self._queues) > 0
+        return table.file_url in self._queues
+
+    def apply_group(self, table: DataFrameMetadata, group_num: int) -> None:
+        if self._applying or table.file_url not in self._queues:
+            return
+        _, queue = self._queues[table.file_url]
+        updates = [update for update in queue if group_num in update.remaining_groups]
+        if len(updates) == 0:
+            return
+
+        self._applying = True
+        try:
+            self._apply_updates_to_group(table, group_num, updates)
+        finally:
+            self._applying = False
+            queue[:] = [update for update in queue if len(update.remaining_groups) > 0]
+            if len(queue) == 0:
+                del self._queues[table.file_url]
+
+    def _apply_updates_to_group(self, table: DataFrameMetadata, group_num: int, updates: List[DeferredUpdate]) -> None:
+        LoggingManager().log(f'Applying {len(updates)} deferred updates to {table.file_url} group {group_num}', LoggingLevel.DEBUG)
+        frames = self.buffer_manager.read_slot(table, group_num).frames
+        ids = frames.id.to_numpy()
+        data = frames.data.to_numpy().copy()
+        lsns = frames.lsn.to_numpy().copy()
+        updated = np.zeros(len(frames), dtype=bool)
+
+        for update in updates:
+            update.remaining_groups.discard(group_num)
+            update_arguments = update.update_arguments
+            in_range = (ids >= update_arguments.start_frame) & (ids <= update_arguments.end_frame)
+            if not in_range.any():
+                continue
+
+            if update.before_image_path is not None:
+                before_df = frames.loc[in_range].copy(deep=False)
+                before_df['data'] = data[in_range]
+                before_df['lsn'] = lsns[in_range]
+                before_df = before_df.reset_index(drop=True)
+                if update.txn_metadata is not None:
+                    before_df = update.txn_metadata.select_uncaptured_frames(table.file_url, before_df)
+                if self.compress_images:
+                    write_delta_image(f'{update.before_image_path}_{group_num}', before_df)
+                else:
+                    Batch(before_df).to_file(f'{update.before_image_path}_{group_num}')
+
+            data[in_range] = to_frame_column(self.opencv_update_processor.apply_batch(data[in_range], update_arguments))
+            lsns[in_range] = update.lsn
+            updated |= in_range
+
+        if not updated.any():
+            return
+        new_df = frames.loc[updated].copy(deep=False)
+        new_df['data'] = data[updated]
+        new_df['lsn'] = lsns[updated]
+        self.buffer_manager.write_slot(table, Batch(new_df.reset_index(drop=True)))
+
+    def apply_range(self, table: DataFrameMetadata, start_frame: int, end_frame: int) -> None:
+        for group_num in self.buffer_manager.get_groups_in_range(table, start_frame, end_frame):
+            self.apply_group(table, group_num)
+
+    def apply_table(self, table: DataFrameMetadata) -> None:
+        if table.file_url not in self._queues:
+            return
+        _, queue = self._queues[table.file_url]
+        group_nums = set()
+        for update in queue:
+            group_nums |= update.remaining_groups
+        for group_num in sorted(group_nums):
+            self.apply_group(table, group_num)
+
+    def apply_all(self) -> None:
+        for table, _ in list(self._queues.values()):
+            self.apply_table(table)
@@ -0,0 +1,96 @@
+import pickle
+import numpy as np
+import pandas as pd
+import zstandard
+
+from src.models.storage.batch import Batch, to_frame_column
+from src.transaction.image_store import is_image_locator, read_image_entry
+from src.config.constants import IMAGE_COMPRESSION_LEVEL
+
+DELTA_IMAGE_MAGIC = b'VLRD'
+
+def encode_delta_image(frames: pd.DataFrame, reference_path: str = None,
+                       level=IMAGE_COMPRESSION_LEVEL, reference_frames: pd.DataFrame = None) -> bytes:
+    """
+    Returns the frames of a before or after image compressed with zstd. If
+    reference_path is given, the frames are stored as their XOR with the
+    frames of the same ids in that image, which is mostly zeros when an
+    update only changes part of the frames or changes them by little.
+    Arguments:
+        frames (pd.DataFrame): id, data and other columns of the frames
+        reference_path (str, optional): image file or image store entry
+            holding every id of frames, needed to read this one
+        level (int, optional): zstd compression level
+        reference_frames (pd.DataFrame, optional): frames of the reference
+            image if already in memory, instead of reading it
+    """
+    shape = None
+    dtype = None
+    payload = b''
+    if len(frames) > 0:
+        stacked = np.stack(frames.data.to_numpy())
+        if reference_path is not None:
+            if reference_frames is None:
+                reference_frames = read_image(reference_path)
+            stacked = np.bitwise_xor(stacked, _stack_frames_by_id(reference_frames, frames.id))
+        shape = stacked.shape
+        dtype = stacked.dtype.str
+        payload = zstandard.ZstdCompressor(level=level).compress(np.ascontiguousarray(stacked).data)
+
+    image = {
+        'columns': Batch(frames.drop(columns=['data'])).to_bytes(),
+        'column_order': list(frames.columns),
+        'reference_path': reference_path,
+        'shape': shape,
+        'dtype': dtype,
+        'payload': payload
+    }
+    return DELTA_IMAGE_MAGIC + pickle.dumps(image, protocol=5)
+
+def write_delta_image(path: str, frames: pd.DataFrame, reference_path: str = None,
+                      level=IMAGE_COMPRESSION_LEVEL, reference_frames: pd.DataFrame = None) -> None:
+    """
+    Saves the frames to path, see encode_delta_image
+    """
+    with open(path, 'wb') as image_file:
+        image_file.write(encode_delta_image(frames, reference_path, level, reference_frames))
+
+def _stack_frames_by_id(frames: pd.DataFrame, ids: pd.Series) -> np.ndarray:
+    positions = pd.Index(frames.id).get_indexer(ids)
+    if (positions < 0).any():
+        raise ValueError('Reference image is missing frames')
+    return np.stack(frames.data.to_numpy()[positions])
+
+def decode_image(data: bytes) -> pd.DataFrame:
+    """
+    Decodes an image made by encode_delta_image or Batch.to_bytes. Delta
+    images are decoded against their reference.
+    """
+    if bytes(data[:len(DELTA_IMAGE_MAGIC)]) != DELTA_IMAGE_MAGIC:
+        # Writable, frames installed in the buffer manager may be updated in place
+        return Batch.from_bytes(bytearray(data)).frames
+    image = pickle.loads(data[len(DELTA_IMAGE_MAGIC):])
+
+    frames = Batch.from_bytes(bytearray(image['columns'])).frames
+    if image['shape'] is None:
+        frames['data'] = pd.Series(dtype=object)
+        return frames[image['column_order']]
+
+    data = np.frombuffer(bytearray(zstandard.ZstdDecompressor().decompress(image['payload'])),
+                         dtype=np.dtype(image['dtype'])).reshape(image['shape'])
+    if image['reference_path'] is not None:
+        np.bitwise_xor(data, _stack_frames_by_id(read_image(image['reference_path']), frames.id), out=data)
+    frames['data'] = to_frame_column(data)
+    return frames[image['column_order']]
+
+def read_image(path: str) -> pd.DataFrame:
+    """
+    Reads a before or after image from a file or an image store entry
+    """
+    if is_image_locator(path):
+        return decode_image(read_image_entry(path))
+    with open(path, 'rb') as image_file:
+        magic = image_file.read(len(DELTA_IMAGE_MAGIC))
+        if magic != DELTA_IMAGE_MAGIC:
+            return Batch.from_file(path).frames
+        return decode_image(magic + image_file.read())
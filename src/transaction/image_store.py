@@ -0,0 +1,88 @@
+import os
+from typing import Dict, Tuple
+
+# Starts every image locator, plain image paths may contain anything
+IMAGE_LOCATOR_PREFIX = 'store:'
+# Separates the store path from the locations in an image locator
+IMAGE_LOCATOR_SEPARATOR = '@'
+
+class ImageStore():
+    def __init__(self, path: str):
+        """
+        Append-only file holding the serialized before and after images of a
+        transaction, one after the other. Images are found by the offset and
+        length they were appended at, which are kept in the log record of
+        their update as a locator, see format_image_locator, so reading one
+        needs neither a directory listing nor an index file.
+        Attributes:
+            path (str): path of the store file, created if missing
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, 'ab')
+
+    def __del__(self):
+        self.close()
+
+    def append(self, data: bytes) -> Tuple[int, int]:
+        """
+        Appends data and returns its offset and length
+        """
+        offset = self._file.tell()
+        self._file.write(data)
+        return offset, len(data)
+
+    def flush(self) -> None:
+        """
+        Writes appended images to the file, must be called before the log
+        record pointing at them is written
+        """
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+def format_image_locator(store_path: str, locations: Dict[int, Tuple[int, int]]) -> str:
+    """
+    Returns a locator of one image per group in the store, used like the
+    base path of image files:
+        store:{store_path}@{group}={offset}:{length};...
+    """
+    entries = ';'.join(f'{group_num}={offset}:{length}' for group_num, (offset, length) in sorted(locations.items()))
+    return f'{IMAGE_LOCATOR_PREFIX}{store_path}{IMAGE_LOCATOR_SEPARATOR}{entries}'
+
+def format_image_entry(store_path: str, offset: int, length: int) -> str:
+    """
+    Returns a locator of a single image in the store:
+        store:{store_path}@{offset}:{length}
+    """
+    return f'{IMAGE_LOCATOR_PREFIX}{store_path}{IMAGE_LOCATOR_SEPARATOR}{offset}:{length}'
+
+def is_image_locator(image_path: str) -> bool:
+    return image_path.startswith(IMAGE_LOCATOR_PREFIX)
+
+def parse_image_locator(locator: str) -> Tuple[str, Dict[int, Tuple[int, int]]]:
+    """
+    Returns the store path and the offset and length of the image of each
+    group of a locator made by format_image_locator
+    """
+    store_path, entries = locator[len(IMAGE_LOCATOR_PREFIX):].rsplit(IMAGE_LOCATOR_SEPARATOR, 1)
+    locations = {}
+    for entry in entries.split(';'):
+        if len(entry) == 0:
+            continue
+        group_num, location = entry.split('=')
+        offset, length = location.split(':')
+        locations[int(group_num)] = (int(offset), int(length))
+    return store_path, locations
+
+def read_image_entry(entry: str) -> bytes:
+    """
+    Reads the image of a locator made by format_image_entry
+    """
+    store_path, location = entry[len(IMAGE_LOCATOR_PREFIX):].rsplit(IMAGE_LOCATOR_SEPARATOR, 1)
+    offset, length = location.split(':')
+    with open(store_path, 'rb') as store_file:
+        store_file.seek(int(offset))
+        return store_file.read(int(length))
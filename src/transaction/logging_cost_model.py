@@ -0,0 +1,180 @@
+import os
+import time
+import numpy as np
+from enum import Enum
+from typing import Dict, List, Tuple
+
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.models.storage.batch import Batch
+from src.transaction.object_update_arguments import ObjectUpdateArguments
+from src.transaction.opencv_update_processor import OpenCVUpdateProcessor
+from src.utils.logging_manager import LoggingLevel, LoggingManager
+from src.config.constants import TRANSACTION_STORAGE_FOLDER, \
+                                 CALIBRATION_FRAMES
+
+class LoggingProtocol(Enum):
+    # Only the update arguments are logged, undone by the reverse update
+    LOGICAL = 1
+    # Update arguments and before images are logged
+    HYBRID = 2
+    # Before and after images are logged
+    PPHYSICAL = 3
+
+class LoggingCostEstimate():
+    def __init__(self, protocol: LoggingProtocol, log_bytes: int, update_time: float, recovery_time: float):
+        """
+        Estimated cost of logging an update with a protocol
+        Attributes:
+            protocol (LoggingProtocol): the protocol
+            log_bytes (int): bytes written to the log and image files
+            update_time (float): seconds spent by update_object
+            recovery_time (float): seconds to redo and undo the update in
+                the worst case, a crash before its transaction commits
+        """
+        self.protocol = protocol
+        self.log_bytes = log_bytes
+        self.update_time = update_time
+        self.recovery_time = recovery_time
+
+    def __str__(self) -> str:
+        return f'{self.protocol.name:<10} log {self.log_bytes / 2**20:>10.2f} MB  ' \
+               f'update {self.update_time:>8.3f} s  recovery {self.recovery_time:>8.3f} s'
+
+class LoggingDecision():
+    def __init__(self, update_arguments: ObjectUpdateArguments, num_frames: int, frame_bytes: int,
+                 estimates: List[LoggingCostEstimate], protocol: LoggingProtocol, reason: str):
+        self.update_arguments = update_arguments
+        self.num_frames = num_frames
+        self.frame_bytes = frame_bytes
+        self.estimates = estimates
+        self.protocol = protocol
+        self.reason = reason
+
+    def __str__(self) -> str:
+        lines = [f'{self.update_arguments} on {self.num_frames} frames of {self.frame_bytes} bytes']
+        for estimate in self.estimates:
+            marker = '*' if estimate.protocol == self.protocol else ' '
+            lines.append(f'{marker} {estimate}')
+        lines.append(f'Chose {self.protocol.name}: {self.reason}')
+        return '\n'.join(lines)
+
+class LoggingCostModel():
+    def __init__(self, opencv_update_processor: OpenCVUpdateProcessor, recovery_time_objective: float = None,
+                 snapshot_undo=False):
+        """
+        Estimates the log size, update time and recovery time of each logging
+        protocol for an update, and picks the one with the lowest update
+        time whose recovery time meets the recovery time objective.
+
+        Operation costs come from the processor, which is calibrated on the
+        first estimate for a frame shape if needed. Storage costs are
+        calibrated by writing and reading a serialized image once.
+        Attributes:
+            opencv_update_processor (OpenCVUpdateProcessor): processor the
+                updates are applied with
+            recovery_time_objective (float): max seconds recovering an update
+                may take, no limit if None
+            snapshot_undo (bool): updates that can't be reversed can be
+                logged logically and undone from group snapshots
+        """
+        self.opencv_update_processor = opencv_update_processor
+        self.recovery_time_objective = recovery_time_objective
+        self.snapshot_undo = snapshot_undo
+        # seconds per byte
+        self._write_cost = None
+        self._read_cost = None
+        self._calibrated_shapes = set()
+
+    def set_storage_costs(self, write_seconds_per_byte: float, read_seconds_per_byte: float) -> None:
+        self._write_cost = write_seconds_per_byte
+        self._read_cost = read_seconds_per_byte
+
+    def calibrate_storage(self, frame_shape: Tuple[int, int, int], num_frames=CALIBRATION_FRAMES) -> None:
+        frames = np.random.randint(0, 256, size=(num_frames,) + tuple(frame_shape), dtype=np.uint8)
+        batch = Batch.from_frame_array(frames, columns={'id': list(range(num_frames))})
+        os.makedirs(TRANSACTION_STORAGE_FOLDER, exist_ok=True)
+        path = f'{TRANSACTION_STORAGE_FOLDER}/calibration'
+        try:
+            start = time.perf_counter()
+            batch.to_file(path)
+            self._write_cost = (time.perf_counter() - start) / frames.nbytes
+            start = time.perf_counter()
+            Batch.from_file(path, memory_map=False)
+            self._read_cost = (time.perf_counter() - start) / frames.nbytes
+        finally:
+            os.remove(path)
+        LoggingManager().log(f'Calibrated storage: write {self._write_cost * 2**20:.6f} s/MB read {self._read_cost * 2**20:.6f} s/MB', LoggingLevel.DEBUG)
+
+    def _frame_shape(self, table: DataFrameMetadata) -> Tuple[int, int, int]:
+        for column in table.schema.column_list:
+            if column.name == 'data':
+                return tuple(column.array_dimensions)
+        raise ValueError(f'Table {table.file_url} has no frame column')
+
+    def _operation_cost(self, frame_shape, function_name: str) -> float:
+        if not self.opencv_update_processor.is_calibrated(function_name) \
+                and frame_shape not in self._calibrated_shapes:
+            self._calibrated_shapes.add(frame_shape)
+            self.opencv_update_processor.calibrate(frame_shape)
+        return self.opencv_update_processor.operation_costs[function_name]
+
+    def estimate(self, table: DataFrameMetadata, update_arguments: ObjectUpdateArguments,
+                 num_frames: int) -> List[LoggingCostEstimate]:
+        frame_shape = self._frame_shape(table)
+        if self._write_cost is None:
+            self.calibrate_storage(frame_shape)
+
+        frame_bytes = int(np.prod(frame_shape))
+        update_bytes = num_frames * frame_bytes
+        apply_time = update_bytes * self._operation_cost(frame_shape, update_arguments.function_name)
+        image_write_time = update_bytes * self._write_cost
+        image_read_time = update_bytes * self._read_cost
+        record_bytes = len(table.serialize()) + len(update_arguments.serialize())
+
+        estimates = []
+        if self.opencv_update_processor.is_reversible(update_arguments):
+            # Redo applies the update, undo applies its reverse
+            estimates.append(LoggingCostEstimate(LoggingProtocol.LOGICAL,
+                                                 record_bytes,
+                                                 apply_time,
+                                                 2 * apply_time))
+        elif self.snapshot_undo:
+            # Undo reads the snapshots and replays at least this update
+            # on them
+            estimates.append(LoggingCostEstimate(LoggingProtocol.LOGICAL,
+                                                 record_bytes,
+                                                 apply_time,
+                                                 2 * apply_time + image_read_time))
+        # Redo applies the update, undo reads the before images
+        estimates.append(LoggingCostEstimate(LoggingProtocol.HYBRID,
+                                             record_bytes + update_bytes,
+                                             apply_time + image_write_time,
+                                             apply_time + image_read_time))
+        # The update is computed once, its result is saved as the after
+        # images and installed in the buffer manager, redo and undo only
+        # read images
+        estimates.append(LoggingCostEstimate(LoggingProtocol.PPHYSICAL,
+                                             record_bytes + 2 * update_bytes,
+                                             apply_time + 2 * image_write_time,
+                                             2 * image_read_time))
+        return estimates
+
+    def choose(self, table: DataFrameMetadata, update_arguments: ObjectUpdateArguments,
+               num_frames: int) -> LoggingDecision:
+        estimates = self.estimate(table, update_arguments, num_frames)
+        frame_bytes = int(np.prod(self._frame_shape(table)))
+
+        if self.recovery_time_objective is None:
+            candidates = estimates
+            reason = 'lowest update time'
+        else:
+            candidates = [estimate for estimate in estimates
+                          if estimate.recovery_time <= self.recovery_time_objective]
+            reason = f'lowest update time recovering within {self.recovery_time_objective} s'
+        if len(candidates) == 0:
+            chosen = min(estimates, key=lambda estimate: estimate.recovery_time)
+            reason = f'no protocol recovers within {self.recovery_time_objective} s, lowest recovery time'
+        else:
+            chosen = min(candidates, key=lambda estimate: (estimate.update_time, estimate.log_bytes))
+
+        return LoggingDecision(update_arguments, num_frames, frame_bytes, estimates, chosen.protocol, reason)
@@ -1,7 +1,11 @@
 import cv2
+import time
 import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
 from src.transaction.object_update_arguments import ObjectUpdateArguments
+from src.utils.logging_manager import LoggingLevel, LoggingManager
+from src.config.constants import CALIBRATION_FRAMES
 
 class UpdateNotReversibleException(Exception):
     def __init__(self, object_update_arguments):
@@ -18,15 +22,118 @@ class OpenCVUpdateProcessor():
             'test_filter': self._test_filter
         }
 
+        # Kernels applied to a whole stack of frames at once. Each gets the
+        # stacked frames and an output array of the same shape, which may be
+        # the input itself. Operations that look at neighbouring pixels or
+        # change the frame shape run frame by frame instead.
+        self.batch_function_map = {
+            'grayscale': self._grayscale_batch,
+            'invert_color': self._invert_color_batch,
+            'contrast_brightness': self._contrast_brightness_batch,
+            'test_filter': self._test_filter_batch
+        }
+
         self.reversible_map = {
             'invert_color': self._reverse_invert_color,
         }
-        pass
+
+        # Rules used to shorten runs of updates to the same frames, see
+        # simplify
+        # f(f(x)) = x
+        self.involutions = {'invert_color'}
+        # f(f(x)) = f(x)
+        self.idempotents = {'grayscale', 'test_filter'}
+        # g(f(x)) = h(x), returns h or None if it doesn't exist for f and g
+        self.composition_map = {
+            'contrast_brightness': self._compose_contrast_brightness
+        }
+
+        # Arguments each operation is timed with by calibrate
+        self.calibration_kwargs = {
+            'gaussian_blur': lambda shape: {'ksize': (13, 13), 'sigmaX': 0},
+            'resize': lambda shape: {'dsize': (shape[1] // 2, shape[0] // 2)},
+            'contrast_brightness': lambda shape: {'contrast': 2, 'brightness': 0}
+        }
+        # function name -> seconds spent per byte of frame updated
+        self._operation_costs = {}
+
+    @property
+    def operation_costs(self) -> Dict[str, float]:
+        return self._operation_costs
+
+    def set_operation_cost(self, function_name: str, seconds_per_byte: float) -> None:
+        self._operation_costs[function_name] = seconds_per_byte
+
+    def is_calibrated(self, function_name: str) -> bool:
+        return function_name in self._operation_costs
+
+    def calibrate(self, frame_shape: Tuple[int, int, int], num_frames=CALIBRATION_FRAMES) -> Dict[str, float]:
+        """
+        Times every operation on num_frames random frames of frame_shape
+        and stores its cost in seconds per byte of frame updated
+        """
+        frames = np.random.randint(0, 256, size=(num_frames,) + tuple(frame_shape), dtype=np.uint8)
+        for function_name in self.function_map:
+            kwargs = {}
+            if function_name in self.calibration_kwargs:
+                kwargs = self.calibration_kwargs[function_name](frame_shape)
+            update_arguments = ObjectUpdateArguments(function_name, **kwargs)
+            start = time.perf_counter()
+            self.apply_batch(frames, update_arguments)
+            self._operation_costs[function_name] = (time.perf_counter() - start) / frames.nbytes
+            LoggingManager().log(f'Calibrated {function_name}: {self._operation_costs[function_name] * 2**20:.6f} s/MB', LoggingLevel.DEBUG)
+        return self._operation_costs
 
     def apply(self, source_frame, object_update_arguments: ObjectUpdateArguments):
         function = self.function_map[object_update_arguments.function_name]
         return function(source_frame, object_update_arguments)
     
+    def apply_batch(self, frames: Union[np.ndarray, Sequence[np.ndarray]],
+                    object_update_arguments: ObjectUpdateArguments,
+                    inplace=False) -> np.ndarray:
+        """
+        Applies the update to every frame and returns the stacked results as
+        one [N, H, W, C] array.
+        Arguments:
+            frames (ndarray or Sequence[ndarray]): stacked frames or a
+                sequence of frames of the same shape
+            object_update_arguments (ObjectUpdateArguments): update to apply
+            inplace (bool): write the results into frames when it is a
+                stacked array and the operation keeps the frame shape.
+                Otherwise a new array is returned and frames is unchanged.
+        """
+        function_name = object_update_arguments.function_name
+        if not isinstance(frames, np.ndarray) or frames.dtype == object:
+            frames = np.stack(list(frames)) if len(frames) > 0 else np.empty((0,), dtype=np.uint8)
+            # Already a copy, nothing else refers to it
+            inplace = True
+        if len(frames) == 0:
+            return frames
+
+        if self._can_apply_batch(object_update_arguments):
+            source = np.ascontiguousarray(frames)
+            output = source if inplace and source is frames else np.empty_like(source)
+            self.batch_function_map[function_name](source, output, object_update_arguments)
+            if inplace and output is not frames:
+                frames[...] = output
+                return frames
+            return output
+
+        # Per frame fallback
+        function = self.function_map[function_name]
+        results = [function(frame, object_update_arguments) for frame in frames]
+        if inplace and all(result.shape == frames.shape[1:] for result in results):
+            for i, result in enumerate(results):
+                frames[i] = result
+            return frames
+        return np.stack(results)
+
+    def _can_apply_batch(self, object_update_arguments: ObjectUpdateArguments) -> bool:
+        if object_update_arguments.function_name not in self.batch_function_map:
+            return False
+        # A mask for bitwise_not is given per frame
+        return not (object_update_arguments.function_name == 'invert_color' and object_update_arguments.kwargs)
+
     def is_reversible(self, object_update_arguments: ObjectUpdateArguments):
         return object_update_arguments.function_name in self.reversible_map
     
@@ -35,6 +142,33 @@ class OpenCVUpdateProcessor():
             raise UpdateNotReversibleException(object_update_arguments)
         return self.reversible_map[object_update_arguments.function_name](object_update_arguments)
 
+    def _same_kwargs(self, first: ObjectUpdateArguments, second: ObjectUpdateArguments) -> bool:
+        # Per frame arguments like masks are never considered equal
+        if any(isinstance(value, np.ndarray) for value in list(first.kwargs.values()) + list(second.kwargs.values())):
+            return False
+        return first.kwargs == second.kwargs
+
+    def simplify(self, first: ObjectUpdateArguments, second: ObjectUpdateArguments) -> Optional[List[ObjectUpdateArguments]]:
+        """
+        Returns updates equivalent to applying first and then second, an
+        empty list if they cancel out, or None if no rule shortens them.
+        Both have to cover the same frames.
+        """
+        if first.function_name != second.function_name \
+                or first.start_frame != second.start_frame \
+                or first.end_frame != second.end_frame:
+            return None
+        function_name = first.function_name
+        if function_name in self.involutions and not first.kwargs and not second.kwargs:
+            return []
+        if function_name in self.idempotents and self._same_kwargs(first, second):
+            return [second]
+        if function_name in self.composition_map:
+            composed = self.composition_map[function_name](first, second)
+            if composed != None:
+                return [composed]
+        return None
+
     def _grayscale(self, source_frame, object_update_arguments: ObjectUpdateArguments):
         return cv2.cvtColor(cv2.cvtColor(source_frame, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR)
     
@@ -54,9 +188,52 @@ class OpenCVUpdateProcessor():
                                 0,
                                 object_update_arguments.kwargs['brightness'])
     
+    def _as_rows(self, frames: np.ndarray) -> np.ndarray:
+        # [N, H, W, C] -> [N*H, W, C], one image OpenCV can process in a
+        # single call since these kernels work pixel by pixel
+        return frames.reshape((-1,) + frames.shape[2:])
+
+    def _grayscale_batch(self, frames: np.ndarray, output: np.ndarray, object_update_arguments: ObjectUpdateArguments):
+        gray = cv2.cvtColor(self._as_rows(frames), cv2.COLOR_BGR2GRAY)
+        cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR, dst=self._as_rows(output))
+
+    def _invert_color_batch(self, frames: np.ndarray, output: np.ndarray, object_update_arguments: ObjectUpdateArguments):
+        cv2.bitwise_not(self._as_rows(frames), dst=self._as_rows(output))
+
+    def _contrast_brightness_batch(self, frames: np.ndarray, output: np.ndarray, object_update_arguments: ObjectUpdateArguments):
+        rows = self._as_rows(frames)
+        cv2.addWeighted(rows,
+                        object_update_arguments.kwargs['contrast'],
+                        rows,
+                        0,
+                        object_update_arguments.kwargs['brightness'],
+                        dst=self._as_rows(output))
+
+    def _test_filter_batch(self, frames: np.ndarray, output: np.ndarray, object_update_arguments: ObjectUpdateArguments):
+        output.fill(255)
+
     def _test_filter(self, source_frame, object_update_arguments: ObjectUpdateArguments):
         return np.full(source_frame.shape, 255, dtype=np.uint8)
     
+    def _compose_contrast_brightness(self, first: ObjectUpdateArguments, second: ObjectUpdateArguments) -> Optional[ObjectUpdateArguments]:
+        # c2 * (c1 * x + b1) + b2 = (c2 * c1) * x + (c2 * b1 + b2), but each
+        # update rounds and saturates to [0, 255]. Integer coefficients make
+        # rounding exact, and saturating in between doesn't change the
+        # result if every step only saturates on the same side.
+        contrasts = [first.kwargs['contrast'], second.kwargs['contrast']]
+        brightnesses = [first.kwargs['brightness'], second.kwargs['brightness']]
+        if any(float(value) != int(value) for value in contrasts + brightnesses):
+            return None
+        non_negative = all(value >= 0 for value in contrasts + brightnesses)
+        darken_only = all(value == 1 for value in contrasts) and all(value <= 0 for value in brightnesses)
+        if not non_negative and not darken_only:
+            return None
+        return ObjectUpdateArguments('contrast_brightness',
+                                     first.start_frame,
+                                     first.end_frame,
+                                     contrast=int(contrasts[1] * contrasts[0]),
+                                     brightness=int(contrasts[1] * brightnesses[0] + brightnesses[1]))
+
     def _reverse_invert_color(self, object_update_arguments: ObjectUpdateArguments):
         # Applying the same update again will reverse the color inversion, no changes needed
         return ObjectUpdateArguments(object_update_arguments.function_name,
@@ -1,5 +1,6 @@
 import os
 import struct
+from typing import Dict, Iterator, List, Tuple
 import shutil
 import pandas as pd
 import glob
@@ -10,18 +11,26 @@ from src.catalog.models.df_column import DataFrameColumn
 from src.catalog.column_type import ColumnType
 from src.transaction.object_update_arguments import ObjectUpdateArguments
 from src.transaction.transaction_metadata import TransactionMetadata
-from src.transaction.util import apply_object_update_arguments_to_buffer_manager
+from src.transaction.util import apply_object_update_arguments_to_buffer_manager, \
+                                 apply_update_to_frames, \
+                                 select_frames_in_range
 from src.storage.partitioned_petastorm_storage_engine import PartitionedPetastormStorageEngine
 from src.models.storage.batch import Batch
 from src.transaction.opencv_update_processor import OpenCVUpdateProcessor
+from src.transaction.parallel_update import ParallelUpdateExecutor
+from src.transaction.deferred_updates import DeferredUpdateQueue
+from src.transaction.logging_cost_model import LoggingCostModel, LoggingDecision, LoggingProtocol
+from src.transaction.delta_image import encode_delta_image, write_delta_image
+from src.transaction.image_store import ImageStore, format_image_entry, format_image_locator
+from src.transaction.transaction_storage_collector import TransactionStorageCollector
+from src.transaction.undo_buffer import UndoBuffer, format_in_memory_image_path
 from src.Logging.logical_log_manager import LogicalLogManager
 from src.buffer.buffer_manager import BufferManager
-from src.config.constants import TRANSACTION_STORAGE_FOLDER, INPUT_VIDEO_FOLDER, BATCH_SIZE
+from src.config.constants import TRANSACTION_STORAGE_FOLDER, INPUT_VIDEO_FOLDER, IMAGE_STORE_FILE_NAME
 from src.utils.logging_manager import LoggingLevel, LoggingManager
-from src.readers.partitioned_petastorm_reader import GroupDoesNotExistException
 
 class OptimizedTransactionManager():
-    def __init__(self, storage_engine_passed=None, log_manager_passed=None, buffer_manager_passed=None, force_physical_logging=False, force_pphysical_logging=False):
+    def __init__(self, storage_engine_passed=None, log_manager_passed=None, buffer_manager_passed=None, force_physical_logging=False, force_pphysical_logging=False, parallel_update_workers=0, defer_updates=False, cost_based_logging=False, recovery_time_objective=None, snapshot_undo=False, deduplicate_before_images=True, compress_images=False, use_image_store=False, collect_garbage=False, buffer_undo_images=False):
         if storage_engine_passed != None:
             self.storage_engine = storage_engine_passed
         else:
@@ -39,7 +48,52 @@ class OptimizedTransactionManager():
 
         self.force_physical_logging = force_physical_logging
         self.force_pphysical_logging = force_pphysical_logging
+        # Only save a before image of each frame the first time a transaction
+        # changes it. The image files of later updates still exist for every
+        # group they changed, but may hold no frames.
+        self.deduplicate_before_images = deduplicate_before_images
+        # Save images compressed, and pure physical before images as their
+        # XOR with the after image
+        self.compress_images = compress_images
+        # Append the images of each transaction to a single file instead of
+        # one file per group and update. Images of deferred updates are
+        # saved after their log record, so they always get their own files.
+        self.use_image_store = use_image_store
+        # txn_id -> ImageStore
+        self._image_stores = {}
+        # Keep the before images of hybrid updates in memory, they are only
+        # written if the transaction is rolled back, too many are kept or
+        # a slot is flushed. Like deferred ones, they get their own files.
+        self.undo_buffer = None
+        if buffer_undo_images:
+            self.undo_buffer = UndoBuffer(compress_images=compress_images)
+            self.buffer_manager.set_flush_hook(self.undo_buffer.spill_all)
         self.opencv_update_processor = OpenCVUpdateProcessor()
+        # Updates are applied to the groups in worker processes if set
+        self.parallel_update_executor = None
+        if parallel_update_workers > 0:
+            self.parallel_update_executor = ParallelUpdateExecutor(parallel_update_workers)
+        # Groups are snapshotted before a transaction first changes them, so
+        # updates that can't be reversed can be logged logically and undone
+        # from the snapshots
+        self.snapshot_undo = snapshot_undo
+        # Shared with the log manager, which undoes from the snapshots
+        self.snapshot_manager = self.log_manager.snapshot_manager
+        # Picks the logging protocol of each update unless one is forced
+        self.cost_model = None
+        if cost_based_logging:
+            self.cost_model = LoggingCostModel(self.opencv_update_processor, recovery_time_objective, snapshot_undo)
+        # Only used by explain without cost based logging, created on first
+        # use so its storage costs are calibrated once
+        self._explain_cost_model = None
+        # Logical and hybrid updates are logged right away but only applied
+        # at commit, abort, a read of their groups or once too many are queued,
+        # all pending updates of a group in one pass
+        self.deferred_updates = None
+        if defer_updates:
+            self.deferred_updates = DeferredUpdateQueue(self.buffer_manager, self.opencv_update_processor,
+                                                        compress_images=compress_images)
+            self.buffer_manager.set_read_hook(self.deferred_updates.apply_group)
         self._txn_table = {}
         self._txn_counter_file_path = f'{TRANSACTION_STORAGE_FOLDER}/txn_counter'
         self._txn_counter = 1
@@ -53,6 +107,13 @@ class OptimizedTransactionManager():
             with open(self._txn_counter_file_path, 'rb') as txn_counter_file:
                 self._txn_counter = struct.unpack('i', txn_counter_file.read())[0]
 
+        # Deletes the images of finished transactions in the background once
+        # recovery can no longer need them
+        self.storage_collector = None
+        if collect_garbage:
+            self.storage_collector = TransactionStorageCollector(self.log_manager, self.buffer_manager)
+            self.storage_collector.start()
+
     def _write_txn_counter(self):
         with open(self._txn_counter_file_path, 'wb') as txn_counter_file:
             txn_counter_file.write(struct.pack('i', self._txn_counter))
@@ -99,97 +160,297 @@ class OptimizedTransactionManager():
         return this_txn
 
     def commit_transaction(self, txn_id: int):
+        if self.deferred_updates != None:
+            self.deferred_updates.apply_all()
         self.log_manager.log_commit_txn_record(txn_id)
+        self._close_image_store(txn_id)
+        if self.undo_buffer != None:
+            self.undo_buffer.discard_txn(txn_id)
 
     def abort_transaction(self, txn_id: int):
+        # Rollback undoes every logged update, so they must all be applied
+        if self.deferred_updates != None:
+            self.deferred_updates.apply_all()
         self.log_manager.log_abort_txn_record(txn_id)
 
+        if self.undo_buffer != None:
+            self.undo_buffer.spill_txn(txn_id)
         self.log_manager.rollback_txn(txn_id)
+        self._close_image_store(txn_id)
+
+
+    def _count_frames_in_range(self, dataframe_metadata: DataFrameMetadata, update_arguments: ObjectUpdateArguments) -> int:
+        groups = self.buffer_manager.get_groups_in_range(dataframe_metadata,
+                                                         update_arguments.start_frame,
+                                                         update_arguments.end_frame)
+        return min(update_arguments.end_frame - update_arguments.start_frame + 1,
+                   len(groups) * dataframe_metadata.group_size)
+
+    def explain(self, dataframe_metadata: DataFrameMetadata, update_arguments: ObjectUpdateArguments) -> LoggingDecision:
+        """
+        Returns the estimated cost of each logging protocol for the update
+        and the one the cost model picks, str() of it is human readable
+        """
+        cost_model = self.cost_model
+        if cost_model == None:
+            if self._explain_cost_model == None:
+                self._explain_cost_model = LoggingCostModel(self.opencv_update_processor, snapshot_undo=self.snapshot_undo)
+            cost_model = self._explain_cost_model
+        return cost_model.choose(dataframe_metadata,
+                                 update_arguments,
+                                 self._count_frames_in_range(dataframe_metadata, update_arguments))
+
+    def _choose_logging_protocol(self, dataframe_metadata: DataFrameMetadata, update_arguments: ObjectUpdateArguments) -> LoggingProtocol:
+        if self.force_pphysical_logging:
+            return LoggingProtocol.PPHYSICAL
+        if self.force_physical_logging:
+            return LoggingProtocol.HYBRID
+        if self.cost_model != None:
+            decision = self.explain(dataframe_metadata, update_arguments)
+            LoggingManager().log(f'Logging decision:\n{decision}', LoggingLevel.DEBUG)
+            return decision.protocol
+        if self.snapshot_undo or self.opencv_update_processor.is_reversible(update_arguments):
+            return LoggingProtocol.LOGICAL
+        return LoggingProtocol.HYBRID
+
+    def _take_snapshots(self, txn_id: int, dataframe_metadata: DataFrameMetadata, update_arguments: ObjectUpdateArguments):
+        """
+        Snapshots the groups in range the transaction didn't change yet, if
+        their snapshot is missing or too old. They only hold committed
+        frames since transactions are not concurrent.
+        """
+        txn_metadata = self._txn_table[txn_id]
+        for curr_group in self.buffer_manager.get_groups_in_range(dataframe_metadata,
+                                                                  update_arguments.start_frame,
+                                                                  update_arguments.end_frame):
+            if txn_metadata.is_group_touched(dataframe_metadata.file_url, curr_group):
+                continue
+            txn_metadata.touch_group(dataframe_metadata.file_url, curr_group)
+            current_lsn = self.log_manager.get_end_lsn()
+            if self.snapshot_manager.needs_snapshot(dataframe_metadata, curr_group, current_lsn):
+                batch = self.buffer_manager.read_slot(dataframe_metadata, curr_group)
+                self.snapshot_manager.take_snapshot(dataframe_metadata, batch, current_lsn)
+
+    def _get_image_store(self, txn_id: int) -> ImageStore:
+        if txn_id not in self._image_stores:
+            self._image_stores[txn_id] = ImageStore(f'{self.get_transaction_directory(txn_id)}/{IMAGE_STORE_FILE_NAME}')
+        return self._image_stores[txn_id]
+
+    def _close_image_store(self, txn_id: int) -> None:
+        if txn_id in self._image_stores:
+            self._image_stores.pop(txn_id).close()
+
+    def _save_image(self, txn_id: int, base_path: str, group_num: int, frames: pd.DataFrame,
+                    locations: Dict[int, Tuple[int, int]], reference_path: str = None,
+                    reference_frames: pd.DataFrame = None) -> str:
+        """
+        Saves the image of the group, in its own file or appended to the
+        image store of the transaction, in which case its location is added
+        to locations. Returns the path read_image reads it from.
+        """
+        if self.use_image_store:
+            if self.compress_images:
+                data = encode_delta_image(frames, reference_path, reference_frames=reference_frames)
+            else:
+                data = Batch(frames).to_bytes()
+            image_store = self._get_image_store(txn_id)
+            offset, length = image_store.append(data)
+            locations[group_num] = (offset, length)
+            return format_image_entry(image_store.path, offset, length)
+
+        path = f'{base_path}_{group_num}'
+        if self.compress_images:
+            write_delta_image(path, frames, reference_path, reference_frames=reference_frames)
+        else:
+            Batch(frames).to_file(path)
+        return path
+
+    def _finish_images(self, txn_id: int, base_path: str, locations: Dict[int, Tuple[int, int]]) -> str:
+        """
+        Returns the path the log record of the images saved by _save_image
+        points at, after they were written out
+        """
+        if not self.use_image_store:
+            return base_path
+        image_store = self._get_image_store(txn_id)
+        image_store.flush()
+        return format_image_locator(image_store.path, locations)
+
+    def _select_before_image_frames(self, txn_id: int, dataframe_metadata: DataFrameMetadata, frames: pd.DataFrame) -> pd.DataFrame:
+        if not self.deduplicate_before_images:
+            return frames
+        return self._txn_table[txn_id].select_uncaptured_frames(dataframe_metadata.file_url, frames)
+
+    def _update_chunks(self, dataframe_metadata: DataFrameMetadata, update_arguments: ObjectUpdateArguments) -> Iterator[Tuple[List[int], ObjectUpdateArguments]]:
+        """
+        Splits the groups in range of the update into chunks of at most the
+        buffer pool size, and yields each one with the update restricted to
+        its frames. The updated frames of a chunk are held until its record
+        is logged, so they stay bounded and the chunk's groups are still
+        buffered when they are installed.
+        """
+        group_nums = self.buffer_manager.get_groups_in_range(dataframe_metadata,
+                                                             update_arguments.start_frame,
+                                                             update_arguments.end_frame)
+        chunk_size = max(1, self.buffer_manager.size)
+        if len(group_nums) <= chunk_size:
+            yield group_nums, update_arguments
+            return
+        for i in range(0, len(group_nums), chunk_size):
+            chunk_group_nums = group_nums[i:i + chunk_size]
+            start_frame = max(update_arguments.start_frame, chunk_group_nums[0] * dataframe_metadata.group_size)
+            end_frame = min(update_arguments.end_frame, (chunk_group_nums[-1] + 1) * dataframe_metadata.group_size - 1)
+            yield chunk_group_nums, ObjectUpdateArguments(update_arguments.function_name,
+                                                          start_frame,
+                                                          end_frame,
+                                                          **update_arguments.kwargs)
+
+    def _install_updated_frames(self, dataframe_metadata: DataFrameMetadata, updated_frames: List[pd.DataFrame], update_lsn: int):
+        for new_df in updated_frames:
+            new_df['lsn'] = update_lsn
+            self.buffer_manager.write_slot(dataframe_metadata, Batch(new_df))
+
+    def _update_pphysical(self, txn_id: int, dataframe_metadata: DataFrameMetadata, update_arguments: ObjectUpdateArguments, group_nums: List[int]):
+        """
+        Saves the before and after images of the groups, logs them and
+        installs the after images
+        """
+        file_version = self._txn_table[txn_id].get_file_version(dataframe_metadata.file_url)
+        self._txn_table[txn_id].increment_file_version(dataframe_metadata.file_url)
+        before_image_base_path = f'{self.get_transaction_directory(txn_id)}/{dataframe_metadata.file_url}.v{file_version}_old'
+        os.makedirs(os.path.dirname(before_image_base_path), exist_ok=True)
+        after_image_base_path = f'{self.get_transaction_directory(txn_id)}/{dataframe_metadata.file_url}.v{file_version}_new'
+        os.makedirs(os.path.dirname(after_image_base_path), exist_ok=True)
+        before_image_locations = {}
+        after_image_locations = {}
+        updated_frames = []
+
+        for curr_group in group_nums:
+            batch = self.buffer_manager.read_slot(dataframe_metadata, curr_group)
+
+            old_df = select_frames_in_range(batch.frames, update_arguments.start_frame, update_arguments.end_frame)
+            new_df = apply_update_to_frames(self.opencv_update_processor, old_df, update_arguments)
+
+            # Save physically to transaction's folder
+            after_image_file_path = self._save_image(txn_id, after_image_base_path, curr_group, new_df,
+                                                     after_image_locations)
+            self._save_image(txn_id, before_image_base_path, curr_group,
+                             self._select_before_image_frames(txn_id, dataframe_metadata, old_df),
+                             before_image_locations,
+                             reference_path=after_image_file_path,
+                             reference_frames=new_df)
+            updated_frames.append(new_df)
+        before_image_base_path = self._finish_images(txn_id, before_image_base_path, before_image_locations)
+        after_image_base_path = self._finish_images(txn_id, after_image_base_path, after_image_locations)
+
+        # Write log record to file
+        update_lsn = self.log_manager.log_pphysical_update_record(txn_id, dataframe_metadata, before_image_base_path, after_image_base_path)
+        self._install_updated_frames(dataframe_metadata, updated_frames, update_lsn)
+
+    def _update_hybrid(self, txn_id: int, dataframe_metadata: DataFrameMetadata, update_arguments: ObjectUpdateArguments,
+                       group_nums: List[int], apply_update=True) -> int:
+        """
+        Saves the before images of the groups and logs them with the update.
+        The update is applied while the images are captured and installed
+        once logged, unless apply_update is False. Returns the lsn of the
+        record.
+        """
+        file_version = self._txn_table[txn_id].get_file_version(dataframe_metadata.file_url)
+        self._txn_table[txn_id].increment_file_version(dataframe_metadata.file_url)
+        before_image_base_path = f'{self.get_transaction_directory(txn_id)}/{dataframe_metadata.file_url}.v{file_version}'
+        os.makedirs(os.path.dirname(before_image_base_path), exist_ok=True)
+
+        before_image_locations = {}
+        updated_frames = []
+        for curr_group in group_nums:
+            batch = self.buffer_manager.read_slot(dataframe_metadata, curr_group)
+
+            old_df = select_frames_in_range(batch.frames, update_arguments.start_frame, update_arguments.end_frame)
+            if apply_update:
+                updated_frames.append(apply_update_to_frames(self.opencv_update_processor, old_df, update_arguments))
+            old_df = self._select_before_image_frames(txn_id, dataframe_metadata, old_df)
+
+            if self.undo_buffer != None:
+                self.undo_buffer.put(txn_id, curr_group, before_image_base_path, old_df)
+            else:
+                # Save physically to transaction's folder
+                self._save_image(txn_id, before_image_base_path, curr_group, old_df, before_image_locations)
+        if self.undo_buffer != None:
+            before_image_base_path = format_in_memory_image_path(before_image_base_path, group_nums)
+        else:
+            before_image_base_path = self._finish_images(txn_id, before_image_base_path, before_image_locations)
 
+        # Write log record to file
+        update_lsn = self.log_manager.log_physical_update_record(txn_id, dataframe_metadata, update_arguments, before_image_base_path)
+        self._install_updated_frames(dataframe_metadata, updated_frames, update_lsn)
+        return update_lsn
 
     def update_object(self, txn_id: int, dataframe_metadata: DataFrameMetadata, update_arguments: ObjectUpdateArguments):
-        update_lsn = -1
-        if self.force_pphysical_logging:
+        logging_protocol = self._choose_logging_protocol(dataframe_metadata, update_arguments)
+        if self.snapshot_undo:
+            self._take_snapshots(txn_id, dataframe_metadata, update_arguments)
+        if logging_protocol == LoggingProtocol.PPHYSICAL:
             # Do pure physical logging
-            # Save before and after images of group dataframes
-            file_version = self._txn_table[txn_id].get_file_version(dataframe_metadata.file_url)
-            self._txn_table[txn_id].increment_file_version(dataframe_metadata.file_url)
-            before_image_base_path = f'{self.get_transaction_directory(txn_id)}/{dataframe_metadata.file_url}.v{file_version}_old'
-            os.makedirs(os.path.dirname(before_image_base_path), exist_ok=True)
-            after_image_base_path = f'{self.get_transaction_directory(txn_id)}/{dataframe_metadata.file_url}.v{file_version}_new'
-            os.makedirs(os.path.dirname(after_image_base_path), exist_ok=True)
-
-            start_group = int(update_arguments.start_frame // BATCH_SIZE)
-            end_group = int(update_arguments.end_frame // BATCH_SIZE)
-            curr_group = start_group
-            while curr_group <= end_group:
-                try:
-                    batch = self.buffer_manager.read_slot(dataframe_metadata, curr_group)
-
-                    old_df = pd.DataFrame()
-                    new_df = pd.DataFrame()
-                    for index, row in batch.frames.iterrows():
-                        if update_arguments.start_frame <= row.id and update_arguments.end_frame >= row.id:
-                            old_df = old_df.append(row, ignore_index=True)
-                            
-                            row.data = self.opencv_update_processor.apply(row.data, update_arguments)
-                            new_df = new_df.append(row, ignore_index=True)
-
-                    # Save physically to transaction's folder
-                    before_image_file_path = f'{before_image_base_path}_{curr_group}'
-                    old_df.to_pickle(before_image_file_path)
-                    after_image_file_path = f'{after_image_base_path}_{curr_group}'
-                    new_df.to_pickle(after_image_file_path)
-
-                    curr_group = curr_group + 1
-                except GroupDoesNotExistException as e:
-                    break
-            
-            # Write log record to file
-            update_lsn = self.log_manager.log_pphysical_update_record(txn_id, dataframe_metadata, before_image_base_path, after_image_base_path)
+            # Save before and after images of group dataframes, a chunk of
+            # groups per record
+            for group_nums, chunk_arguments in self._update_chunks(dataframe_metadata, update_arguments):
+                self._update_pphysical(txn_id, dataframe_metadata, chunk_arguments, group_nums)
+            return
 
-        elif (not self.force_physical_logging) and self.opencv_update_processor.is_reversible(update_arguments):
+        if logging_protocol == LoggingProtocol.LOGICAL:
             # Do logical logging
             # Write log record to file
             update_lsn = self.log_manager.log_logical_update_record(txn_id, dataframe_metadata, update_arguments)
+            if self.deferred_updates != None:
+                self.deferred_updates.enqueue(dataframe_metadata, update_arguments, update_lsn)
+                return
 
-        else:
+        elif self.deferred_updates != None:
             # Fallback to hybrid logging
-            # Save before image deltas of group dataframes
+            # The before images are saved once the update is applied
             file_version = self._txn_table[txn_id].get_file_version(dataframe_metadata.file_url)
             self._txn_table[txn_id].increment_file_version(dataframe_metadata.file_url)
             before_image_base_path = f'{self.get_transaction_directory(txn_id)}/{dataframe_metadata.file_url}.v{file_version}'
             os.makedirs(os.path.dirname(before_image_base_path), exist_ok=True)
+            update_lsn = self.log_manager.log_physical_update_record(txn_id, dataframe_metadata, update_arguments, before_image_base_path)
+            txn_metadata = self._txn_table[txn_id] if self.deduplicate_before_images else None
+            self.deferred_updates.enqueue(dataframe_metadata, update_arguments, update_lsn, before_image_base_path, txn_metadata)
+            return
 
-            start_group = int(update_arguments.start_frame // BATCH_SIZE)
-            end_group = int(update_arguments.end_frame // BATCH_SIZE)
-            curr_group = start_group
-            while curr_group <= end_group:
-                try:
-                    batch = self.buffer_manager.read_slot(dataframe_metadata, curr_group)
-
-                    old_df = pd.DataFrame()
-                    for index, row in batch.frames.iterrows():
-                        if update_arguments.start_frame <= row.id and update_arguments.end_frame >= row.id:
-                            old_df = old_df.append(row, ignore_index=True)
-
-                    # Save physically to transaction's folder
-                    before_image_file_path = f'{before_image_base_path}_{curr_group}'
-                    old_df.to_pickle(before_image_file_path)
-
-                    curr_group = curr_group + 1
-                except GroupDoesNotExistException as e:
-                    break
+        elif self.parallel_update_executor != None:
+            # Fallback to hybrid logging
+            # Worker processes apply the update once it is logged
+            group_nums = self.buffer_manager.get_groups_in_range(dataframe_metadata,
+                                                                 update_arguments.start_frame,
+                                                                 update_arguments.end_frame)
+            update_lsn = self._update_hybrid(txn_id, dataframe_metadata, update_arguments, group_nums, apply_update=False)
 
-            # Write log record to file
-            update_lsn = self.log_manager.log_physical_update_record(txn_id, dataframe_metadata, update_arguments, before_image_base_path)
+        else:
+            # Fallback to hybrid logging
+            # The update is applied while the before images are captured, a
+            # chunk of groups per record
+            for group_nums, chunk_arguments in self._update_chunks(dataframe_metadata, update_arguments):
+                self._update_hybrid(txn_id, dataframe_metadata, chunk_arguments, group_nums)
+            return
 
         # Apply update through the buffer manager
         apply_object_update_arguments_to_buffer_manager(self.buffer_manager,
                                                         self.opencv_update_processor,
                                                         dataframe_metadata,
                                                         update_arguments,
-                                                        update_lsn)
+                                                        update_lsn,
+                                                        self.parallel_update_executor)
 
     def recover(self):
         self.log_manager.recover_log()
+
+    def close(self):
+        """
+        Stops the worker processes and the collector thread started by the
+        transaction manager
+        """
+        if self.parallel_update_executor != None:
+            self.parallel_update_executor.shutdown()
+            self.parallel_update_executor = None
+        if self.storage_collector != None:
+            self.storage_collector.stop()
@@ -0,0 +1,155 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Sequence
+
+from src.transaction.object_update_arguments import ObjectUpdateArguments
+from src.transaction.opencv_update_processor import OpenCVUpdateProcessor
+from src.utils.logging_manager import LoggingLevel, LoggingManager
+from src.config.constants import UPDATE_WORKERS
+
+# Created once per worker process
+_opencv_update_processor = None
+
+def _apply_update_in_shared_memory(shared_memory_name: str, shape, dtype: str,
+                                   update_arguments: ObjectUpdateArguments):
+    """
+    Runs in a worker process. Applies the update to the frames stored in
+    the shared memory block, in place when the operation keeps the frame
+    shape. Otherwise the results are copied into a new shared memory block
+    whose name, shape and dtype are returned.
+    """
+    global _opencv_update_processor
+    if _opencv_update_processor is None:
+        _opencv_update_processor = OpenCVUpdateProcessor()
+
+    shared_memory = SharedMemory(name=shared_memory_name)
+    frames = result = output = None
+    try:
+        frames = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shared_memory.buf)
+        result = _opencv_update_processor.apply_batch(frames, update_arguments, inplace=True)
+        if result is frames:
+            return None
+
+        output_memory = SharedMemory(create=True, size=max(1, result.nbytes))
+        try:
+            output = np.ndarray(result.shape, dtype=result.dtype, buffer=output_memory.buf)
+            output[...] = result
+        except Exception:
+            output = None
+            output_memory.close()
+            output_memory.unlink()
+            raise
+        # Views must be gone before a block is closed
+        output = None
+        output_memory.close()
+        return (output_memory.name, result.shape, result.dtype.str)
+    finally:
+        frames = result = None
+        shared_memory.close()
+
+def _take_shared_frames(shared_memory_name: str, shape, dtype: str) -> np.ndarray:
+    """
+    Copies the frames out of a shared memory block and frees it
+    """
+    shared_memory = SharedMemory(name=shared_memory_name)
+    frames = None
+    try:
+        frames = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shared_memory.buf)
+        return frames.copy()
+    finally:
+        frames = None
+        shared_memory.close()
+        shared_memory.unlink()
+
+class PendingUpdate():
+    def __init__(self, future, shared_memory: SharedMemory, shape, dtype: str):
+        self._future = future
+        self._shared_memory = shared_memory
+        self._shape = shape
+        self._dtype = dtype
+
+    def result(self) -> np.ndarray:
+        """
+        Waits for the worker and returns the updated frames stacked into a
+        [N, H, W, C] array owned by this process
+        """
+        try:
+            output_info = self._future.result()
+            if output_info is not None:
+                return _take_shared_frames(*output_info)
+            return self._read_shared_frames()
+        finally:
+            self._release()
+
+    def _read_shared_frames(self) -> np.ndarray:
+        frames = np.ndarray(self._shape, dtype=np.dtype(self._dtype), buffer=self._shared_memory.buf)
+        return frames.copy()
+
+    def discard(self) -> None:
+        """
+        Waits for the worker and frees the memory of the update without
+        reading its result
+        """
+        try:
+            output_info = self._future.result()
+            if output_info is not None:
+                _take_shared_frames(*output_info)
+        except Exception:
+            pass
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        if self._shared_memory is not None:
+            self._shared_memory.close()
+            self._shared_memory.unlink()
+            self._shared_memory = None
+
+class ParallelUpdateExecutor():
+    def __init__(self, num_workers=UPDATE_WORKERS):
+        """
+        Applies updates to groups of frames in a pool of worker processes,
+        so CPU heavy operations use every core instead of only the calling
+        thread. The frames of a group are copied once into a shared memory
+        block which the worker updates in place, so they are never pickled.
+        Attributes:
+            num_workers (int): number of worker processes
+        """
+        self.num_workers = max(1, num_workers)
+        # spawn, forking a process holding Spark and OpenCV threads is unsafe
+        self._executor = ProcessPoolExecutor(max_workers=self.num_workers, mp_context=get_context('spawn'))
+
+    @property
+    def window(self) -> int:
+        """
+        Number of groups worth submitting ahead of the one being installed
+        to keep every worker busy
+        """
+        return 2 * self.num_workers
+
+    def submit(self, frames: Sequence[np.ndarray], update_arguments: ObjectUpdateArguments) -> PendingUpdate:
+        """
+        Starts applying the update to frames, a stacked array or a sequence
+        of frames of the same shape. frames is left unchanged.
+        """
+        first_frame = frames[0]
+        shape = (len(frames),) + first_frame.shape
+        dtype = first_frame.dtype.str
+        shared_memory = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * first_frame.dtype.itemsize))
+        try:
+            shared_frames = np.ndarray(shape, dtype=first_frame.dtype, buffer=shared_memory.buf)
+            for i, frame in enumerate(frames):
+                shared_frames[i] = frame
+            del shared_frames
+            future = self._executor.submit(_apply_update_in_shared_memory, shared_memory.name, shape, dtype, update_arguments)
+        except Exception:
+            shared_memory.close()
+            shared_memory.unlink()
+            raise
+        LoggingManager().log(f'Submitted {len(frames)} frames for {update_arguments.function_name}', LoggingLevel.DEBUG)
+        return PendingUpdate(future, shared_memory, shape, dtype)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown()
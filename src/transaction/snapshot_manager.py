@@ -0,0 +1,91 @@
+import os
+import pickle
+from typing import Tuple
+
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.models.storage.batch import Batch
+from src.utils.file_utils import atomic_write
+from src.utils.logging_manager import LoggingLevel, LoggingManager
+from src.config.constants import TRANSACTION_STORAGE_FOLDER, \
+                                 SNAPSHOT_FOLDER_NAME, \
+                                 SNAPSHOT_MAX_LOG_DISTANCE
+
+class SnapshotNotFoundException(Exception):
+    def __init__(self, file_url, group_num):
+        super(SnapshotNotFoundException, self).__init__(f'{file_url} group {group_num}')
+
+class SnapshotManager():
+    def __init__(self, max_log_distance=SNAPSHOT_MAX_LOG_DISTANCE):
+        """
+        Keeps one base snapshot per group, a copy of the group as committed
+        at some LSN. Snapshots are taken before a transaction first changes a
+        group, so they never contain uncommitted frames. A group as it was
+        before any later record is its snapshot with the committed records
+        after the snapshot LSN replayed on it, so updates that can't be
+        reversed can still be undone without saving their before images.
+        The index of snapshots is a small file rewritten atomically.
+        Attributes:
+            max_log_distance (int): a snapshot is retaken once this many
+                bytes of log were written since it was taken
+        """
+        self.max_log_distance = max_log_distance
+        self._index = None
+
+    @property
+    def snapshot_folder(self) -> str:
+        return f'{TRANSACTION_STORAGE_FOLDER}/{SNAPSHOT_FOLDER_NAME}'
+
+    @property
+    def index_path(self) -> str:
+        return f'{self.snapshot_folder}/index'
+
+    def _load_index(self):
+        # (file_url, group_num) -> (lsn, path)
+        if self._index is None:
+            self._index = {}
+            if os.path.isfile(self.index_path):
+                with open(self.index_path, 'rb') as index_file:
+                    self._index = pickle.loads(index_file.read())
+        return self._index
+
+    def get_snapshot(self, table: DataFrameMetadata, group_num: int) -> Tuple[int, str]:
+        """
+        Returns the LSN and path of the snapshot of the group, or None
+        """
+        return self._load_index().get((table.file_url, group_num))
+
+    def get_oldest_snapshot_lsn(self) -> int:
+        """
+        Returns the lowest lsn of any snapshot, or None if there are none.
+        Records after it may be replayed on a snapshot.
+        """
+        lsns = [lsn for lsn, _ in list(self._load_index().values())]
+        if len(lsns) == 0:
+            return None
+        return min(lsns)
+
+    def needs_snapshot(self, table: DataFrameMetadata, group_num: int, current_lsn: int) -> bool:
+        snapshot = self.get_snapshot(table, group_num)
+        return snapshot is None or current_lsn - snapshot[0] > self.max_log_distance
+
+    def take_snapshot(self, table: DataFrameMetadata, batch: Batch, lsn: int) -> None:
+        """
+        Saves batch, a whole committed group, as the group's snapshot at lsn,
+        replacing its previous snapshot
+        """
+        group_num = batch.get_group_num(table.group_size)
+        path = f'{self.snapshot_folder}/{table.file_url}_{group_num}.{lsn}'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        batch.to_file(path)
+
+        index = self._load_index()
+        previous = index.get((table.file_url, group_num))
+        index[(table.file_url, group_num)] = (lsn, path)
+        atomic_write(self.index_path, pickle.dumps(index))
+        if previous is not None and previous[1] != path and os.path.isfile(previous[1]):
+            os.remove(previous[1])
+        LoggingManager().log(f'Snapshot of {table.file_url} group {group_num} at lsn {lsn}', LoggingLevel.DEBUG)
+
+    def read_snapshot(self, table: DataFrameMetadata, group_num: int) -> Batch:
+        _, path = self.get_snapshot(table, group_num)
+        return Batch.from_file(path)
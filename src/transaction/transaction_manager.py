@@ -6,12 +6,13 @@ import glob
 from pathlib import Path
 
 from src.catalog.models.df_metadata import DataFrameMetadata
+from src.catalog.catalog_manager import CatalogManager
 from src.catalog.models.df_column import DataFrameColumn
 from src.catalog.column_type import ColumnType
 from src.transaction.object_update_arguments import ObjectUpdateArguments
 from src.transaction.transaction_metadata import TransactionMetadata
 from src.storage.petastorm_storage_engine import PetastormStorageEngine
-from src.models.storage.batch import Batch
+from src.models.storage.batch import Batch, to_frame_column
 from src.transaction.opencv_update_processor import OpenCVUpdateProcessor
 from src.config.constants import TRANSACTION_STORAGE_FOLDER, INPUT_VIDEO_FOLDER
 from src.utils.logging_manager import LoggingLevel, LoggingManager
@@ -50,19 +51,22 @@ class TransactionManager():
         dataframe_metadata = None
         first_batch = True
         for batch_path in sorted(glob.glob(f'{image_path}_*')):
-            frames_df = pd.read_pickle(batch_path)
+            frames_df = Batch.from_file(batch_path).frames
             LoggingManager().log(f'Writing batch: {batch_path}', LoggingLevel.DEBUG)
 
             if first_batch:
                 first_batch = False
-                width = frames_df.data.iloc[0].shape[1]
-                height = frames_df.data.iloc[0].shape[0]
-                dataframe_metadata = DataFrameMetadata(Path(file_url).stem, file_url)
-                dataframe_columns = [
-                    DataFrameColumn('id', ColumnType.INTEGER),
-                    DataFrameColumn('data', ColumnType.NDARRAY, array_dimensions= [height, width, 3])
-                ]
-                dataframe_metadata.schema = dataframe_columns
+                if CatalogManager().has_table(file_url):
+                    dataframe_metadata = CatalogManager().get_table(file_url)
+                else:
+                    width = frames_df.data.iloc[0].shape[1]
+                    height = frames_df.data.iloc[0].shape[0]
+                    dataframe_metadata = DataFrameMetadata(Path(file_url).stem, file_url)
+                    dataframe_columns = [
+                        DataFrameColumn('id', ColumnType.INTEGER),
+                        DataFrameColumn('data', ColumnType.NDARRAY, array_dimensions= [height, width, 3])
+                    ]
+                    dataframe_metadata.schema = dataframe_columns
 
                 self.storage_engine.create(dataframe_metadata)
 
@@ -113,15 +117,17 @@ class TransactionManager():
 
         batch_num = 0
         for batch in self.storage_engine.read(dataframe_metadata):
-            batch.frames.to_pickle(f'{before_image_file_path}_{batch_num}')
-
-            after_image_batch = pd.DataFrame(columns=['id', 'data'])
-
-            for index, row in batch.frames.iterrows():
-                if update_arguments.start_frame <= row.id and update_arguments.end_frame > row.id:
-                    row.data = self.opencv_update_processor.apply(row.data, update_arguments)
-                after_image_batch = after_image_batch.append(row, ignore_index=True)
-            after_image_batch.to_pickle(f'{after_image_file_path}_{batch_num}')
+            batch.to_file(f'{before_image_file_path}_{batch_num}')
+
+            after_image_batch = batch.frames[['id', 'data']].copy(deep=False)
+            in_range = ((after_image_batch.id >= update_arguments.start_frame)
+                        & (after_image_batch.id < update_arguments.end_frame)).to_numpy()
+            if in_range.any():
+                frames = after_image_batch.data.to_numpy().copy()
+                frames[in_range] = to_frame_column(
+                    self.opencv_update_processor.apply_batch(frames[in_range], update_arguments))
+                after_image_batch['data'] = frames
+            Batch(after_image_batch).to_file(f'{after_image_file_path}_{batch_num}')
 
             batch_num = batch_num + 1
 
@@ -1,9 +1,14 @@
+import pandas as pd
 from typing import Dict, List
 
 class TransactionMetadata():
     def __init__(self, txn_id):
         self._txn_id = txn_id
         self._file_versions = {}
+        # file_name -> groups changed by the transaction
+        self._touched_groups = {}
+        # file_name -> ids of the frames a before image was saved for
+        self._captured_frames = {}
     
     def get_file_version(self, file_name: str) -> int:
         if file_name not in self._file_versions:
@@ -28,4 +33,21 @@ class TransactionMetadata():
         file_urls = []
         for key in self._file_versions:
             file_urls.append(key)
-        return file_urls
\ No newline at end of file
+        return file_urls
+
+    def is_group_touched(self, file_name: str, group_num: int) -> bool:
+        return group_num in self._touched_groups.get(file_name, set())
+
+    def touch_group(self, file_name: str, group_num: int) -> None:
+        self._touched_groups.setdefault(file_name, set()).add(group_num)
+
+    def select_uncaptured_frames(self, file_name: str, frames: pd.DataFrame) -> pd.DataFrame:
+        """
+        Returns the rows of frames no before image was saved for yet in the
+        transaction, and marks them as saved. Rolling back restores the
+        oldest before image of each frame last, so later ones are not needed.
+        """
+        captured_frames = self._captured_frames.setdefault(file_name, set())
+        uncaptured_frames = frames.loc[~frames.id.isin(captured_frames)].reset_index(drop=True)
+        captured_frames.update(uncaptured_frames.id.tolist())
+        return uncaptured_frames
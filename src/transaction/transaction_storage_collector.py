@@ -0,0 +1,119 @@
+import os
+import shutil
+import threading
+import time
+
+from src.buffer.buffer_manager import BufferManager
+from src.Logging.logical_log_manager import LogicalLogManager
+from src.utils.logging_manager import LoggingLevel, LoggingManager
+from src.config.constants import TRANSACTION_STORAGE_FOLDER, \
+                                 GC_INTERVAL_SECONDS, \
+                                 GC_MAX_BYTES_PER_SECOND
+
+class TransactionStorageCollector():
+    def __init__(self, log_manager: LogicalLogManager, buffer_manager: BufferManager,
+                 interval=GC_INTERVAL_SECONDS, max_bytes_per_second=GC_MAX_BYTES_PER_SECOND):
+        """
+        Deletes the folder of images of each finished transaction once no
+        log record of it can be redone or replayed on a snapshot anymore,
+        i.e. it finished before the redo point of the buffer manager and
+        before the oldest snapshot. Aborted transactions count as finished
+        once rolled back. Runs in a background thread between start and
+        stop, or on demand with collect.
+        Attributes:
+            log_manager (LogicalLogManager): tracks finished transactions
+            buffer_manager (BufferManager): provides the redo point
+            interval (float): seconds between background collections
+            max_bytes_per_second (int): deletion rate limit
+        """
+        self.log_manager = log_manager
+        self.buffer_manager = buffer_manager
+        self.interval = interval
+        self.max_bytes_per_second = max_bytes_per_second
+        self._reclaimed_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        """
+        Total bytes deleted since the collector was created
+        """
+        return self._reclaimed_bytes
+
+    def _collectible_lsn(self) -> int:
+        """
+        Returns the lsn transactions must have finished before to be
+        collected, or None if any finished transaction can be
+        """
+        lsns = [self.buffer_manager.redo_point(),
+                self.log_manager.snapshot_manager.get_oldest_snapshot_lsn()]
+        lsns = [lsn for lsn in lsns if lsn != None]
+        if len(lsns) == 0:
+            return None
+        return min(lsns)
+
+    def _delete_folder(self, folder: str, started: float, deleted_bytes: int) -> int:
+        """
+        Deletes the files of the folder and then the folder, sleeping as
+        needed to stay under the rate limit. Returns the updated number of
+        bytes deleted since started.
+        """
+        for root, _, file_names in os.walk(folder):
+            for file_name in file_names:
+                path = os.path.join(root, file_name)
+                size = os.path.getsize(path)
+                os.remove(path)
+                deleted_bytes = deleted_bytes + size
+                self._reclaimed_bytes = self._reclaimed_bytes + size
+
+                wait = deleted_bytes / self.max_bytes_per_second - (time.monotonic() - started)
+                if wait > 0 and self._stop.wait(wait):
+                    return deleted_bytes
+        shutil.rmtree(folder, ignore_errors=True)
+        return deleted_bytes
+
+    def collect(self) -> int:
+        """
+        Deletes the images of every collectible transaction and returns the
+        number of bytes reclaimed
+        """
+        collectible_lsn = self._collectible_lsn()
+        started = time.monotonic()
+        deleted_bytes = 0
+        num_collected = 0
+        for txn_id, finished_lsn in list(self.log_manager.finished_txns.items()):
+            if collectible_lsn != None and finished_lsn >= collectible_lsn:
+                continue
+            folder = f'{TRANSACTION_STORAGE_FOLDER}/{txn_id}'
+            if os.path.isdir(folder):
+                deleted_bytes = self._delete_folder(folder, started, deleted_bytes)
+                if self._stop.is_set():
+                    break
+            self.log_manager.finished_txns.pop(txn_id, None)
+            num_collected = num_collected + 1
+
+        if num_collected > 0:
+            LoggingManager().log(f'Collected {num_collected} transactions, reclaimed {deleted_bytes} bytes', LoggingLevel.INFO)
+        return deleted_bytes
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.collect()
+            except Exception as e:
+                LoggingManager().log(f'Transaction storage collection failed: {e}', LoggingLevel.ERROR)
+
+    def start(self) -> None:
+        if self._thread != None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread == None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
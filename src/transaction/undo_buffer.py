@@ -0,0 +1,130 @@
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+import pandas as pd
+
+from src.models.storage.batch import Batch
+from src.transaction.delta_image import write_delta_image
+from src.utils.logging_manager import LoggingLevel, LoggingManager
+from src.config.constants import UNDO_BUFFER_MAX_BYTES
+
+# Starts the image path of a log record whose before images were kept in an
+# undo buffer
+IN_MEMORY_IMAGE_PREFIX = 'memory:'
+
+class UndoBuffer():
+    def __init__(self, max_bytes=UNDO_BUFFER_MAX_BYTES, compress_images=False):
+        """
+        Keeps the before images of hybrid updates in memory, by reference
+        to the frames the update replaced, so transactions that commit never
+        write them. Images are kept per transaction and group, and all
+        images of a transaction and group are spilled to the files they
+        would otherwise have been saved to at once: the oldest ones once
+        more than max_bytes are kept, a transaction's when it is rolled
+        back, and all of them before the buffer manager flushes a slot, see
+        spill_all. So after a crash, a group without a spilled image of an
+        update never had the update flushed.
+        Attributes:
+            max_bytes (int): max bytes of frames kept in memory
+            compress_images (bool): spill images compressed, see
+                write_delta_image
+        """
+        self.max_bytes = max_bytes
+        self.compress_images = compress_images
+        # (txn_id, group_num) -> [(base_path, frames)] in log order, oldest
+        # key first
+        self._images = OrderedDict()
+        self._num_bytes = 0
+        self._spilled_bytes = 0
+        # Slots may be flushed from several threads
+        self._lock = threading.Lock()
+
+    @property
+    def num_bytes(self) -> int:
+        """
+        Bytes of frames kept in memory
+        """
+        return self._num_bytes
+
+    @property
+    def spilled_bytes(self) -> int:
+        """
+        Bytes of frames spilled to disk since the buffer was created
+        """
+        return self._spilled_bytes
+
+    def _frames_size(self, frames: pd.DataFrame) -> int:
+        return int(sum(frame.nbytes for frame in frames.data))
+
+    def _spill(self, key: Tuple[int, int]) -> None:
+        _, group_num = key
+        for base_path, frames in self._images.pop(key):
+            path = f'{base_path}_{group_num}'
+            if self.compress_images:
+                write_delta_image(path, frames)
+            else:
+                Batch(frames).to_file(path)
+            size = self._frames_size(frames)
+            self._num_bytes = self._num_bytes - size
+            self._spilled_bytes = self._spilled_bytes + size
+        LoggingManager().log(f'Spilled before images of txn {key[0]} group {group_num}', LoggingLevel.DEBUG)
+
+    def put(self, txn_id: int, group_num: int, base_path: str, frames: pd.DataFrame) -> None:
+        """
+        Keeps the before image of the group, spilled to {base_path}_{group_num}
+        if needed. The frames must not be changed in place afterwards.
+        """
+        with self._lock:
+            self._images.setdefault((txn_id, group_num), []).append((base_path, frames))
+            self._num_bytes = self._num_bytes + self._frames_size(frames)
+            while self._num_bytes > self.max_bytes and len(self._images) > 0:
+                self._spill(next(iter(self._images)))
+
+    def spill_txn(self, txn_id: int) -> None:
+        """
+        Writes every image of the transaction still in memory to disk
+        """
+        with self._lock:
+            for key in [key for key in self._images if key[0] == txn_id]:
+                self._spill(key)
+
+    def spill_all(self) -> None:
+        """
+        Writes every image still in memory to disk, must be called before
+        changes of the transactions they belong to are flushed
+        """
+        with self._lock:
+            while len(self._images) > 0:
+                self._spill(next(iter(self._images)))
+
+    def discard_txn(self, txn_id: int) -> None:
+        """
+        Drops the images of the transaction still in memory without writing
+        them, once it committed
+        """
+        with self._lock:
+            for key in [key for key in self._images if key[0] == txn_id]:
+                for _, frames in self._images.pop(key):
+                    self._num_bytes = self._num_bytes - self._frames_size(frames)
+
+def format_in_memory_image_path(base_path: str, group_nums: List[int]) -> str:
+    """
+    Returns the image path logged for before images put in an undo buffer,
+    which names the groups they were taken of and the base path they are
+    spilled to:
+        memory:{group},{group},...:{base_path}
+    """
+    groups = ','.join(str(group_num) for group_num in sorted(group_nums))
+    return f'{IN_MEMORY_IMAGE_PREFIX}{groups}:{base_path}'
+
+def is_in_memory_image_path(image_path: str) -> bool:
+    return image_path.startswith(IN_MEMORY_IMAGE_PREFIX)
+
+def parse_in_memory_image_path(image_path: str) -> Tuple[str, List[int]]:
+    """
+    Returns the base path images are spilled to and the groups of an image
+    path made by format_in_memory_image_path
+    """
+    groups, base_path = image_path[len(IN_MEMORY_IMAGE_PREFIX):].split(':', 1)
+    group_nums = [int(group_num) for group_num in groups.split(',') if len(group_num) > 0]
+    return base_path, group_nums
@@ -1,61 +1,179 @@
 from typing import List
+from collections import deque
 import pandas as pd
 import glob
 
 from src.buffer.buffer_manager import BufferManager
 from src.catalog.models.df_metadata import DataFrameMetadata
-from src.models.storage.batch import Batch
+from src.models.storage.batch import Batch, to_frame_column
 from src.transaction.object_update_arguments import ObjectUpdateArguments
 from src.transaction.opencv_update_processor import OpenCVUpdateProcessor
-from src.readers.partitioned_petastorm_reader import GroupDoesNotExistException
-from src.config.constants import BATCH_SIZE
+from src.transaction.parallel_update import ParallelUpdateExecutor
+from src.transaction.delta_image import read_image
+from src.transaction.image_store import format_image_entry, is_image_locator, parse_image_locator
+from src.transaction.undo_buffer import is_in_memory_image_path, parse_in_memory_image_path
 from src.utils.logging_manager import LoggingManager, LoggingLevel
 
+def select_frames_in_range(frames: pd.DataFrame, start_frame: int, end_frame: int) -> pd.DataFrame:
+    """
+    Returns the rows of frames with an id in [start_frame, end_frame]
+    """
+    return frames.loc[(frames.id >= start_frame) & (frames.id <= end_frame)].reset_index(drop=True)
+
+def apply_update_to_frames(opencv_update_processor: OpenCVUpdateProcessor,
+                           frames: pd.DataFrame,
+                           update_arguments: ObjectUpdateArguments) -> pd.DataFrame:
+    """
+    Returns a copy of frames with the update applied to every frame of its
+    data column in a single batched call. frames is left unchanged.
+    """
+    updated_frames = frames.copy(deep=False)
+    updated_frames['data'] = to_frame_column(
+        opencv_update_processor.apply_batch(frames.data.to_numpy(), update_arguments))
+    return updated_frames
+
 def apply_object_update_arguments_to_buffer_manager(buffer_manager: BufferManager,
                                                     opencv_update_processor: OpenCVUpdateProcessor,
                                                     dataframe_metadata: DataFrameMetadata,
                                                     update_arguments: ObjectUpdateArguments,
-                                                    lsn: int):
-    start_group = int(update_arguments.start_frame // BATCH_SIZE)
-    end_group = int(update_arguments.end_frame // BATCH_SIZE)
-    curr_group = start_group
-    while curr_group <= end_group:
-        try:
+                                                    lsn: int,
+                                                    parallel_update_executor: ParallelUpdateExecutor = None,
+                                                    group_nums: List[int] = None):
+    """
+    Applies the update to every group in its range whose max lsn is lower
+    than lsn, or only to group_nums if given
+    """
+    if group_nums == None:
+        group_nums = buffer_manager.get_groups_in_range(dataframe_metadata,
+                                                        update_arguments.start_frame,
+                                                        update_arguments.end_frame)
+    if parallel_update_executor != None:
+        apply_object_update_arguments_to_buffer_manager_in_parallel(buffer_manager,
+                                                                    parallel_update_executor,
+                                                                    dataframe_metadata,
+                                                                    update_arguments,
+                                                                    lsn,
+                                                                    group_nums)
+        return
+
+    for curr_group in group_nums:
+        group_lsn = buffer_manager.get_group_lsn(dataframe_metadata, curr_group)
+
+        LoggingManager().log(f'lsn: {lsn} max_lsn: {group_lsn}', LoggingLevel.DEBUG)
+
+        if lsn > group_lsn:
             batch = buffer_manager.read_slot(dataframe_metadata, curr_group)
+            new_df = apply_update_to_frames(opencv_update_processor,
+                                            select_frames_in_range(batch.frames,
+                                                                   update_arguments.start_frame,
+                                                                   update_arguments.end_frame),
+                                            update_arguments)
+            new_df['lsn'] = lsn
+            new_batch = Batch(new_df)
+
+            buffer_manager.write_slot(dataframe_metadata, new_batch)
 
-            LoggingManager().log(f'lsn: {lsn} max_lsn: {batch.frames["lsn"].max()}', LoggingLevel.DEBUG)
+def apply_object_update_arguments_to_buffer_manager_in_parallel(buffer_manager: BufferManager,
+                                                                parallel_update_executor: ParallelUpdateExecutor,
+                                                                dataframe_metadata: DataFrameMetadata,
+                                                                update_arguments: ObjectUpdateArguments,
+                                                                lsn: int,
+                                                                group_nums: List[int]):
+    """
+    Same as apply_object_update_arguments_to_buffer_manager, but the groups
+    are updated by the executor's worker processes. Groups are read and
+    submitted in order, up to the executor's window ahead of the oldest
+    one, which is installed back into the buffer manager once done. The
+    buffer manager is only used from the calling thread.
+    """
+    pending = deque()
 
-            if lsn > batch.frames['lsn'].max():
-                new_df = pd.DataFrame()
-                for index, row in batch.frames.iterrows():
-                    if update_arguments.start_frame <= row.id and update_arguments.end_frame >= row.id:
-                        row.data = opencv_update_processor.apply(row.data, update_arguments)
-                        row.lsn = lsn
-                        new_df = new_df.append(row, ignore_index=True)
-                new_batch = Batch(new_df)
+    def install_oldest():
+        curr_group, frames, pending_update = pending.popleft()
+        new_df = frames.copy(deep=False)
+        new_df['data'] = to_frame_column(pending_update.result())
+        new_df['lsn'] = lsn
+        buffer_manager.write_slot(dataframe_metadata, Batch(new_df))
+        LoggingManager().log(f'Installed group {curr_group}', LoggingLevel.DEBUG)
 
-                buffer_manager.write_slot(dataframe_metadata, new_batch)
-            curr_group = curr_group + 1
-        except GroupDoesNotExistException as e:
-            break
+    try:
+        for curr_group in group_nums:
+            group_lsn = buffer_manager.get_group_lsn(dataframe_metadata, curr_group)
+
+            LoggingManager().log(f'lsn: {lsn} max_lsn: {group_lsn}', LoggingLevel.DEBUG)
+
+            if lsn > group_lsn:
+                batch = buffer_manager.read_slot(dataframe_metadata, curr_group)
+                frames = select_frames_in_range(batch.frames,
+                                                update_arguments.start_frame,
+                                                update_arguments.end_frame)
+                if len(frames) == 0:
+                    continue
+                pending.append((curr_group, frames, parallel_update_executor.submit(frames.data.to_numpy(), update_arguments)))
+                if len(pending) >= parallel_update_executor.window:
+                    install_oldest()
+
+        while len(pending) > 0:
+            install_oldest()
+    finally:
+        for curr_group, frames, pending_update in pending:
+            pending_update.discard()
 
 def apply_before_deltas_to_buffer_manager(buffer_manager: BufferManager,
                                             dataframe_metadata: DataFrameMetadata,
                                             before_delta_path: str,
-                                            lsn: int):
-    for path in glob.glob(f'{before_delta_path}_*'):
-        try:
-            curr_group = int(path[path.rfind('_')+1:])
-            batch = buffer_manager.read_slot(dataframe_metadata, curr_group)
+                                            lsn: int,
+                                            group_nums: List[int] = None):
+    """
+    Installs the images saved for every group whose max lsn is lower than
+    lsn, or only for group_nums if given
+    """
+    image_groups = get_groups_with_images(before_delta_path)
+    if len(image_groups) == 0:
+        return
+    # Groups the table no longer has are skipped
+    existing_groups = buffer_manager.get_groups_in_range(dataframe_metadata,
+                                                         image_groups[0] * dataframe_metadata.group_size,
+                                                         (image_groups[-1] + 1) * dataframe_metadata.group_size - 1)
+    for curr_group in image_groups:
+        if curr_group not in existing_groups:
+            continue
+        if group_nums != None and curr_group not in group_nums:
+            continue
+        group_lsn = buffer_manager.get_group_lsn(dataframe_metadata, curr_group)
+
+        LoggingManager().log(f'lsn: {lsn} max_lsn: {group_lsn}', LoggingLevel.DEBUG)
+
+        if lsn > group_lsn:
+            orig_df = read_image(get_group_image_path(before_delta_path, curr_group))
+            # Frames the transaction saved an earlier image for are left out
+            if len(orig_df) == 0:
+                continue
+            orig_df['lsn'] = lsn
+            orig_batch = Batch(orig_df)
 
-            LoggingManager().log(f'lsn: {lsn} max_lsn: {batch.frames["lsn"].max()}', LoggingLevel.DEBUG)
+            buffer_manager.write_slot(dataframe_metadata, orig_batch)
 
-            if lsn > batch.frames['lsn'].max():
-                orig_df = pd.read_pickle(path)
-                orig_df['lsn'] = lsn
-                orig_batch = Batch(orig_df)
+def get_groups_with_images(image_path: str) -> List[int]:
+    """
+    Returns the groups an image was saved for, in order. image_path is the
+    base path of one file per group, an image store locator, or the path of
+    images kept in an undo buffer, which may not have been spilled.
+    """
+    if is_in_memory_image_path(image_path):
+        return sorted(parse_in_memory_image_path(image_path)[1])
+    if is_image_locator(image_path):
+        return sorted(parse_image_locator(image_path)[1].keys())
+    return sorted(int(path[path.rfind('_')+1:]) for path in glob.glob(f'{image_path}_*'))
 
-                buffer_manager.write_slot(dataframe_metadata, orig_batch)
-            curr_group = curr_group + 1
-        except GroupDoesNotExistException as e:
-            break
\ No newline at end of file
+def get_group_image_path(image_path: str, group_num: int) -> str:
+    """
+    Returns the path read_image reads the image of the group from
+    """
+    if is_in_memory_image_path(image_path):
+        image_path = parse_in_memory_image_path(image_path)[0]
+    if is_image_locator(image_path):
+        store_path, locations = parse_image_locator(image_path)
+        offset, length = locations[group_num]
+        return format_image_entry(store_path, offset, length)
+    return f'{image_path}_{group_num}'
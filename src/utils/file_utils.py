@@ -0,0 +1,15 @@
+import os
+
+
+def atomic_write(file_path: str, data: bytes) -> None:
+    """
+    Writes data to file_path so readers only ever see the old or the new
+    contents. The data is written to a temporary file which is then renamed
+    over file_path.
+    """
+    tmp_file_path = f'{file_path}.tmp'
+    with open(tmp_file_path, 'wb') as tmp_file:
+        tmp_file.write(data)
+        tmp_file.flush()
+        os.fsync(tmp_file.fileno())
+    os.replace(tmp_file_path, file_path)
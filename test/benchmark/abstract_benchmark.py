@@ -5,8 +5,9 @@ from src.utils.logging_manager import LoggingManager, LoggingLevel
 from test.utils.metrics import Timing, get_dir_size
 
 class AbstractBenchmark(ABC):
-    def __init__(self, repetitions = 1):
+    def __init__(self, repetitions = 1, disk_folder = TRANSACTION_STORAGE_FOLDER):
         self.repetitions = repetitions
+        self.disk_folder = disk_folder
         self._time_measurements = []
         self._disk_measurement = 0
 
@@ -28,7 +29,7 @@ class AbstractBenchmark(ABC):
                 self._run()
             self.time_measurements.append(t.get_time())
             if i + 1 == self.repetitions:
-                self._disk_measurement = get_dir_size(TRANSACTION_STORAGE_FOLDER)
+                self._disk_measurement = get_dir_size(self.disk_folder)
             LoggingManager().log(f'Running tear down', LoggingLevel.INFO)
             self._tearDown()
 
@@ -0,0 +1,84 @@
+import sys
+import os
+sys.path.insert(1, os.path.join(sys.path[0], '../..'))
+import time
+import pandas as pd
+
+from src.catalog.column_codec import ColumnCodec
+from src.catalog.column_type import ColumnType
+from src.catalog.models.df_column import DataFrameColumn
+from src.catalog.schema_utils import SchemaUtils
+from src.readers.opencv_reader import OpenCVReader
+from src.storage.partitioned_petastorm_storage_engine import PartitionedPetastormStorageEngine
+from test.utils.util_functions import write_file, \
+                                        clear_petastorm_storage_folder
+from src.utils.logging_manager import LoggingManager, LoggingLevel
+from src.config.constants import PETASTORM_STORAGE_FOLDER, \
+                                INPUT_VIDEO_FOLDER, \
+                                BENCHMARK_DATA_FOLDER, \
+                                BATCH_SIZE
+
+from test.benchmark.abstract_benchmark import AbstractBenchmark
+
+FILE_NAME = 'traffic001_30'
+
+class CodecWriteBenchmark(AbstractBenchmark):
+    def __init__(self, codec, file_name, repetitions, storage_engine):
+        super().__init__(repetitions=repetitions, disk_folder=PETASTORM_STORAGE_FOLDER)
+        self.codec = codec
+        self.file_name = file_name
+        self.storage_engine = storage_engine
+
+    def _setUp(self):
+        clear_petastorm_storage_folder()
+
+    def _tearDown(self):
+        clear_petastorm_storage_folder()
+
+    def _run(self):
+        write_file(self.storage_engine, self.file_name, include_lsn=True, codec=self.codec)
+
+def measure_codec_cpu(codec, file_name):
+    """
+    Returns the CPU time spent encoding and decoding every frame of the
+    video with the given codec, excluding any storage engine overhead.
+    """
+    reader = OpenCVReader(file_url=f'{INPUT_VIDEO_FOLDER}/{file_name}.mp4', batch_size=BATCH_SIZE)
+    field = SchemaUtils.get_petastorm_column(
+        DataFrameColumn('data', ColumnType.NDARRAY,
+                        array_dimensions=[reader.video_height(), reader.video_width(), 3],
+                        codec=codec))
+
+    encode_time = 0.0
+    decode_time = 0.0
+    for batch in reader.read():
+        for frame in batch.frames.data:
+            start = time.process_time()
+            encoded = field.codec.encode(field, frame)
+            encode_time += time.process_time() - start
+
+            start = time.process_time()
+            field.codec.decode(field, encoded)
+            decode_time += time.process_time() - start
+    return encode_time, decode_time
+
+if __name__ == '__main__':
+    LoggingManager().setEffectiveLevel(LoggingLevel.INFO)
+
+    data_df = pd.DataFrame(columns=['codec', 'disk', 'write_time', 'encode_time', 'decode_time'])
+
+    storage_engine = PartitionedPetastormStorageEngine()
+    for codec in ColumnCodec:
+        benchmark = CodecWriteBenchmark(codec, FILE_NAME, 3, storage_engine)
+        benchmark.run_benchmark()
+        encode_time, decode_time = measure_codec_cpu(codec, FILE_NAME)
+        print(f'{codec.name} Timing: {benchmark.time_measurements}')
+        print(f'{codec.name} Disk: {benchmark.disk_measurement}')
+        print(f'{codec.name} Encode CPU: {encode_time} Decode CPU: {decode_time}')
+        for result in benchmark.time_measurements:
+            data_df = data_df.append({'codec': codec.name,
+                                      'disk': benchmark.disk_measurement,
+                                      'write_time': result,
+                                      'encode_time': encode_time,
+                                      'decode_time': decode_time}, ignore_index=True)
+        data_df.to_csv(f'{BENCHMARK_DATA_FOLDER}/codec.csv')
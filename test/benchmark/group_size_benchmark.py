@@ -0,0 +1,106 @@
+import sys
+import os
+sys.path.insert(1, os.path.join(sys.path[0], '../..'))
+import shutil
+import pandas as pd
+
+from src.transaction.optimized_transaction_manager import OptimizedTransactionManager
+from src.transaction.object_update_arguments import ObjectUpdateArguments
+from test.utils.util_functions import clear_petastorm_storage_folder, \
+                                        clear_transaction_storage_folder
+from src.Logging.logical_log_manager import LogicalLogManager
+from src.buffer.buffer_manager import BufferManager
+from src.utils.logging_manager import LoggingManager, LoggingLevel
+from src.config.constants import SHADOW_PETASTORM_STORAGE_FOLDER, \
+                                PETASTORM_STORAGE_FOLDER, \
+                                BENCHMARK_DATA_FOLDER
+
+from test.benchmark.abstract_benchmark import AbstractBenchmark
+from test.benchmark.benchmark_environment import setUp, tearDown
+
+GROUP_SIZES = [10, 25, 50, 100, 200]
+ITERATIONS = 3
+
+# Short updates spread over the video, so each one only touches part of a group
+UPDATE_OPERATIONS = [
+    ObjectUpdateArguments('invert_color', 100, 199),
+    ObjectUpdateArguments('grayscale', 1210, 1309),
+    ObjectUpdateArguments('invert_color', 2320, 2419),
+    ObjectUpdateArguments('grayscale', 3430, 3529),
+]
+
+class GroupSizeBenchmark(AbstractBenchmark):
+    def __init__(self, repetitions, storage_engine, dataframe_metadata):
+        super().__init__(repetitions=repetitions)
+        self.storage_engine = storage_engine
+        self.dataframe_metadata = dataframe_metadata
+
+    def _create_managers(self):
+        self.buffer_mgr = BufferManager(100, self.storage_engine)
+        self.log_mgr = LogicalLogManager(self.buffer_mgr)
+        self.txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                                    log_manager_passed=self.log_mgr,
+                                                    buffer_manager_passed=self.buffer_mgr)
+
+    def _update(self):
+        txn_id = self.txn_mgr.begin_transaction()
+        for update_operation in UPDATE_OPERATIONS:
+            self.txn_mgr.update_object(txn_id, self.dataframe_metadata, update_operation)
+        self.txn_mgr.commit_transaction(txn_id)
+
+    def _setUp(self):
+        clear_petastorm_storage_folder()
+        clear_transaction_storage_folder()
+
+        shutil.copytree(SHADOW_PETASTORM_STORAGE_FOLDER, PETASTORM_STORAGE_FOLDER, dirs_exist_ok=True)
+
+        self._create_managers()
+
+    def _tearDown(self):
+        self.txn_mgr.close()
+        clear_petastorm_storage_folder()
+        clear_transaction_storage_folder()
+
+class GroupSizeUpdateBenchmark(GroupSizeBenchmark):
+    def _run(self):
+        self._update()
+
+class GroupSizeFlushBenchmark(GroupSizeBenchmark):
+    def _setUp(self):
+        super()._setUp()
+        self._update()
+
+    def _run(self):
+        self.buffer_mgr.flush_all_slots()
+
+class GroupSizeRecoveryBenchmark(GroupSizeBenchmark):
+    def _setUp(self):
+        super()._setUp()
+        self._update()
+
+        # Simulate restart after a crash, nothing was flushed so everything is redone
+        self.txn_mgr.close()
+        self._create_managers()
+
+    def _run(self):
+        self.txn_mgr.recover()
+
+if __name__ == '__main__':
+    LoggingManager().setEffectiveLevel(LoggingLevel.INFO)
+
+    data_df = pd.DataFrame(columns=['group_size', 'operation', 'time'])
+
+    for group_size in GROUP_SIZES:
+        storage_engine, dataframe_metadata = setUp(True, group_size=group_size)
+
+        for operation, benchmark_class in [('update', GroupSizeUpdateBenchmark),
+                                           ('flush', GroupSizeFlushBenchmark),
+                                           ('recovery', GroupSizeRecoveryBenchmark)]:
+            benchmark = benchmark_class(ITERATIONS, storage_engine, dataframe_metadata)
+            benchmark.run_benchmark()
+            print(f'Group size {group_size} {operation} Timing: {benchmark.time_measurements}')
+            for result in benchmark.time_measurements:
+                data_df = data_df.append({'group_size': group_size, 'operation': operation, 'time': result}, ignore_index=True)
+            data_df.to_csv(f'{BENCHMARK_DATA_FOLDER}/group_size.csv')
+
+        tearDown()
@@ -0,0 +1,89 @@
+import sys
+import os
+sys.path.insert(1, os.path.join(sys.path[0], '../..'))
+import shutil
+import pandas as pd
+
+from src.transaction.optimized_transaction_manager import OptimizedTransactionManager
+from src.transaction.object_update_arguments import ObjectUpdateArguments
+from test.utils.util_functions import clear_petastorm_storage_folder, \
+                                        clear_transaction_storage_folder
+from src.Logging.logical_log_manager import LogicalLogManager
+from src.buffer.buffer_manager import BufferManager
+from src.utils.logging_manager import LoggingManager, LoggingLevel
+from src.config.constants import SHADOW_PETASTORM_STORAGE_FOLDER, \
+                                PETASTORM_STORAGE_FOLDER, \
+                                BENCHMARK_DATA_FOLDER
+
+from test.benchmark.abstract_benchmark import AbstractBenchmark
+from test.benchmark.benchmark_environment import setUp, tearDown
+
+class ImageCompressionRecoveryBenchmark(AbstractBenchmark):
+    def __init__(self, update_operation, pphysical_logging, compress_images, repetitions, storage_engine, dataframe_metadata):
+        super().__init__(repetitions=repetitions)
+        self.update_operation = update_operation
+        self.pphysical_logging = pphysical_logging
+        self.compress_images = compress_images
+        self.storage_engine = storage_engine
+        self.dataframe_metadata = dataframe_metadata
+
+    def _setUp(self):
+        clear_petastorm_storage_folder()
+        clear_transaction_storage_folder()
+
+        shutil.copytree(SHADOW_PETASTORM_STORAGE_FOLDER, PETASTORM_STORAGE_FOLDER, dirs_exist_ok=True)
+
+        buffer_mgr = BufferManager(100, self.storage_engine)
+        log_mgr = LogicalLogManager(buffer_mgr)
+        txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                                log_manager_passed=log_mgr,
+                                                buffer_manager_passed=buffer_mgr,
+                                                force_physical_logging=True,
+                                                force_pphysical_logging=self.pphysical_logging,
+                                                compress_images=self.compress_images)
+
+        # Crash before commit, so recovery reads every before image
+        txn_id = txn_mgr.begin_transaction()
+        txn_mgr.update_object(txn_id, self.dataframe_metadata, self.update_operation)
+        buffer_mgr.flush_all_slots()
+        log_mgr.flush()
+        txn_mgr.close()
+
+        # Simulate restart after a crash
+        self.buffer_mgr = BufferManager(100, self.storage_engine)
+        self.log_mgr = LogicalLogManager(self.buffer_mgr)
+
+    def _tearDown(self):
+        clear_petastorm_storage_folder()
+        clear_transaction_storage_folder()
+
+    def _run(self):
+        self.log_mgr.recover_log()
+
+UPDATE_OPERATIONS = {
+    'invert_color': ObjectUpdateArguments('invert_color', 0, 4499),
+    'grayscale': ObjectUpdateArguments('grayscale', 0, 4499),
+    'contrast_brightness': ObjectUpdateArguments('contrast_brightness', 0, 4499, contrast=1, brightness=10)
+}
+
+if __name__ == '__main__':
+    LoggingManager().setEffectiveLevel(LoggingLevel.INFO)
+
+    time_df = pd.DataFrame(columns=['protocol', 'images', 'operation', 'time'])
+    disk_df = pd.DataFrame(columns=['protocol', 'images', 'operation', 'disk'])
+
+    storage_engine, dataframe_metadata = setUp(True)
+    for operation, update_operation in UPDATE_OPERATIONS.items():
+        for protocol, pphysical_logging in [('Hybrid', False), ('Physical', True)]:
+            for images, compress_images in [('Uncompressed', False), ('Compressed', True)]:
+                benchmark = ImageCompressionRecoveryBenchmark(update_operation, pphysical_logging, compress_images,
+                                                              5, storage_engine, dataframe_metadata)
+                benchmark.run_benchmark()
+                print(f'Timing: {benchmark.time_measurements}')
+                print(f'Disk: {benchmark.disk_measurement}')
+                for result in benchmark.time_measurements:
+                    time_df = time_df.append({'protocol': protocol, 'images': images, 'operation': operation, 'time': result}, ignore_index=True)
+                time_df.to_csv(f'{BENCHMARK_DATA_FOLDER}/image_compression_recovery_time.csv')
+                disk_df = disk_df.append({'protocol': protocol, 'images': images, 'operation': operation, 'disk': benchmark.disk_measurement}, ignore_index=True)
+                disk_df.to_csv(f'{BENCHMARK_DATA_FOLDER}/image_compression_disk.csv')
+    tearDown()
@@ -0,0 +1,91 @@
+import sys
+import os
+sys.path.insert(1, os.path.join(sys.path[0], '../..'))
+import pandas as pd
+
+from src.storage.partitioned_petastorm_storage_engine import PartitionedPetastormStorageEngine
+from src.readers.opencv_reader import OpenCVReader
+from test.utils.util_functions import write_file, \
+                                        clear_petastorm_storage_folder
+from src.utils.logging_manager import LoggingManager, LoggingLevel
+from src.config.constants import PETASTORM_STORAGE_FOLDER, \
+                                INPUT_VIDEO_FOLDER, \
+                                BENCHMARK_DATA_FOLDER
+
+from test.benchmark.abstract_benchmark import AbstractBenchmark
+
+VIDEO_LENGTHS = [6, 30, 60, 120, 150, 180, 240, 300]
+ITERATIONS = 3
+
+# (name, decode processes, group writers), a single writer with a single
+# decoder still overlaps decoding and writing
+CONFIGURATIONS = [
+    ('Pipelined', 1, 1),
+    ('Pipelined (4 writers)', 1, 4),
+    ('Pipelined (4 decoders, 4 writers)', 4, 4),
+]
+
+class SerialIngestBenchmark(AbstractBenchmark):
+    """
+    Ingest as it was done before the pipeline, decoding and writing in turn
+    """
+    def __init__(self, len_sec, repetitions, storage_engine):
+        super().__init__(repetitions=repetitions, disk_folder=PETASTORM_STORAGE_FOLDER)
+        self.len_sec = len_sec
+        self.storage_engine = storage_engine
+
+    def _setUp(self):
+        clear_petastorm_storage_folder()
+        # Create the table through the pipeline once so only the serial
+        # loop is timed
+        self.dataframe_metadata = write_file(self.storage_engine, f'traffic001_{self.len_sec}', include_lsn=True)
+
+    def _tearDown(self):
+        clear_petastorm_storage_folder()
+
+    def _run(self):
+        reader = OpenCVReader(file_url=self.dataframe_metadata.file_url,
+                              include_lsn=True,
+                              batch_size=self.dataframe_metadata.group_size)
+        for batch in reader.read():
+            self.storage_engine.write(self.dataframe_metadata, batch)
+
+class IngestBenchmark(AbstractBenchmark):
+    def __init__(self, len_sec, num_decoders, num_writers, repetitions, storage_engine):
+        super().__init__(repetitions=repetitions, disk_folder=PETASTORM_STORAGE_FOLDER)
+        self.len_sec = len_sec
+        self.num_decoders = num_decoders
+        self.num_writers = num_writers
+        self.storage_engine = storage_engine
+
+    def _setUp(self):
+        clear_petastorm_storage_folder()
+
+    def _tearDown(self):
+        clear_petastorm_storage_folder()
+
+    def _run(self):
+        write_file(self.storage_engine, f'traffic001_{self.len_sec}', include_lsn=True,
+                   num_decoders=self.num_decoders, num_writers=self.num_writers)
+
+def get_frame_count(len_sec):
+    return OpenCVReader(file_url=f'{INPUT_VIDEO_FOLDER}/traffic001_{len_sec}.mp4').video_frame_count()
+
+if __name__ == '__main__':
+    LoggingManager().setEffectiveLevel(LoggingLevel.INFO)
+
+    data_df = pd.DataFrame(columns=['pipeline', 'len_sec', 'time', 'fps'])
+
+    storage_engine = PartitionedPetastormStorageEngine()
+    for len_sec in VIDEO_LENGTHS:
+        frame_count = get_frame_count(len_sec)
+        benchmarks = [('Serial', SerialIngestBenchmark(len_sec, ITERATIONS, storage_engine))]
+        benchmarks += [(name, IngestBenchmark(len_sec, num_decoders, num_writers, ITERATIONS, storage_engine))
+                       for name, num_decoders, num_writers in CONFIGURATIONS]
+
+        for name, benchmark in benchmarks:
+            benchmark.run_benchmark()
+            print(f'{name} {len_sec}s Timing: {benchmark.time_measurements}')
+            for result in benchmark.time_measurements:
+                data_df = data_df.append({'pipeline': name, 'len_sec': len_sec, 'time': result, 'fps': frame_count / result}, ignore_index=True)
+            data_df.to_csv(f'{BENCHMARK_DATA_FOLDER}/ingest.csv')
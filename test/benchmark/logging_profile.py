@@ -44,6 +44,7 @@ class LoggingProfilePartitioned(AbstractProfile):
         self.update_operations = [ObjectUpdateArguments('invert_color', 0, 4499) for i in range(NUM_UPDATES)]
 
     def _tearDown(self):
+        self.txn_mgr.close()
         clear_petastorm_storage_folder()
         clear_transaction_storage_folder()
 
@@ -24,13 +24,15 @@ from test.benchmark.abstract_benchmark import AbstractBenchmark
 from test.benchmark.benchmark_environment import setUp, tearDown
 
 class NumUpdatesBenchmarkPartitioned(AbstractBenchmark):
-    def __init__(self, num_updates, hybrid_protocol, repetitions, storage_engine, dataframe_metadata, pphysical_logging=False):
+    def __init__(self, num_updates, hybrid_protocol, repetitions, storage_engine, dataframe_metadata, pphysical_logging=False,
+                 deduplicate_before_images=True):
         super().__init__(repetitions=repetitions)
         self.num_updates = num_updates
         self.hybrid_protocol = hybrid_protocol
         self.storage_engine = storage_engine
         self.dataframe_metadata = dataframe_metadata
         self.pphysical_logging = pphysical_logging
+        self.deduplicate_before_images = deduplicate_before_images
 
     def _setUp(self):
         clear_petastorm_storage_folder()
@@ -44,11 +46,13 @@ class NumUpdatesBenchmarkPartitioned(AbstractBenchmark):
                                                     log_manager_passed=self.log_mgr,
                                                     buffer_manager_passed=self.buffer_mgr,
                                                     force_physical_logging=self.hybrid_protocol,
-                                                    force_pphysical_logging=self.pphysical_logging)
+                                                    force_pphysical_logging=self.pphysical_logging,
+                                                    deduplicate_before_images=self.deduplicate_before_images)
 
         self.update_operations = [ObjectUpdateArguments('invert_color', 0, 4499) for i in range(self.num_updates)]
 
     def _tearDown(self):
+        self.txn_mgr.close()
         clear_petastorm_storage_folder()
         clear_transaction_storage_folder()
 
@@ -121,6 +125,20 @@ if __name__ == '__main__':
         time_df.to_csv(f'{BENCHMARK_DATA_FOLDER}/num_updates_time.csv')
         disk_df = disk_df.append({'protocol': 'Hybrid', 'num_updates': i, 'disk': benchmark.disk_measurement}, ignore_index=True)
         disk_df.to_csv(f'{BENCHMARK_DATA_FOLDER}/num_updates_disk.csv')
+
+    # Hybrid logging, saving a before image for every update
+    for i in range(0, 9, 2):
+        if i == 0:
+            i = 1
+        benchmark = NumUpdatesBenchmarkPartitioned(i, True, 5, storage_engine, dataframe_metadata, deduplicate_before_images=False)
+        benchmark.run_benchmark()
+        print(f'Timing: {benchmark.time_measurements}')
+        print(f'Disk: {benchmark.disk_measurement}')
+        for result in benchmark.time_measurements:
+            time_df = time_df.append({'protocol': 'Hybrid (All Images)', 'num_updates': i, 'time': result}, ignore_index=True)
+        time_df.to_csv(f'{BENCHMARK_DATA_FOLDER}/num_updates_time.csv')
+        disk_df = disk_df.append({'protocol': 'Hybrid (All Images)', 'num_updates': i, 'disk': benchmark.disk_measurement}, ignore_index=True)
+        disk_df.to_csv(f'{BENCHMARK_DATA_FOLDER}/num_updates_disk.csv')
     
     # Physical logging (with buffering)
     for i in range(0, 9, 2):
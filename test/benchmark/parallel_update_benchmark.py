@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.insert(1, os.path.join(sys.path[0], '../..'))
+import shutil
+import pandas as pd
+
+from src.transaction.optimized_transaction_manager import OptimizedTransactionManager
+from src.transaction.object_update_arguments import ObjectUpdateArguments
+from test.utils.util_functions import clear_petastorm_storage_folder, \
+                                        clear_transaction_storage_folder
+from src.Logging.logical_log_manager import LogicalLogManager
+from src.buffer.buffer_manager import BufferManager
+from src.utils.logging_manager import LoggingManager, LoggingLevel
+from src.config.constants import SHADOW_PETASTORM_STORAGE_FOLDER, \
+                                PETASTORM_STORAGE_FOLDER, \
+                                BENCHMARK_DATA_FOLDER
+
+from test.benchmark.abstract_benchmark import AbstractBenchmark
+from test.benchmark.benchmark_environment import setUp, tearDown
+
+# 0 applies the update on the calling thread
+NUM_WORKERS = [0, 1, 2, 4, 8]
+ITERATIONS = 3
+
+UPDATES = [
+    ObjectUpdateArguments('gaussian_blur', 0, 4499, ksize=(13, 13), sigmaX=0),
+    ObjectUpdateArguments('resize', 0, 4499, dsize=(480, 270)),
+    ObjectUpdateArguments('grayscale', 0, 4499)
+]
+
+class ParallelUpdateBenchmark(AbstractBenchmark):
+    def __init__(self, update_operation, num_workers, repetitions, storage_engine, dataframe_metadata):
+        super().__init__(repetitions=repetitions)
+        self.update_operation = update_operation
+        self.num_workers = num_workers
+        self.storage_engine = storage_engine
+        self.dataframe_metadata = dataframe_metadata
+
+    def _setUp(self):
+        clear_petastorm_storage_folder()
+        clear_transaction_storage_folder()
+
+        shutil.copytree(SHADOW_PETASTORM_STORAGE_FOLDER, PETASTORM_STORAGE_FOLDER, dirs_exist_ok=True)
+
+        self.buffer_mgr = BufferManager(100, self.storage_engine)
+        self.log_mgr = LogicalLogManager(self.buffer_mgr)
+        self.txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                                    log_manager_passed=self.log_mgr,
+                                                    buffer_manager_passed=self.buffer_mgr,
+                                                    force_physical_logging=True,
+                                                    parallel_update_workers=self.num_workers)
+
+    def _tearDown(self):
+        self.txn_mgr.close()
+        clear_petastorm_storage_folder()
+        clear_transaction_storage_folder()
+
+    def _run(self):
+        txn_id = self.txn_mgr.begin_transaction()
+        self.txn_mgr.update_object(txn_id, self.dataframe_metadata, self.update_operation)
+        self.txn_mgr.commit_transaction(txn_id)
+
+if __name__ == '__main__':
+    LoggingManager().setEffectiveLevel(LoggingLevel.INFO)
+
+    data_df = pd.DataFrame(columns=['operation', 'num_workers', 'time', 'fps'])
+
+    storage_engine, dataframe_metadata = setUp(True)
+    for update_operation in UPDATES:
+        num_frames = update_operation.end_frame - update_operation.start_frame + 1
+        for num_workers in NUM_WORKERS:
+            benchmark = ParallelUpdateBenchmark(update_operation, num_workers, ITERATIONS, storage_engine, dataframe_metadata)
+            benchmark.run_benchmark()
+            print(f'{update_operation.function_name} {num_workers} workers Timing: {benchmark.time_measurements}')
+            for result in benchmark.time_measurements:
+                data_df = data_df.append({'operation': update_operation.function_name,
+                                          'num_workers': num_workers,
+                                          'time': result,
+                                          'fps': num_frames / result}, ignore_index=True)
+            data_df.to_csv(f'{BENCHMARK_DATA_FOLDER}/parallel_update.csv')
+    tearDown()
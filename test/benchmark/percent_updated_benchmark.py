@@ -49,6 +49,7 @@ class PercentUpdatedBenchmarkPartitioned(AbstractBenchmark):
         self.update_operation = ObjectUpdateArguments('invert_color', 0, int(4499*(self.percent_updated/100)))
 
     def _tearDown(self):
+        self.txn_mgr.close()
         clear_petastorm_storage_folder()
         clear_transaction_storage_folder()
 
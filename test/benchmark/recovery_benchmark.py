@@ -57,6 +57,7 @@ class RecoveryBenchmarkPartitioned(AbstractBenchmark):
             self.txn_mgr.commit_transaction(txn_id)
 
         # Simulate restart after a crash
+        self.txn_mgr.close()
         self.buffer_mgr = BufferManager(100, self.storage_engine)
         self.log_mgr = LogicalLogManager(self.buffer_mgr)
         self.txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
@@ -65,6 +66,7 @@ class RecoveryBenchmarkPartitioned(AbstractBenchmark):
                                                     force_physical_logging=self.hybrid_protocol)
 
     def _tearDown(self):
+        self.txn_mgr.close()
         clear_petastorm_storage_folder()
         clear_transaction_storage_folder()
 
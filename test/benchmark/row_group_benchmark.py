@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.insert(1, os.path.join(sys.path[0], '../..'))
+import pandas as pd
+
+from src.storage.partitioned_petastorm_storage_engine import PartitionedPetastormStorageEngine
+from test.utils.util_functions import write_file, \
+                                        clear_petastorm_storage_folder
+from src.utils.logging_manager import LoggingManager, LoggingLevel
+from src.config.constants import PETASTORM_STORAGE_FOLDER, \
+                                BENCHMARK_DATA_FOLDER, \
+                                ROW_GROUP_FRAMES
+
+from test.benchmark.abstract_benchmark import AbstractBenchmark
+
+FILE_NAME = 'traffic001_30'
+# None writes whole group row groups
+ROW_GROUP_FRAMES_VALUES = [None, ROW_GROUP_FRAMES]
+# Frames read by the frame range benchmark, inside a single group
+FRAME_RANGE = (120, 130)
+ITERATIONS = 3
+
+class RowGroupWriteBenchmark(AbstractBenchmark):
+    def __init__(self, repetitions, storage_engine):
+        super().__init__(repetitions=repetitions, disk_folder=PETASTORM_STORAGE_FOLDER)
+        self.storage_engine = storage_engine
+
+    def _setUp(self):
+        clear_petastorm_storage_folder()
+
+    def _tearDown(self):
+        clear_petastorm_storage_folder()
+
+    def _run(self):
+        write_file(self.storage_engine, FILE_NAME, include_lsn=True)
+
+class RowGroupFrameRangeBenchmark(AbstractBenchmark):
+    def __init__(self, repetitions, storage_engine, dataframe_metadata):
+        super().__init__(repetitions=repetitions)
+        self.storage_engine = storage_engine
+        self.dataframe_metadata = dataframe_metadata
+
+    def _run(self):
+        for batch in self.storage_engine.read(self.dataframe_metadata, frame_range=FRAME_RANGE):
+            pass
+
+if __name__ == '__main__':
+    LoggingManager().setEffectiveLevel(LoggingLevel.INFO)
+
+    data_df = pd.DataFrame(columns=['row_group_frames', 'operation', 'time'])
+
+    for row_group_frames in ROW_GROUP_FRAMES_VALUES:
+        storage_engine = PartitionedPetastormStorageEngine(row_group_frames=row_group_frames)
+
+        write_benchmark = RowGroupWriteBenchmark(ITERATIONS, storage_engine)
+        write_benchmark.run_benchmark()
+        print(f'{row_group_frames} frames per row group Write Timing: {write_benchmark.time_measurements}')
+
+        dataframe_metadata = write_file(storage_engine, FILE_NAME, include_lsn=True)
+        read_benchmark = RowGroupFrameRangeBenchmark(ITERATIONS, storage_engine, dataframe_metadata)
+        read_benchmark.run_benchmark()
+        print(f'{row_group_frames} frames per row group Frame Range Timing: {read_benchmark.time_measurements}')
+        clear_petastorm_storage_folder()
+
+        for operation, benchmark in [('write', write_benchmark), ('frame_range_read', read_benchmark)]:
+            for result in benchmark.time_measurements:
+                data_df = data_df.append({'row_group_frames': row_group_frames,
+                                          'operation': operation,
+                                          'time': result}, ignore_index=True)
+        data_df.to_csv(f'{BENCHMARK_DATA_FOLDER}/row_group.csv')
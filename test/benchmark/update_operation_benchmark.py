@@ -0,0 +1,80 @@
+import sys
+import os
+sys.path.insert(1, os.path.join(sys.path[0], '../..'))
+import pandas as pd
+import numpy as np
+
+from src.readers.opencv_reader import OpenCVReader
+from src.transaction.object_update_arguments import ObjectUpdateArguments
+from src.transaction.opencv_update_processor import OpenCVUpdateProcessor
+from src.utils.logging_manager import LoggingManager, LoggingLevel
+from src.config.constants import INPUT_VIDEO_FOLDER, \
+                                BENCHMARK_DATA_FOLDER, \
+                                BATCH_SIZE
+
+from test.benchmark.abstract_benchmark import AbstractBenchmark
+
+FILE_NAME = 'traffic001_30'
+ITERATIONS = 5
+
+UPDATES = [
+    ObjectUpdateArguments('grayscale'),
+    ObjectUpdateArguments('invert_color'),
+    ObjectUpdateArguments('contrast_brightness', contrast=2, brightness=0),
+    ObjectUpdateArguments('gaussian_blur', ksize=(13, 13), sigmaX=0),
+    ObjectUpdateArguments('resize', dsize=(480, 270))
+]
+
+class PerFrameUpdateBenchmark(AbstractBenchmark):
+    """
+    Applies the update one frame at a time, as the transaction managers
+    did before apply_batch
+    """
+    def __init__(self, frames, update_arguments, repetitions):
+        super().__init__(repetitions=repetitions)
+        self.frames = frames
+        self.update_arguments = update_arguments
+        self.opencv_update_processor = OpenCVUpdateProcessor()
+
+    def _run(self):
+        for frame in self.frames:
+            self.opencv_update_processor.apply(frame, self.update_arguments)
+
+class BatchUpdateBenchmark(AbstractBenchmark):
+    def __init__(self, frames, update_arguments, inplace, repetitions):
+        super().__init__(repetitions=repetitions)
+        self.frames = frames
+        self.update_arguments = update_arguments
+        self.inplace = inplace
+        self.opencv_update_processor = OpenCVUpdateProcessor()
+
+    def _run(self):
+        self.opencv_update_processor.apply_batch(self.frames, self.update_arguments, inplace=self.inplace)
+
+def read_group(file_name):
+    reader = OpenCVReader(file_url=f'{INPUT_VIDEO_FOLDER}/{file_name}.mp4', batch_size=BATCH_SIZE)
+    batch = next(reader.read())
+    return np.stack(list(batch.frames.data))
+
+if __name__ == '__main__':
+    LoggingManager().setEffectiveLevel(LoggingLevel.INFO)
+
+    data_df = pd.DataFrame(columns=['operation', 'method', 'time', 'fps'])
+
+    frames = read_group(FILE_NAME)
+    for update_arguments in UPDATES:
+        benchmarks = [
+            ('Per frame', PerFrameUpdateBenchmark(frames, update_arguments, ITERATIONS)),
+            ('Batch', BatchUpdateBenchmark(frames, update_arguments, False, ITERATIONS)),
+            # Works on its own copy, the frames are overwritten each run
+            ('Batch (in place)', BatchUpdateBenchmark(frames.copy(), update_arguments, True, ITERATIONS))
+        ]
+        for method, benchmark in benchmarks:
+            benchmark.run_benchmark()
+            print(f'{update_arguments.function_name} {method} Timing: {benchmark.time_measurements}')
+            for result in benchmark.time_measurements:
+                data_df = data_df.append({'operation': update_arguments.function_name,
+                                          'method': method,
+                                          'time': result,
+                                          'fps': len(frames) / result}, ignore_index=True)
+            data_df.to_csv(f'{BENCHMARK_DATA_FOLDER}/update_operation.csv')
@@ -48,6 +48,7 @@ class VideoLengthUpdateBenchmarkPartitioned(AbstractBenchmark):
         self.update_operation = ObjectUpdateArguments('invert_color', 0, len_sec*30)
 
     def _tearDown(self):
+        self.txn_mgr.close()
         clear_petastorm_storage_folder()
         clear_transaction_storage_folder()
 
@@ -133,5 +133,38 @@ class BufferManagerTest(unittest.TestCase):
         buffer_manager.read_slot(dataframe_metadata, 1)
         self.assertEqual(buffer_manager._lru, [0, 1])
 
+    @ignore_warnings
+    def test_should_probe_group_lsn_without_using_slot(self):
+        input_file_name = 'traffic001_6'
+        dataframe_metadata = write_file(self.storage_engine, input_file_name, include_lsn=True)
+        buffer_manager = BufferManager(10, self.storage_engine)
+
+        self.assertEqual(buffer_manager.get_group_lsn(dataframe_metadata, 0), -1)
+        self.assertIsNone(buffer_manager._slots[0])
+
+        batch = buffer_manager.read_slot(dataframe_metadata, 0)
+        batch.frames['lsn'] = 10
+        self.assertEqual(buffer_manager.get_group_lsn(dataframe_metadata, 0), 10)
+
+    @ignore_warnings
+    def test_should_replace_and_flush_group(self):
+        input_file_name = 'traffic001_6'
+        dataframe_metadata = write_file(self.storage_engine, input_file_name)
+        buffer_manager = BufferManager(10, self.storage_engine)
+
+        before_frames = read_file_from_petastorm(self.storage_engine, dataframe_metadata)
+        group_frames = before_frames.loc[before_frames.id // dataframe_metadata.group_size == 1].reset_index(drop=True)
+        update_operation = ObjectUpdateArguments('invert_color', 100, 199)
+        expected_new_batch = Batch(frames=apply_update_to_dataframe(group_frames, update_operation))
+
+        buffer_manager.replace_slot(dataframe_metadata, expected_new_batch)
+        self.assertTrue(buffer_manager._slots[0].dirty)
+        buffer_manager.flush_group(dataframe_metadata, 1)
+        self.assertFalse(buffer_manager._slots[0].dirty)
+        buffer_manager.discard_all_slots()
+
+        after_batch = buffer_manager.read_slot(dataframe_metadata, 1)
+        self.assertTrue(dataframes_equal(after_batch.frames, expected_new_batch.frames))
+
 if __name__ == '__main__':
     unittest.main()     
\ No newline at end of file
@@ -0,0 +1,78 @@
+import unittest
+
+from src.catalog.catalog_manager import CatalogManager, TableNotInCatalogException
+from src.catalog.column_codec import ColumnCodec
+from src.catalog.column_type import ColumnType
+from src.catalog.models.df_column import DataFrameColumn
+from src.catalog.models.df_metadata import DataFrameMetadata
+from test.utils.util_functions import clear_petastorm_storage_folder, \
+                                        clear_catalog_folder
+
+class CatalogManagerTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def tearDown(self):
+        clear_petastorm_storage_folder()
+        clear_catalog_folder()
+        CatalogManager().load()
+
+    def _create_metadata(self, file_name, group_size=50):
+        dataframe_metadata = DataFrameMetadata(file_name, f'data/{file_name}.mp4', group_size=group_size)
+        dataframe_metadata.schema = [
+            DataFrameColumn('id', ColumnType.INTEGER),
+            DataFrameColumn('data', ColumnType.NDARRAY, array_dimensions=[540, 960, 3], codec=ColumnCodec.PNG),
+            DataFrameColumn('lsn', ColumnType.INTEGER)
+        ]
+        return dataframe_metadata
+
+    def test_should_assign_stable_table_ids(self):
+        first_id = CatalogManager().register_table(self._create_metadata('traffic001_6'))
+        second_id = CatalogManager().register_table(self._create_metadata('traffic001_30'))
+        self.assertNotEqual(first_id, second_id)
+
+        self.assertEqual(CatalogManager().register_table(self._create_metadata('traffic001_6')), first_id)
+
+    def test_should_persist_tables(self):
+        dataframe_metadata = self._create_metadata('traffic001_6', group_size=20)
+        table_id = CatalogManager().register_table(dataframe_metadata, frame_count=180)
+
+        CatalogManager().load()
+        loaded_metadata = CatalogManager().get_table('data/traffic001_6.mp4')
+
+        self.assertEqual(loaded_metadata.id, table_id)
+        self.assertEqual(loaded_metadata.group_size, 20)
+        self.assertEqual(loaded_metadata.frame_codec, ColumnCodec.PNG)
+        self.assertEqual(loaded_metadata.schema, dataframe_metadata.schema)
+        self.assertEqual(CatalogManager().get_frame_count(loaded_metadata), 180)
+
+    def test_should_serialize_registered_tables_by_id(self):
+        dataframe_metadata = self._create_metadata('traffic001_6')
+        unregistered_data = dataframe_metadata.serialize()
+        CatalogManager().register_table(dataframe_metadata)
+        registered_data = dataframe_metadata.serialize()
+        self.assertLess(len(registered_data), len(unregistered_data))
+
+        deserialized_metadata = DataFrameMetadata.deserialize(registered_data)
+        self.assertIs(deserialized_metadata, dataframe_metadata)
+
+        CatalogManager().load()
+        deserialized_metadata = DataFrameMetadata.deserialize(registered_data)
+        self.assertEqual(deserialized_metadata.schema, dataframe_metadata.schema)
+
+    def test_should_deserialize_tables_after_clearing_store(self):
+        dataframe_metadata = self._create_metadata('traffic001_6')
+        CatalogManager().register_table(dataframe_metadata)
+        registered_data = dataframe_metadata.serialize()
+
+        clear_petastorm_storage_folder()
+        CatalogManager().load()
+        deserialized_metadata = DataFrameMetadata.deserialize(registered_data)
+        self.assertEqual(deserialized_metadata.schema, dataframe_metadata.schema)
+
+    def test_should_raise_for_unknown_table(self):
+        with self.assertRaises(TableNotInCatalogException):
+            CatalogManager().get_table('data/does_not_exist.mp4')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from src.catalog.column_codec import ColumnCodec
+from src.catalog.column_type import ColumnType
+from src.catalog.models.df_column import DataFrameColumn
+from src.catalog.models.df_metadata import DataFrameMetadata
+
+class DataFrameMetadataTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def test_should_serialize_deserialize_frame_codec(self):
+        dataframe_metadata = DataFrameMetadata('traffic001_6', 'data/traffic001_6.mp4')
+        dataframe_metadata.schema = [
+            DataFrameColumn('id', ColumnType.INTEGER),
+            DataFrameColumn('data', ColumnType.NDARRAY, array_dimensions=[540, 960, 3], codec=ColumnCodec.ZSTD),
+            DataFrameColumn('lsn', ColumnType.INTEGER)
+        ]
+
+        deserialized_metadata = DataFrameMetadata.deserialize(dataframe_metadata.serialize())
+
+        self.assertEqual(deserialized_metadata.frame_codec, ColumnCodec.ZSTD)
+        self.assertEqual(dataframe_metadata, deserialized_metadata)
+
+    def test_should_serialize_deserialize_group_size(self):
+        dataframe_metadata = DataFrameMetadata('traffic001_6', 'data/traffic001_6.mp4', group_size=20)
+        dataframe_metadata.schema = [
+            DataFrameColumn('id', ColumnType.INTEGER),
+            DataFrameColumn('data', ColumnType.NDARRAY, array_dimensions=[540, 960, 3]),
+            DataFrameColumn('lsn', ColumnType.INTEGER)
+        ]
+
+        deserialized_metadata = DataFrameMetadata.deserialize(dataframe_metadata.serialize())
+
+        self.assertEqual(deserialized_metadata.group_size, 20)
+        self.assertEqual(dataframe_metadata, deserialized_metadata)
+
+if __name__ == '__main__':
+    unittest.main()
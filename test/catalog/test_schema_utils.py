@@ -0,0 +1,38 @@
+import unittest
+import numpy as np
+
+from petastorm.codecs import CompressedImageCodec, NdarrayCodec
+from src.catalog.column_codec import ColumnCodec
+from src.catalog.column_type import ColumnType
+from src.catalog.models.df_column import DataFrameColumn
+from src.catalog.schema_utils import SchemaUtils
+from src.catalog.zstd_ndarray_codec import ZstdNdarrayCodec
+
+class SchemaUtilsTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def test_should_map_column_codec_to_petastorm_codec(self):
+        self.assertIsInstance(SchemaUtils.get_petastorm_codec(ColumnCodec.RAW), NdarrayCodec)
+        self.assertIsInstance(SchemaUtils.get_petastorm_codec(ColumnCodec.PNG), CompressedImageCodec)
+        self.assertEqual(SchemaUtils.get_petastorm_codec(ColumnCodec.PNG).image_codec, 'png')
+        self.assertIsInstance(SchemaUtils.get_petastorm_codec(ColumnCodec.JPEG), CompressedImageCodec)
+        self.assertEqual(SchemaUtils.get_petastorm_codec(ColumnCodec.JPEG).image_codec, 'jpeg')
+        self.assertIsInstance(SchemaUtils.get_petastorm_codec(ColumnCodec.ZSTD), ZstdNdarrayCodec)
+
+    def test_should_round_trip_lossless_codecs(self):
+        frame = np.random.randint(0, 255, (36, 64, 3), dtype=np.uint8)
+        for codec in [ColumnCodec.RAW, ColumnCodec.PNG, ColumnCodec.ZSTD]:
+            field = SchemaUtils.get_petastorm_column(
+                DataFrameColumn('data', ColumnType.NDARRAY, array_dimensions=[36, 64, 3], codec=codec))
+            encoded = field.codec.encode(field, frame)
+            self.assertTrue(np.array_equal(field.codec.decode(field, encoded), frame), codec.name)
+
+    def test_zstd_codec_should_compress_frames(self):
+        frame = np.zeros((36, 64, 3), dtype=np.uint8)
+        field = SchemaUtils.get_petastorm_column(
+            DataFrameColumn('data', ColumnType.NDARRAY, array_dimensions=[36, 64, 3], codec=ColumnCodec.ZSTD))
+        self.assertLess(len(field.codec.encode(field, frame)), frame.nbytes)
+
+if __name__ == '__main__':
+    unittest.main()
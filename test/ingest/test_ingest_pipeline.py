@@ -0,0 +1,48 @@
+import unittest
+
+from test.utils.util_functions import ignore_warnings, \
+                                        read_file_from_fs, \
+                                        read_file_from_petastorm, \
+                                        dataframes_equal, \
+                                        clear_petastorm_storage_folder
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.catalog.models.df_column import DataFrameColumn
+from src.catalog.column_type import ColumnType
+from src.ingest.ingest_pipeline import IngestPipeline
+from src.readers.opencv_reader import OpenCVReader
+from src.storage.partitioned_petastorm_storage_engine import PartitionedPetastormStorageEngine
+from src.utils.logging_manager import LoggingLevel, LoggingManager
+from src.config.constants import INPUT_VIDEO_FOLDER
+
+class IngestPipelineTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.storage_engine = PartitionedPetastormStorageEngine()
+        LoggingManager().setEffectiveLevel(LoggingLevel.DEBUG)
+
+    def tearDown(self):
+        clear_petastorm_storage_folder()
+
+    @ignore_warnings
+    def test_should_write_whole_groups_from_unaligned_batches(self):
+        input_file_name = 'traffic001_6'
+        dataframe_metadata = DataFrameMetadata(input_file_name, f'{INPUT_VIDEO_FOLDER}/{input_file_name}.mp4')
+        # Batches of 20 frames decoded out of order by 2 processes, groups hold 50 frames
+        reader = OpenCVReader(file_url=dataframe_metadata.file_url, batch_size=20, num_workers=2, ordered=False)
+        dataframe_metadata.schema = [
+            DataFrameColumn('id', ColumnType.INTEGER),
+            DataFrameColumn('data', ColumnType.NDARRAY, array_dimensions=[reader.video_height(), reader.video_width(), 3])
+        ]
+        self.storage_engine.create(dataframe_metadata)
+
+        frames_written = IngestPipeline(self.storage_engine, dataframe_metadata, reader, num_writers=3, queue_size=2).run()
+        self.assertEqual(frames_written, 180)
+
+        manifest = self.storage_engine.get_manifest(dataframe_metadata)
+        self.assertEqual(manifest.group_nums(), [0, 1, 2, 3])
+        self.assertEqual([manifest.get_group(group_num).row_count for group_num in manifest.group_nums()], [50, 50, 50, 30])
+        self.assertTrue(dataframes_equal(read_file_from_petastorm(self.storage_engine, dataframe_metadata),
+                                         read_file_from_fs(input_file_name)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.Logging.redo_planner import RedoPlanner, RedoStep
+from src.transaction.object_update_arguments import ObjectUpdateArguments
+from src.transaction.opencv_update_processor import OpenCVUpdateProcessor
+
+class RedoPlannerTest(unittest.TestCase):
+    def setUp(self):
+        self.table = DataFrameMetadata('traffic001', 'traffic001', group_size=100)
+        self.planner = RedoPlanner(OpenCVUpdateProcessor())
+
+    def _update(self, lsn, prev_lsn, update_arguments, txn_id=1, undo_next_lsn=None):
+        return RedoStep(lsn, txn_id, prev_lsn, self.table,
+                        update_arguments=update_arguments,
+                        undo_next_lsn=undo_next_lsn)
+
+    def test_should_cancel_involutions_on_group(self):
+        steps = [
+            self._update(10, -1, ObjectUpdateArguments('invert_color', 0, 299)),
+            self._update(20, 10, ObjectUpdateArguments('invert_color', 50, 199))
+        ]
+        # Both cover all of group 1
+        self.assertEqual(self.planner.plan(steps, 100, 199), [])
+        # But not the same frames of group 0
+        self.assertEqual(len(self.planner.plan(steps, 0, 99)), 2)
+        self.assertEqual(self.planner.applications_saved, 2)
+
+    def test_should_cancel_update_and_its_clr(self):
+        steps = [
+            self._update(10, -1, ObjectUpdateArguments('grayscale', 0, 99)),
+            self._update(20, 10, ObjectUpdateArguments('contrast_brightness', 0, 99, contrast=2, brightness=0)),
+            self._update(30, 20, ObjectUpdateArguments('contrast_brightness', 0, 99, contrast=-1, brightness=255),
+                         undo_next_lsn=10)
+        ]
+        planned = self.planner.plan(steps, 0, 99)
+        self.assertEqual([step.lsn for step in planned], [10])
+
+    def test_should_merge_runs(self):
+        steps = [
+            self._update(10, -1, ObjectUpdateArguments('contrast_brightness', 0, 99, contrast=2, brightness=5)),
+            self._update(20, 10, ObjectUpdateArguments('contrast_brightness', 0, 99, contrast=3, brightness=1)),
+            RedoStep(30, 1, 20, self.table, image_path='txn_storage/1/traffic001.v0_old'),
+            self._update(40, 30, ObjectUpdateArguments('grayscale', 0, 99)),
+            self._update(50, 40, ObjectUpdateArguments('grayscale', 0, 99))
+        ]
+        planned = self.planner.plan(steps, 0, 99)
+        self.assertEqual([step.lsn for step in planned], [20, 30, 50])
+        self.assertEqual(planned[0].update_arguments,
+                         ObjectUpdateArguments('contrast_brightness', 0, 99, contrast=6, brightness=16))
+        self.assertEqual(self.planner.applications_saved, 2)
+
+if __name__ == '__main__':
+    unittest.main()
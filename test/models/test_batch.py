@@ -0,0 +1,55 @@
+import os
+import unittest
+import numpy as np
+import pandas as pd
+
+from test.utils.util_functions import ignore_warnings, \
+                                        dataframes_equal
+from src.models.storage.batch import Batch
+from src.utils.logging_manager import LoggingLevel, LoggingManager
+from src.config.constants import TRANSACTION_STORAGE_FOLDER
+
+class BatchTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        LoggingManager().setEffectiveLevel(LoggingLevel.DEBUG)
+
+    def _create_batch(self) -> Batch:
+        frames = np.arange(10 * 4 * 6 * 3, dtype=np.uint8).reshape((10, 4, 6, 3))
+        return Batch.from_frame_array(frames, columns={'id': list(range(50, 60)), 'lsn': [-1] * 10})
+
+    @ignore_warnings
+    def test_should_serialize_to_bytes(self):
+        batch = self._create_batch()
+        deserialized = Batch.from_bytes(batch.to_bytes())
+
+        self.assertEqual(list(deserialized.frames.columns), list(batch.frames.columns))
+        self.assertTrue(dataframes_equal(deserialized.frames, batch.frames))
+        self.assertEqual(deserialized.identifier_column, batch.identifier_column)
+        # Frames are views into one contiguous buffer
+        first_frame = deserialized.frames.data.iloc[0]
+        self.assertTrue(all(frame.base is first_frame.base for frame in deserialized.frames.data))
+
+    @ignore_warnings
+    def test_should_serialize_to_memory_mapped_file(self):
+        os.makedirs(TRANSACTION_STORAGE_FOLDER, exist_ok=True)
+        path = f'{TRANSACTION_STORAGE_FOLDER}/test_batch'
+        batch = self._create_batch()
+        batch.to_file(path)
+
+        deserialized = Batch.from_file(path)
+        self.assertTrue(dataframes_equal(deserialized.frames, batch.frames))
+
+        # Mapped copy-on-write, changes don't reach the file
+        deserialized.frames.data.iloc[0][:] = 0
+        self.assertTrue(dataframes_equal(Batch.from_file(path, memory_map=False).frames, batch.frames))
+        os.remove(path)
+
+    @ignore_warnings
+    def test_should_serialize_columns_without_frames(self):
+        batch = Batch(pd.DataFrame({'id': [1, 2, 3], 'name': ['a', None, 'c']}))
+        deserialized = Batch.from_bytes(batch.to_bytes())
+        self.assertTrue(deserialized.frames.equals(batch.frames))
+
+        empty = Batch.from_bytes(Batch(pd.DataFrame()).to_bytes())
+        self.assertTrue(empty.empty())
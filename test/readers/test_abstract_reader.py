@@ -0,0 +1,35 @@
+import unittest
+import numpy as np
+
+from src.readers.abstract_reader import AbstractReader
+
+class FrameListReader(AbstractReader):
+    def __init__(self, frames, *args, **kwargs):
+        self.frames = frames
+        super().__init__(*args, **kwargs)
+
+    def _frame_shape(self):
+        return self.frames[0].shape
+
+    def _read(self):
+        for frame_id, frame in enumerate(self.frames):
+            yield {'id': frame_id, 'data': frame}
+
+class AbstractReaderTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def test_should_copy_read_frames_into_preallocated_buffers(self):
+        frames = [np.full((4, 6, 3), frame_id, dtype=np.uint8) for frame_id in range(5)]
+        reader = FrameListReader(frames, 'frames', batch_size=2)
+        batches = list(reader.read())
+
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        for batch in batches:
+            self.assertEqual(batch.frame_buffer.shape, (2, 4, 6, 3))
+            for index, row in batch.frames.iterrows():
+                self.assertIs(row.data.base, batch.frame_buffer)
+                self.assertTrue(np.array_equal(row.data, frames[row.id]))
+
+if __name__ == '__main__':
+    unittest.main()
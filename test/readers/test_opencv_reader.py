@@ -0,0 +1,102 @@
+import unittest
+import numpy as np
+import multiprocessing as mp
+
+from test.utils.util_functions import ignore_warnings, \
+                                        read_file_from_fs
+from src.readers.opencv_reader import OpenCVReader, SegmentDecodeException
+from src.utils.logging_manager import LoggingLevel, LoggingManager
+from src.config.constants import INPUT_VIDEO_FOLDER
+
+class OpenCVReaderTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        LoggingManager().setEffectiveLevel(LoggingLevel.DEBUG)
+
+    @ignore_warnings
+    def test_should_read_into_preallocated_buffers(self):
+        input_file_name = 'traffic001_6'
+        fs_df = read_file_from_fs(input_file_name)
+
+        reader = OpenCVReader(file_url=f'{INPUT_VIDEO_FOLDER}/{input_file_name}.mp4', batch_size=50)
+        batches = reader.read()
+
+        first_batch = next(batches)
+        self.assertEqual(first_batch.frame_buffer.shape, (50, reader.video_height(), reader.video_width(), 3))
+        self.assertTrue(all(frame.base is first_batch.frame_buffer for frame in first_batch.frames.data))
+        for index, row in first_batch.frames.iterrows():
+            self.assertTrue(np.array_equal(row.data, fs_df.loc[fs_df.id == row.id].iloc[0].data))
+
+        # Buffers are only reused once released
+        second_batch = next(batches)
+        self.assertIsNot(second_batch.frame_buffer, first_batch.frame_buffer)
+        first_buffer = first_batch.frame_buffer
+        reader.release_batch(first_batch)
+        third_batch = next(batches)
+        self.assertIs(third_batch.frame_buffer, first_buffer)
+        self.assertEqual(list(third_batch.frames.id), list(range(100, 150)))
+
+        last_batch = next(batches)
+        self.assertEqual(len(last_batch), 30)
+
+    @ignore_warnings
+    def test_should_read_segments_in_order(self):
+        input_file_name = 'traffic001_6'
+        fs_df = read_file_from_fs(input_file_name)
+
+        reader = OpenCVReader(file_url=f'{INPUT_VIDEO_FOLDER}/{input_file_name}.mp4', batch_size=50, num_workers=3)
+        batches = list(reader.read())
+
+        self.assertEqual([batch.get_group_num() for batch in batches], [0, 1, 2, 3])
+        frame_ids = [frame_id for batch in batches for frame_id in batch.frames.id]
+        self.assertEqual(frame_ids, list(range(180)))
+        for batch in batches:
+            for index, row in batch.frames.iterrows():
+                self.assertTrue(np.array_equal(row.data, fs_df.loc[fs_df.id == row.id].iloc[0].data))
+
+    @ignore_warnings
+    def test_should_decode_same_frames_as_serial_read(self):
+        input_file_name = 'traffic001_6'
+        file_url = f'{INPUT_VIDEO_FOLDER}/{input_file_name}.mp4'
+
+        serial_batches = list(OpenCVReader(file_url=file_url, batch_size=10).read())
+        parallel_batches = list(OpenCVReader(file_url=file_url, batch_size=10, num_workers=4).read())
+
+        serial_frames = [(row.id, row.data) for batch in serial_batches for index, row in batch.frames.iterrows()]
+        parallel_frames = [(row.id, row.data) for batch in parallel_batches for index, row in batch.frames.iterrows()]
+        self.assertEqual(len(parallel_frames), len(serial_frames))
+        for (serial_id, serial_data), (parallel_id, parallel_data) in zip(serial_frames, parallel_frames):
+            self.assertEqual(parallel_id, serial_id)
+            self.assertTrue(np.array_equal(parallel_data, serial_data))
+
+    @ignore_warnings
+    def test_should_raise_when_worker_dies(self):
+        input_file_name = 'traffic001_6'
+
+        other_processes = mp.active_children()
+        reader = OpenCVReader(file_url=f'{INPUT_VIDEO_FOLDER}/{input_file_name}.mp4', batch_size=10, num_workers=2)
+        batches = reader.read()
+        next(batches)
+        for worker in mp.active_children():
+            if worker not in other_processes:
+                worker.kill()
+        with self.assertRaises(SegmentDecodeException):
+            for batch in batches:
+                pass
+
+    @ignore_warnings
+    def test_should_read_segments_out_of_order(self):
+        input_file_name = 'traffic001_6'
+
+        reader = OpenCVReader(file_url=f'{INPUT_VIDEO_FOLDER}/{input_file_name}.mp4', batch_size=50,
+                              num_workers=2, ordered=False, include_lsn=True)
+        batches = list(reader.read())
+
+        self.assertEqual(sorted(batch.get_group_num() for batch in batches), [0, 1, 2, 3])
+        for batch in batches:
+            self.assertEqual(len(set(frame_id // 50 for frame_id in batch.frames.id)), 1)
+        self.assertEqual(sorted(frame_id for batch in batches for frame_id in batch.frames.id), list(range(180)))
+        self.assertTrue(all(lsn == -1 for batch in batches for lsn in batch.frames.lsn))
+
+if __name__ == '__main__':
+    unittest.main()
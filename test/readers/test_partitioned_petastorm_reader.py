@@ -3,6 +3,7 @@ import os
 import cv2
 import shutil
 import glob
+from unittest.mock import patch
 
 from src.transaction.object_update_arguments import ObjectUpdateArguments
 from test.utils.util_functions import ignore_warnings, \
@@ -14,6 +15,8 @@ from test.utils.util_functions import ignore_warnings, \
                                         dataframes_equal, \
                                         clear_petastorm_storage_folder
 from src.storage.partitioned_petastorm_storage_engine import PartitionedPetastormStorageEngine
+from src.readers.columnar_parquet_reader import ColumnarParquetReader
+from src.readers.partitioned_petastorm_reader import PartitionedPetastormReader
 from src.utils.logging_manager import LoggingLevel, LoggingManager
 from src.config.constants import PETASTORM_STORAGE_FOLDER, \
                                  INPUT_VIDEO_FOLDER
@@ -47,5 +50,89 @@ class PartitionedPetastormReaderTest(unittest.TestCase):
         df = read_file_from_petastorm(self.storage_engine, dataframe_metadata, group_num=2)
         self.assertEqual(df.shape[0], 50)
 
+    @ignore_warnings
+    def test_should_scan_groups_in_order(self):
+        input_file_name = 'traffic001_6'
+        dataframe_metadata = write_file(self.storage_engine, input_file_name)
+
+        batches = list(self.storage_engine.read(dataframe_metadata))
+        self.assertEqual([batch.get_group_num() for batch in batches], [0, 1, 2, 3])
+        self.assertEqual([len(batch.frames) for batch in batches], [50, 50, 50, 30])
+
+    @ignore_warnings
+    def test_should_read_group_into_stacked_frames(self):
+        input_file_name = 'traffic001_6'
+        dataframe_metadata = write_file(self.storage_engine, input_file_name)
+        fs_df = read_file_from_fs(input_file_name)
+
+        batch = list(self.storage_engine.read(dataframe_metadata, group_num=1))[0]
+        frames = list(batch.frames.data)
+        self.assertIsNotNone(frames[0].base)
+        self.assertTrue(all(frame.base is frames[0].base for frame in frames))
+        self.assertTrue(dataframes_equal(batch.frames, fs_df[(fs_df.id >= 50) & (fs_df.id < 100)]))
+
+    @ignore_warnings
+    def test_should_only_read_projected_columns(self):
+        input_file_name = 'traffic001_6'
+        dataframe_metadata = write_file(self.storage_engine, input_file_name, include_lsn=True)
+
+        batch = list(self.storage_engine.read(dataframe_metadata, columns=['id', 'lsn'], group_num=1))[0]
+        self.assertEqual(list(batch.frames.columns), ['id', 'lsn'])
+        self.assertEqual(batch.frames.shape[0], 50)
+        self.assertEqual(batch.get_group_num(), 1)
+
+    @ignore_warnings
+    def test_should_only_read_frame_range(self):
+        input_file_name = 'traffic001_6'
+        dataframe_metadata = write_file(self.storage_engine, input_file_name)
+        fs_df = read_file_from_fs(input_file_name)
+
+        batches = list(self.storage_engine.read(dataframe_metadata, frame_range=(45, 130)))
+        df = batches[0].frames
+        for batch in batches[1:]:
+            df = df.append(batch.frames, ignore_index=True)
+        df = df.sort_values('id', ignore_index=True)
+        self.assertEqual(list(df.id), list(range(45, 131)))
+        self.assertTrue(dataframes_equal(df, fs_df[(fs_df.id >= 45) & (fs_df.id <= 130)].reset_index(drop=True)))
+
+        batch = list(self.storage_engine.read(dataframe_metadata, frame_range=(120, 130), group_num=2))[0]
+        self.assertEqual(list(batch.frames.id), list(range(120, 131)))
+
+    @ignore_warnings
+    def test_should_skip_row_groups_outside_frame_range(self):
+        input_file_name = 'traffic001_6'
+        dataframe_metadata = write_file(self.storage_engine, input_file_name)
+
+        decisions = []
+        row_group_in_range = ColumnarParquetReader._row_group_in_range
+        def record_decision(reader, row_group_metadata):
+            decision = row_group_in_range(reader, row_group_metadata)
+            decisions.append(decision)
+            return decision
+
+        with patch.object(ColumnarParquetReader, '_row_group_in_range', autospec=True, side_effect=record_decision):
+            batch = list(self.storage_engine.read(dataframe_metadata, frame_range=(120, 130), group_num=2))[0]
+        self.assertEqual(list(batch.frames.id), list(range(120, 131)))
+        # Group 2 holds frames 100-149 in row groups of up to 10 frames, only
+        # the two overlapping 120-130 are read
+        self.assertEqual(decisions.count(True), 2)
+        self.assertGreaterEqual(decisions.count(False), 3)
+
+    @ignore_warnings
+    def test_should_only_read_frame_range_when_sharded(self):
+        input_file_name = 'traffic001_6'
+        dataframe_metadata = write_file(self.storage_engine, input_file_name)
+
+        ids = []
+        for cur_shard in range(2):
+            petastorm_reader = PartitionedPetastormReader(self.storage_engine._spark_url(dataframe_metadata),
+                                                          cur_shard=cur_shard,
+                                                          shard_count=2,
+                                                          group_nums=[0, 1, 2, 3],
+                                                          frame_range=(45, 130))
+            for batch in petastorm_reader.read():
+                ids += list(batch.frames.id)
+        self.assertEqual(sorted(ids), list(range(45, 131)))
+
 if __name__ == '__main__':
     unittest.main()     
\ No newline at end of file
@@ -0,0 +1,24 @@
+import unittest
+
+from src.storage.group_size import raw_frame_bytes, estimate_group_size
+
+class GroupSizeTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def test_should_fit_groups_to_target_size(self):
+        # 1080p frames are ~5.9MB raw
+        self.assertEqual(estimate_group_size(raw_frame_bytes(1080, 1920), 128), 21)
+        # 240p frames are ~225KB raw
+        self.assertEqual(estimate_group_size(raw_frame_bytes(240, 320), 128), 582)
+
+    def test_should_use_at_least_one_frame_per_group(self):
+        # 4K frames are ~24MB raw
+        self.assertEqual(estimate_group_size(raw_frame_bytes(2160, 3840), 16), 1)
+
+    def test_should_reject_empty_frames(self):
+        with self.assertRaises(ValueError):
+            estimate_group_size(0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -35,5 +35,31 @@ class PartitionedPetastormStorageEngineTest(unittest.TestCase):
         self.assertEqual(len(glob.glob(f'{PETASTORM_STORAGE_FOLDER}/{INPUT_VIDEO_FOLDER}/{input_file_name}.mp4/group*')),
                          4)
 
+    @ignore_warnings
+    def test_should_record_groups_in_manifest(self):
+        input_file_name = 'traffic001_6'
+        dataframe_metadata = write_file(self.storage_engine, input_file_name, include_lsn=True)
+        manifest = self.storage_engine.get_manifest(dataframe_metadata)
+        self.assertEqual(manifest.group_nums(), [0, 1, 2, 3])
+        self.assertEqual(manifest.get_group(3).start_frame, 150)
+        self.assertEqual(manifest.get_group(3).end_frame, 179)
+        self.assertEqual(manifest.get_group(3).row_count, 30)
+        self.assertEqual(self.storage_engine.groups_in_range(dataframe_metadata, 40, 120), [0, 1, 2])
+        self.assertEqual(self.storage_engine.groups_in_range(dataframe_metadata, 170, 500), [3])
+        self.assertEqual(self.storage_engine.get_group_max_lsn(dataframe_metadata, 0), -1)
+
+    @ignore_warnings
+    def test_should_use_table_group_size(self):
+        input_file_name = 'traffic001_6'
+        dataframe_metadata = write_file(self.storage_engine, input_file_name, group_size=40)
+        self.assertEqual(len(glob.glob(f'{PETASTORM_STORAGE_FOLDER}/{INPUT_VIDEO_FOLDER}/{input_file_name}.mp4/group*')),
+                         5)
+        self.assertEqual(self.storage_engine.get_manifest(dataframe_metadata).group_size, 40)
+        self.assertEqual(self.storage_engine.groups_in_range(dataframe_metadata, 75, 85), [1, 2])
+
+        batch = list(self.storage_engine.read(dataframe_metadata, group_num=4))[0]
+        self.assertEqual(list(batch.frames.id), list(range(160, 180)))
+        self.assertEqual(batch.get_group_num(dataframe_metadata.group_size), 4)
+
 if __name__ == '__main__':
     unittest.main()     
\ No newline at end of file
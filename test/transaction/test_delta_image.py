@@ -0,0 +1,68 @@
+import os
+import unittest
+import numpy as np
+import pandas as pd
+
+from test.utils.util_functions import ignore_warnings, \
+                                        dataframes_equal
+from src.models.storage.batch import Batch
+from src.transaction.delta_image import write_delta_image, read_image
+from src.utils.logging_manager import LoggingLevel, LoggingManager
+from src.config.constants import TRANSACTION_STORAGE_FOLDER
+
+class DeltaImageTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        LoggingManager().setEffectiveLevel(LoggingLevel.DEBUG)
+
+    def setUp(self):
+        os.makedirs(TRANSACTION_STORAGE_FOLDER, exist_ok=True)
+        self.before_path = f'{TRANSACTION_STORAGE_FOLDER}/test_image_old'
+        self.after_path = f'{TRANSACTION_STORAGE_FOLDER}/test_image_new'
+
+    def tearDown(self):
+        for path in [self.before_path, self.after_path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _create_frames(self) -> pd.DataFrame:
+        frames = np.random.RandomState(0).randint(0, 256, size=(10, 12, 16, 3), dtype=np.uint8)
+        return Batch.from_frame_array(frames, columns={'id': list(range(50, 60)), 'lsn': [-1] * 10}).frames
+
+    @ignore_warnings
+    def test_should_read_compressed_image(self):
+        frames = self._create_frames()
+        write_delta_image(self.after_path, frames)
+
+        actual_frames = read_image(self.after_path)
+        self.assertEqual(list(actual_frames.columns), list(frames.columns))
+        self.assertTrue(dataframes_equal(actual_frames, frames))
+        # Frames can be updated in place
+        actual_frames.data.iloc[0][:] = 0
+
+    @ignore_warnings
+    def test_should_read_image_stored_as_xor(self):
+        before_frames = self._create_frames()
+        after_frames = before_frames.copy(deep=False)
+        after_data = np.stack(before_frames.data.to_numpy())
+        after_data[:, 4:8, 4:8] = 255
+        after_frames['data'] = list(after_data)
+        write_delta_image(self.after_path, after_frames)
+
+        # Only some frames of the after image
+        before_frames = before_frames.iloc[3:7].reset_index(drop=True)
+        write_delta_image(self.before_path, before_frames, self.after_path)
+        self.assertLess(os.path.getsize(self.before_path), os.path.getsize(self.after_path))
+        self.assertTrue(dataframes_equal(read_image(self.before_path), before_frames))
+
+    @ignore_warnings
+    def test_should_read_empty_and_uncompressed_images(self):
+        frames = self._create_frames()
+        write_delta_image(self.before_path, frames.iloc[0:0])
+        self.assertEqual(len(read_image(self.before_path)), 0)
+
+        Batch(frames).to_file(self.after_path)
+        self.assertTrue(dataframes_equal(read_image(self.after_path), frames))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import shutil
+import unittest
+
+from src.transaction.image_store import ImageStore, \
+                                        format_image_entry, \
+                                        format_image_locator, \
+                                        is_image_locator, \
+                                        parse_image_locator, \
+                                        read_image_entry
+from src.config.constants import TRANSACTION_STORAGE_FOLDER
+
+class ImageStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.store_path = f'{TRANSACTION_STORAGE_FOLDER}/test_image_store/images'
+
+    def tearDown(self):
+        shutil.rmtree(os.path.dirname(self.store_path), ignore_errors=True)
+
+    def test_should_read_appended_images(self):
+        image_store = ImageStore(self.store_path)
+        locations = {}
+        for group_num, data in [(3, b'first'), (0, b''), (1, b'second image')]:
+            locations[group_num] = image_store.append(data)
+        image_store.flush()
+
+        locator = format_image_locator(self.store_path, locations)
+        self.assertTrue(is_image_locator(locator))
+        self.assertFalse(is_image_locator(f'{TRANSACTION_STORAGE_FOLDER}/1/traffic001.v0'))
+        self.assertFalse(is_image_locator(f'{TRANSACTION_STORAGE_FOLDER}/1/user@host/traffic001.v0'))
+        store_path, parsed_locations = parse_image_locator(locator)
+        self.assertEqual(store_path, self.store_path)
+        self.assertEqual(parsed_locations, {3: (0, 5), 0: (5, 0), 1: (5, 12)})
+
+        self.assertEqual(read_image_entry(format_image_entry(store_path, *parsed_locations[1])), b'second image')
+        self.assertEqual(read_image_entry(format_image_entry(store_path, *parsed_locations[0])), b'')
+
+        # Reopening appends after the existing images
+        image_store.close()
+        image_store = ImageStore(self.store_path)
+        self.assertEqual(image_store.append(b'third'), (17, 5))
+        image_store.close()
+
+if __name__ == '__main__':
+    unittest.main()
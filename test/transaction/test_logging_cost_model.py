@@ -0,0 +1,75 @@
+import unittest
+
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.catalog.models.df_column import DataFrameColumn
+from src.catalog.column_type import ColumnType
+from src.transaction.object_update_arguments import ObjectUpdateArguments
+from src.transaction.opencv_update_processor import OpenCVUpdateProcessor
+from src.transaction.logging_cost_model import LoggingCostModel, LoggingProtocol
+
+class LoggingCostModelTest(unittest.TestCase):
+    def _create_table(self) -> DataFrameMetadata:
+        dataframe_metadata = DataFrameMetadata('test', 'test.mp4')
+        dataframe_metadata.schema = [
+            DataFrameColumn('id', ColumnType.INTEGER),
+            DataFrameColumn('data', ColumnType.NDARRAY, array_dimensions=[270, 480, 3]),
+            DataFrameColumn('lsn', ColumnType.INTEGER)
+        ]
+        return dataframe_metadata
+
+    def _create_cost_model(self, recovery_time_objective=None) -> LoggingCostModel:
+        processor = OpenCVUpdateProcessor()
+        processor.set_operation_cost('invert_color', 1e-10)
+        processor.set_operation_cost('gaussian_blur', 1e-7)
+        cost_model = LoggingCostModel(processor, recovery_time_objective)
+        cost_model.set_storage_costs(1e-9, 1e-9)
+        return cost_model
+
+    def test_should_estimate_log_bytes(self):
+        cost_model = self._create_cost_model()
+        estimates = cost_model.estimate(self._create_table(), ObjectUpdateArguments('invert_color', 0, 99), 100)
+        estimates = {estimate.protocol: estimate for estimate in estimates}
+        update_bytes = 100 * 270 * 480 * 3
+
+        self.assertLess(estimates[LoggingProtocol.LOGICAL].log_bytes, 1024)
+        self.assertGreater(estimates[LoggingProtocol.HYBRID].log_bytes, update_bytes)
+        self.assertGreater(estimates[LoggingProtocol.PPHYSICAL].log_bytes, 2 * update_bytes)
+
+    def test_should_apply_pphysical_updates_once(self):
+        cost_model = self._create_cost_model()
+        update_arguments = ObjectUpdateArguments('gaussian_blur', 0, 99, ksize=(13, 13), sigmaX=0)
+        estimates = cost_model.estimate(self._create_table(), update_arguments, 100)
+        estimates = {estimate.protocol: estimate for estimate in estimates}
+        update_bytes = 100 * 270 * 480 * 3
+
+        # Both apply the update once, pphysical writes the after images too
+        self.assertAlmostEqual(estimates[LoggingProtocol.PPHYSICAL].update_time - estimates[LoggingProtocol.HYBRID].update_time,
+                               update_bytes * 1e-9)
+
+    def test_should_choose_cheapest_protocol(self):
+        cost_model = self._create_cost_model()
+        table = self._create_table()
+
+        decision = cost_model.choose(table, ObjectUpdateArguments('invert_color', 0, 99), 100)
+        self.assertEqual(decision.protocol, LoggingProtocol.LOGICAL)
+
+        decision = cost_model.choose(table, ObjectUpdateArguments('gaussian_blur', 0, 99, ksize=(13, 13), sigmaX=0), 100)
+        self.assertEqual(decision.protocol, LoggingProtocol.HYBRID)
+        self.assertNotIn(LoggingProtocol.LOGICAL, [estimate.protocol for estimate in decision.estimates])
+
+    def test_should_meet_recovery_time_objective(self):
+        table = self._create_table()
+        update_arguments = ObjectUpdateArguments('gaussian_blur', 0, 99, ksize=(13, 13), sigmaX=0)
+        update_bytes = 100 * 270 * 480 * 3
+
+        # Hybrid redo applies the blur, only pphysical recovers in time
+        cost_model = self._create_cost_model(recovery_time_objective=3 * update_bytes * 1e-9)
+        decision = cost_model.choose(table, update_arguments, 100)
+        self.assertEqual(decision.protocol, LoggingProtocol.PPHYSICAL)
+        self.assertIn('* PPHYSICAL', str(decision))
+
+        # Nothing recovers in time, the fastest recovery is picked
+        cost_model = self._create_cost_model(recovery_time_objective=0)
+        decision = cost_model.choose(table, update_arguments, 100)
+        self.assertEqual(decision.protocol, LoggingProtocol.PPHYSICAL)
+        self.assertIn('no protocol recovers', decision.reason)
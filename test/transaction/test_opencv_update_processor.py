@@ -0,0 +1,83 @@
+import unittest
+import numpy as np
+
+from src.transaction.object_update_arguments import ObjectUpdateArguments
+from src.transaction.opencv_update_processor import OpenCVUpdateProcessor
+
+UPDATES = [
+    ObjectUpdateArguments('grayscale', 0, 9),
+    ObjectUpdateArguments('invert_color', 0, 9),
+    ObjectUpdateArguments('contrast_brightness', 0, 9, contrast=2, brightness=10),
+    ObjectUpdateArguments('gaussian_blur', 0, 9, ksize=(5, 5), sigmaX=0),
+    ObjectUpdateArguments('resize', 0, 9, dsize=(8, 4)),
+    ObjectUpdateArguments('test_filter', 0, 9)
+]
+
+class OpenCVUpdateProcessorTest(unittest.TestCase):
+    def _create_frames(self) -> np.ndarray:
+        return np.random.RandomState(0).randint(0, 256, size=(10, 12, 16, 3), dtype=np.uint8)
+
+    def test_apply_batch_should_match_apply(self):
+        processor = OpenCVUpdateProcessor()
+        for update_arguments in UPDATES:
+            frames = self._create_frames()
+            expected = np.stack([processor.apply(frame, update_arguments) for frame in frames])
+
+            result = processor.apply_batch(frames, update_arguments)
+            self.assertTrue(np.array_equal(result, expected), update_arguments)
+            self.assertTrue(np.array_equal(frames, self._create_frames()), update_arguments)
+
+            result = processor.apply_batch(list(frames), update_arguments)
+            self.assertTrue(np.array_equal(result, expected), update_arguments)
+
+    def test_apply_batch_should_update_inplace(self):
+        processor = OpenCVUpdateProcessor()
+        frames = self._create_frames()
+        expected = processor.apply_batch(frames, UPDATES[1])
+
+        result = processor.apply_batch(frames, UPDATES[1], inplace=True)
+        self.assertIs(result, frames)
+        self.assertTrue(np.array_equal(frames, expected))
+
+        # Operations changing the frame shape return a new array
+        result = processor.apply_batch(frames, UPDATES[4], inplace=True)
+        self.assertEqual(result.shape, (10, 4, 8, 3))
+        self.assertTrue(np.array_equal(frames, expected))
+
+    def test_simplify_should_match_applying_both(self):
+        processor = OpenCVUpdateProcessor()
+        pairs = [
+            (ObjectUpdateArguments('invert_color', 0, 9), ObjectUpdateArguments('invert_color', 0, 9)),
+            (ObjectUpdateArguments('grayscale', 0, 9), ObjectUpdateArguments('grayscale', 0, 9)),
+            (ObjectUpdateArguments('test_filter', 0, 9), ObjectUpdateArguments('test_filter', 0, 9)),
+            (ObjectUpdateArguments('contrast_brightness', 0, 9, contrast=2, brightness=10),
+             ObjectUpdateArguments('contrast_brightness', 0, 9, contrast=3, brightness=0)),
+            (ObjectUpdateArguments('contrast_brightness', 0, 9, contrast=1, brightness=-40),
+             ObjectUpdateArguments('contrast_brightness', 0, 9, contrast=1, brightness=-100))
+        ]
+        for first, second in pairs:
+            frames = self._create_frames()
+            expected = processor.apply_batch(processor.apply_batch(frames, first), second)
+
+            simplified = processor.simplify(first, second)
+            self.assertIsNotNone(simplified, (first, second))
+            self.assertLess(len(simplified), 2)
+            result = frames
+            for update_arguments in simplified:
+                result = processor.apply_batch(result, update_arguments)
+            self.assertTrue(np.array_equal(result, expected), (first, second))
+
+    def test_simplify_should_keep_updates_without_rule(self):
+        processor = OpenCVUpdateProcessor()
+        pairs = [
+            (ObjectUpdateArguments('invert_color', 0, 9), ObjectUpdateArguments('invert_color', 0, 4)),
+            (ObjectUpdateArguments('grayscale', 0, 9), ObjectUpdateArguments('invert_color', 0, 9)),
+            (UPDATES[3], UPDATES[3]),
+            # Saturating at 255 and then darkening isn't a single update
+            (ObjectUpdateArguments('contrast_brightness', 0, 9, contrast=2, brightness=0),
+             ObjectUpdateArguments('contrast_brightness', 0, 9, contrast=1, brightness=-50)),
+            (ObjectUpdateArguments('contrast_brightness', 0, 9, contrast=1.5, brightness=0),
+             ObjectUpdateArguments('contrast_brightness', 0, 9, contrast=2, brightness=0))
+        ]
+        for first, second in pairs:
+            self.assertIsNone(processor.simplify(first, second), (first, second))
@@ -2,6 +2,7 @@ import unittest
 import os
 import cv2
 import shutil
+import glob
 import pandas as pd
 
 from pandas.testing import assert_frame_equal
@@ -19,6 +20,7 @@ from test.utils.util_functions import ignore_warnings, \
 from src.storage.partitioned_petastorm_storage_engine import PartitionedPetastormStorageEngine
 from src.Logging.logical_log_manager import LogicalLogManager
 from src.buffer.buffer_manager import BufferManager
+from src.models.storage.batch import Batch
 from src.utils.logging_manager import LoggingLevel, LoggingManager
 from src.config.constants import TRANSACTION_STORAGE_FOLDER
 from src.pressure_point.pressure_point_manager import PressurePointManager
@@ -52,7 +54,7 @@ class OptimizedTransactionManagerTest(unittest.TestCase):
         transaction_directory_path = f'{TRANSACTION_STORAGE_FOLDER}/{txn_id}'
         self.assertTrue(os.path.isdir(transaction_directory_path))
     
-    def do_test_should_update_video_in_buffer_manager(self, update_operation):
+    def do_test_should_update_video_in_buffer_manager(self, update_operation, parallel_update_workers=0):
         dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
 
         video_frames = read_file_from_petastorm(self.storage_engine, dataframe_metadata)
@@ -62,9 +64,11 @@ class OptimizedTransactionManagerTest(unittest.TestCase):
         log_mgr = LogicalLogManager(buffer_mgr)
         txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
                                     log_manager_passed=log_mgr,
-                                    buffer_manager_passed=buffer_mgr)
+                                    buffer_manager_passed=buffer_mgr,
+                                    parallel_update_workers=parallel_update_workers)
         txn_id = txn_mgr.begin_transaction()
         txn_mgr.update_object(txn_id, dataframe_metadata, update_operation)
+        txn_mgr.close()
 
         actual_updated_video_frames = pd.DataFrame()
         for i in range(4):
@@ -84,6 +88,11 @@ class OptimizedTransactionManagerTest(unittest.TestCase):
         update_operation = ObjectUpdateArguments('grayscale', 0, 299)
         self.do_test_should_update_video_in_buffer_manager(update_operation)
 
+    @ignore_warnings
+    def test_should_update_video_in_buffer_manager_parallel(self):
+        update_operation = ObjectUpdateArguments('gaussian_blur', 20, 129, ksize=(13, 13), sigmaX=0)
+        self.do_test_should_update_video_in_buffer_manager(update_operation, parallel_update_workers=2)
+
     @ignore_warnings
     def do_test_should_rollback_transaction_on_abort(self, update_operations):
         dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
@@ -276,5 +285,419 @@ class OptimizedTransactionManagerTest(unittest.TestCase):
         ]
         self.do_test_recovery_update_and_clr_in_log(update_operations)
 
+    @ignore_warnings
+    def test_should_fuse_deferred_updates(self):
+        dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
+        update_operations = [ObjectUpdateArguments('contrast_brightness', 0, 199, contrast=2, brightness=0),
+                            ObjectUpdateArguments('gaussian_blur', 50, 249, ksize=(13, 13), sigmaX=0),
+                            ObjectUpdateArguments('invert_color', 0, 299)
+        ]
+
+        video_frames = read_file_from_petastorm(self.storage_engine, dataframe_metadata)
+        updated_video_frames = video_frames
+        for update_operation in update_operations:
+            updated_video_frames = apply_update_to_dataframe(updated_video_frames, update_operation)
+
+        buffer_mgr = BufferManager(200, self.storage_engine)
+        log_mgr = LogicalLogManager(buffer_mgr)
+        txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                    log_manager_passed=log_mgr,
+                                    buffer_manager_passed=buffer_mgr,
+                                    defer_updates=True)
+        txn_id = txn_mgr.begin_transaction()
+        for update_operation in update_operations:
+            txn_mgr.update_object(txn_id, dataframe_metadata, update_operation)
+
+        # Nothing applied yet, so no before images were saved
+        self.assertTrue(txn_mgr.deferred_updates.has_pending_updates(dataframe_metadata))
+        self.assertEqual(glob.glob(f'{txn_mgr.get_transaction_directory(txn_id)}/{dataframe_metadata.file_url}.v0_*'), [])
+
+        # Reading a group applies its pending updates only
+        batch = buffer_mgr.read_slot(dataframe_metadata, 0)
+        self.assertTrue(dataframes_equal(updated_video_frames.loc[updated_video_frames.id < 50], batch.frames))
+        self.assertEqual(len(glob.glob(f'{txn_mgr.get_transaction_directory(txn_id)}/{dataframe_metadata.file_url}.v0_*')), 1)
+
+        txn_mgr.commit_transaction(txn_id)
+        self.assertFalse(txn_mgr.deferred_updates.has_pending_updates())
+
+        actual_updated_video_frames = pd.DataFrame()
+        for i in range(4):
+            batch = buffer_mgr.read_slot(dataframe_metadata, i)
+            actual_updated_video_frames = actual_updated_video_frames.append(batch.frames, ignore_index=True)
+        self.assertTrue(dataframes_equal(updated_video_frames, actual_updated_video_frames))
+
+    @ignore_warnings
+    def test_recovery_should_undo_deferred_updates(self):
+        dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
+        update_operations = [ObjectUpdateArguments('contrast_brightness', 0, 199, contrast=2, brightness=0),
+                            ObjectUpdateArguments('invert_color', 0, 299)
+        ]
+        video_frames = read_file_from_petastorm(self.storage_engine, dataframe_metadata)
+
+        buffer_mgr = BufferManager(200, self.storage_engine)
+        log_mgr = LogicalLogManager(buffer_mgr)
+        txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                    log_manager_passed=log_mgr,
+                                    buffer_manager_passed=buffer_mgr,
+                                    defer_updates=True)
+        txn_id = txn_mgr.begin_transaction()
+        for update_operation in update_operations:
+            txn_mgr.update_object(txn_id, dataframe_metadata, update_operation)
+        # Only group 1 was updated and flushed before the crash
+        buffer_mgr.read_slot(dataframe_metadata, 1)
+        buffer_mgr.flush_all_slots()
+        log_mgr.flush()
+
+        # Simulate restart after a crash
+        buffer_mgr = BufferManager(200, self.storage_engine)
+        log_mgr = LogicalLogManager(buffer_mgr)
+        log_mgr.recover_log()
+
+        actual_video_frames = pd.DataFrame()
+        for i in range(4):
+            batch = buffer_mgr.read_slot(dataframe_metadata, i)
+            actual_video_frames = actual_video_frames.append(batch.frames, ignore_index=True)
+        self.assertTrue(dataframes_equal(video_frames, actual_video_frames))
+
+    @ignore_warnings
+    def test_should_undo_irreversible_updates_from_snapshots(self):
+        dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
+        committed_operation = ObjectUpdateArguments('grayscale', 0, 199)
+        aborted_operations = [ObjectUpdateArguments('grayscale', 100, 299),
+                              ObjectUpdateArguments('invert_color', 0, 149),
+                              ObjectUpdateArguments('grayscale', 0, 99)
+        ]
+        video_frames = read_file_from_petastorm(self.storage_engine, dataframe_metadata)
+        committed_video_frames = apply_update_to_dataframe(video_frames, committed_operation)
+
+        buffer_mgr = BufferManager(200, self.storage_engine)
+        log_mgr = LogicalLogManager(buffer_mgr)
+        txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                    log_manager_passed=log_mgr,
+                                    buffer_manager_passed=buffer_mgr,
+                                    snapshot_undo=True)
+        txn_id = txn_mgr.begin_transaction()
+        txn_mgr.update_object(txn_id, dataframe_metadata, committed_operation)
+        txn_mgr.commit_transaction(txn_id)
+
+        txn_id = txn_mgr.begin_transaction()
+        for update_operation in aborted_operations:
+            txn_mgr.update_object(txn_id, dataframe_metadata, update_operation)
+        # Irreversible updates are logged logically, no images are kept
+        self.assertEqual(glob.glob(f'{TRANSACTION_STORAGE_FOLDER}/{txn_id}/*'), [])
+        txn_mgr.abort_transaction(txn_id)
+
+        actual_video_frames = pd.DataFrame()
+        for i in range(4):
+            batch = buffer_mgr.read_slot(dataframe_metadata, i)
+            actual_video_frames = actual_video_frames.append(batch.frames, ignore_index=True)
+
+        LoggingManager().log(f'Asserting buffer manager is rolled back', LoggingLevel.INFO)
+        self.assertTrue(dataframes_equal(committed_video_frames, actual_video_frames))
+
+    @ignore_warnings
+    def test_recovery_should_redo_group_by_group(self):
+        dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
+        update_operations = [ObjectUpdateArguments('invert_color', 0, 299),
+                            ObjectUpdateArguments('grayscale', 50, 249),
+                            ObjectUpdateArguments('contrast_brightness', 0, 399, contrast=2, brightness=0),
+                            ObjectUpdateArguments('invert_color', 0, 299)
+        ]
+        video_frames = read_file_from_petastorm(self.storage_engine, dataframe_metadata)
+        updated_video_frames = video_frames
+        for update_operation in update_operations:
+            updated_video_frames = apply_update_to_dataframe(updated_video_frames, update_operation)
+
+        # A single slot evicts the group after every record
+        buffer_mgr = BufferManager(1, self.storage_engine)
+        log_mgr = LogicalLogManager(buffer_mgr)
+        txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                    log_manager_passed=log_mgr,
+                                    buffer_manager_passed=buffer_mgr)
+        txn_id = txn_mgr.begin_transaction()
+        for update_operation in update_operations:
+            txn_mgr.update_object(txn_id, dataframe_metadata, update_operation)
+        txn_mgr.commit_transaction(txn_id)
+
+        # Simulate restart after a crash
+        buffer_mgr = BufferManager(1, self.storage_engine)
+        log_mgr = LogicalLogManager(buffer_mgr, batch_redo=True)
+        log_mgr.recover_log()
+
+        actual_video_frames = pd.DataFrame()
+        for i in range(4):
+            batch = buffer_mgr.read_slot(dataframe_metadata, i)
+            actual_video_frames = actual_video_frames.append(batch.frames, ignore_index=True)
+        self.assertTrue(dataframes_equal(updated_video_frames, actual_video_frames))
+
+    @ignore_warnings
+    def test_should_save_one_before_image_per_frame(self):
+        dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
+        update_operations = [ObjectUpdateArguments('grayscale', 0, 149),
+                            ObjectUpdateArguments('invert_color', 100, 199),
+                            ObjectUpdateArguments('grayscale', 0, 199)
+        ]
+        video_frames = read_file_from_petastorm(self.storage_engine, dataframe_metadata)
+
+        buffer_mgr = BufferManager(200, self.storage_engine)
+        log_mgr = LogicalLogManager(buffer_mgr)
+        txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                    log_manager_passed=log_mgr,
+                                    buffer_manager_passed=buffer_mgr,
+                                    force_physical_logging=True)
+        txn_id = txn_mgr.begin_transaction()
+        for update_operation in update_operations:
+            txn_mgr.update_object(txn_id, dataframe_metadata, update_operation)
+
+        image_path = f'{txn_mgr.get_transaction_directory(txn_id)}/{dataframe_metadata.file_url}'
+        self.assertEqual(len(Batch.from_file(f'{image_path}.v1_2').frames), 0)
+        last_image_ids = list(Batch.from_file(f'{image_path}.v1_3').frames.id)
+        self.assertEqual(last_image_ids, list(range(150, 150 + len(last_image_ids))))
+        self.assertGreater(len(last_image_ids), 0)
+        self.assertEqual(len(Batch.from_file(f'{image_path}.v2_0').frames), 0)
+        self.assertEqual(len(Batch.from_file(f'{image_path}.v2_3').frames), 0)
+        txn_mgr.abort_transaction(txn_id)
+
+        actual_video_frames = pd.DataFrame()
+        for i in range(4):
+            batch = buffer_mgr.read_slot(dataframe_metadata, i)
+            actual_video_frames = actual_video_frames.append(batch.frames, ignore_index=True)
+        self.assertTrue(dataframes_equal(video_frames, actual_video_frames))
+
+    @ignore_warnings
+    def test_should_rollback_and_recover_with_compressed_images(self):
+        dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
+        update_operations = [ObjectUpdateArguments('grayscale', 0, 149),
+                            ObjectUpdateArguments('invert_color', 100, 299)
+        ]
+        video_frames = read_file_from_petastorm(self.storage_engine, dataframe_metadata)
+        updated_video_frames = video_frames
+        for update_operation in update_operations:
+            updated_video_frames = apply_update_to_dataframe(updated_video_frames, update_operation)
+
+        for force_pphysical_logging in [False, True]:
+            buffer_mgr = BufferManager(200, self.storage_engine)
+            log_mgr = LogicalLogManager(buffer_mgr)
+            txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                        log_manager_passed=log_mgr,
+                                        buffer_manager_passed=buffer_mgr,
+                                        force_physical_logging=True,
+                                        force_pphysical_logging=force_pphysical_logging,
+                                        compress_images=True)
+            txn_id = txn_mgr.begin_transaction()
+            for update_operation in update_operations:
+                txn_mgr.update_object(txn_id, dataframe_metadata, update_operation)
+            txn_mgr.abort_transaction(txn_id)
+
+            txn_id = txn_mgr.begin_transaction()
+            for update_operation in update_operations:
+                txn_mgr.update_object(txn_id, dataframe_metadata, update_operation)
+            txn_mgr.commit_transaction(txn_id)
+
+            # Simulate restart after a crash
+            buffer_mgr = BufferManager(200, self.storage_engine)
+            log_mgr = LogicalLogManager(buffer_mgr)
+            log_mgr.recover_log()
+
+            actual_video_frames = pd.DataFrame()
+            for i in range(4):
+                batch = buffer_mgr.read_slot(dataframe_metadata, i)
+                actual_video_frames = actual_video_frames.append(batch.frames, ignore_index=True)
+            self.assertTrue(dataframes_equal(updated_video_frames, actual_video_frames))
+
+            clear_petastorm_storage_folder()
+            clear_transaction_storage_folder()
+            dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
+
+    @ignore_warnings
+    def test_should_rollback_and_recover_with_image_store(self):
+        dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
+        update_operations = [ObjectUpdateArguments('grayscale', 0, 149),
+                            ObjectUpdateArguments('invert_color', 100, 299)
+        ]
+        video_frames = read_file_from_petastorm(self.storage_engine, dataframe_metadata)
+        updated_video_frames = video_frames
+        for update_operation in update_operations:
+            updated_video_frames = apply_update_to_dataframe(updated_video_frames, update_operation)
+
+        for force_pphysical_logging in [False, True]:
+            buffer_mgr = BufferManager(200, self.storage_engine)
+            log_mgr = LogicalLogManager(buffer_mgr)
+            txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                        log_manager_passed=log_mgr,
+                                        buffer_manager_passed=buffer_mgr,
+                                        force_physical_logging=True,
+                                        force_pphysical_logging=force_pphysical_logging,
+                                        compress_images=force_pphysical_logging,
+                                        use_image_store=True)
+            txn_id = txn_mgr.begin_transaction()
+            for update_operation in update_operations:
+                txn_mgr.update_object(txn_id, dataframe_metadata, update_operation)
+            # Every image is in a single file
+            image_files = [path for path in glob.glob(f'{txn_mgr.get_transaction_directory(txn_id)}/**', recursive=True)
+                           if os.path.isfile(path)]
+            self.assertEqual(image_files, [f'{txn_mgr.get_transaction_directory(txn_id)}/images'])
+            txn_mgr.abort_transaction(txn_id)
+
+            actual_video_frames = pd.DataFrame()
+            for i in range(4):
+                batch = buffer_mgr.read_slot(dataframe_metadata, i)
+                actual_video_frames = actual_video_frames.append(batch.frames, ignore_index=True)
+            self.assertTrue(dataframes_equal(video_frames, actual_video_frames))
+
+            txn_id = txn_mgr.begin_transaction()
+            for update_operation in update_operations:
+                txn_mgr.update_object(txn_id, dataframe_metadata, update_operation)
+            txn_mgr.commit_transaction(txn_id)
+
+            # Simulate restart after a crash
+            buffer_mgr = BufferManager(200, self.storage_engine)
+            log_mgr = LogicalLogManager(buffer_mgr)
+            log_mgr.recover_log()
+
+            actual_video_frames = pd.DataFrame()
+            for i in range(4):
+                batch = buffer_mgr.read_slot(dataframe_metadata, i)
+                actual_video_frames = actual_video_frames.append(batch.frames, ignore_index=True)
+            self.assertTrue(dataframes_equal(updated_video_frames, actual_video_frames))
+
+            clear_petastorm_storage_folder()
+            clear_transaction_storage_folder()
+            dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
+
+    @ignore_warnings
+    def test_should_rollback_and_recover_with_undo_buffer(self):
+        dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
+        update_operations = [ObjectUpdateArguments('grayscale', 0, 149),
+                            ObjectUpdateArguments('invert_color', 100, 299)
+        ]
+        video_frames = read_file_from_petastorm(self.storage_engine, dataframe_metadata)
+        updated_video_frames = video_frames
+        for update_operation in update_operations:
+            updated_video_frames = apply_update_to_dataframe(updated_video_frames, update_operation)
+
+        buffer_mgr = BufferManager(200, self.storage_engine)
+        log_mgr = LogicalLogManager(buffer_mgr)
+        txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                    log_manager_passed=log_mgr,
+                                    buffer_manager_passed=buffer_mgr,
+                                    force_physical_logging=True,
+                                    buffer_undo_images=True)
+        txn_id = txn_mgr.begin_transaction()
+        for update_operation in update_operations:
+            txn_mgr.update_object(txn_id, dataframe_metadata, update_operation)
+        image_path = f'{txn_mgr.get_transaction_directory(txn_id)}/{dataframe_metadata.file_url}'
+        self.assertGreater(txn_mgr.undo_buffer.num_bytes, 0)
+        self.assertFalse(os.path.exists(f'{image_path}.v0_0'))
+        # Rolling back spills the images
+        txn_mgr.abort_transaction(txn_id)
+        self.assertTrue(os.path.exists(f'{image_path}.v0_0'))
+
+        actual_video_frames = pd.DataFrame()
+        for i in range(4):
+            batch = buffer_mgr.read_slot(dataframe_metadata, i)
+            actual_video_frames = actual_video_frames.append(batch.frames, ignore_index=True)
+        self.assertTrue(dataframes_equal(video_frames, actual_video_frames))
+
+        # Committed images are never written
+        txn_id = txn_mgr.begin_transaction()
+        for update_operation in update_operations:
+            txn_mgr.update_object(txn_id, dataframe_metadata, update_operation)
+        txn_mgr.commit_transaction(txn_id)
+        image_path = f'{txn_mgr.get_transaction_directory(txn_id)}/{dataframe_metadata.file_url}'
+        self.assertEqual(txn_mgr.undo_buffer.num_bytes, 0)
+        self.assertFalse(os.path.exists(f'{image_path}.v0_0'))
+
+        # Simulate restart after a crash
+        buffer_mgr = BufferManager(200, self.storage_engine)
+        log_mgr = LogicalLogManager(buffer_mgr)
+        log_mgr.recover_log()
+
+        actual_video_frames = pd.DataFrame()
+        for i in range(4):
+            batch = buffer_mgr.read_slot(dataframe_metadata, i)
+            actual_video_frames = actual_video_frames.append(batch.frames, ignore_index=True)
+        self.assertTrue(dataframes_equal(updated_video_frames, actual_video_frames))
+        buffer_mgr.flush_all_slots()
+
+        # A single slot flushes groups of the transaction left active by the
+        # crash, spilling the images kept so far. The images of the last
+        # update are lost, it was never flushed.
+        buffer_mgr = BufferManager(1, self.storage_engine)
+        log_mgr = LogicalLogManager(buffer_mgr)
+        txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                    log_manager_passed=log_mgr,
+                                    buffer_manager_passed=buffer_mgr,
+                                    force_physical_logging=True,
+                                    deduplicate_before_images=False,
+                                    buffer_undo_images=True)
+        txn_id = txn_mgr.begin_transaction()
+        for update_operation in update_operations + [ObjectUpdateArguments('grayscale', 150, 199)]:
+            txn_mgr.update_object(txn_id, dataframe_metadata, update_operation)
+        self.assertGreater(txn_mgr.undo_buffer.num_bytes, 0)
+        log_mgr.flush()
+
+        # Simulate restart after a crash
+        buffer_mgr = BufferManager(200, self.storage_engine)
+        log_mgr = LogicalLogManager(buffer_mgr)
+        log_mgr.recover_log()
+
+        actual_video_frames = pd.DataFrame()
+        for i in range(4):
+            batch = buffer_mgr.read_slot(dataframe_metadata, i)
+            actual_video_frames = actual_video_frames.append(batch.frames, ignore_index=True)
+        self.assertTrue(dataframes_equal(updated_video_frames, actual_video_frames))
+
+    @ignore_warnings
+    def test_should_update_in_chunks_of_buffer_pool_size(self):
+        dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
+        update_operation = ObjectUpdateArguments('grayscale', 20, 179)
+
+        video_frames = read_file_from_petastorm(self.storage_engine, dataframe_metadata)
+        updated_video_frames = apply_update_to_dataframe(video_frames, update_operation)
+
+        for force_pphysical_logging in [False, True]:
+            clear_transaction_storage_folder()
+            buffer_mgr = BufferManager(2, self.storage_engine)
+            log_mgr = LogicalLogManager(buffer_mgr)
+            txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                        log_manager_passed=log_mgr,
+                                        buffer_manager_passed=buffer_mgr,
+                                        force_physical_logging=True,
+                                        force_pphysical_logging=force_pphysical_logging)
+            txn_id = txn_mgr.begin_transaction()
+            txn_mgr.update_object(txn_id, dataframe_metadata, update_operation)
+
+            # Groups 0-1 and 2-3 are each logged by their own record
+            self.assertEqual(txn_mgr._txn_table[txn_id].get_file_version(dataframe_metadata.file_url), 2)
+            actual_video_frames = pd.DataFrame()
+            for i in range(4):
+                batch = buffer_mgr.read_slot(dataframe_metadata, i)
+                actual_video_frames = actual_video_frames.append(batch.frames, ignore_index=True)
+            self.assertTrue(dataframes_equal(updated_video_frames, actual_video_frames))
+
+            txn_mgr.abort_transaction(txn_id)
+            actual_video_frames = pd.DataFrame()
+            for i in range(4):
+                batch = buffer_mgr.read_slot(dataframe_metadata, i)
+                actual_video_frames = actual_video_frames.append(batch.frames, ignore_index=True)
+            self.assertTrue(dataframes_equal(video_frames, actual_video_frames))
+
+    @ignore_warnings
+    def test_should_reuse_cost_model_when_explaining(self):
+        dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
+
+        buffer_mgr = BufferManager(200, self.storage_engine)
+        log_mgr = LogicalLogManager(buffer_mgr)
+        txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                    log_manager_passed=log_mgr,
+                                    buffer_manager_passed=buffer_mgr)
+        decision = txn_mgr.explain(dataframe_metadata, ObjectUpdateArguments('invert_color', 0, 99))
+        self.assertEqual(decision.num_frames, 100)
+        cost_model = txn_mgr._explain_cost_model
+
+        txn_mgr.explain(dataframe_metadata, ObjectUpdateArguments('grayscale', 50, 149))
+        self.assertIs(txn_mgr._explain_cost_model, cost_model)
+
 if __name__ == '__main__':
     unittest.main()     
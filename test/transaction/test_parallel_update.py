@@ -0,0 +1,33 @@
+import unittest
+import numpy as np
+
+from src.transaction.object_update_arguments import ObjectUpdateArguments
+from src.transaction.opencv_update_processor import OpenCVUpdateProcessor
+from src.transaction.parallel_update import ParallelUpdateExecutor
+
+class ParallelUpdateExecutorTest(unittest.TestCase):
+    def _create_frames(self, seed) -> np.ndarray:
+        return np.random.RandomState(seed).randint(0, 256, size=(10, 12, 16, 3), dtype=np.uint8)
+
+    def test_should_apply_updates_in_workers(self):
+        processor = OpenCVUpdateProcessor()
+        executor = ParallelUpdateExecutor(2)
+        try:
+            update_operations = [
+                ObjectUpdateArguments('gaussian_blur', ksize=(5, 5), sigmaX=0),
+                ObjectUpdateArguments('invert_color'),
+                # Changes the frame shape
+                ObjectUpdateArguments('resize', dsize=(8, 4))
+            ]
+            pending = []
+            for seed, update_operation in enumerate(update_operations):
+                frames = self._create_frames(seed)
+                pending.append((frames, update_operation, executor.submit(list(frames), update_operation)))
+
+            for seed, (frames, update_operation, pending_update) in enumerate(pending):
+                expected = processor.apply_batch(frames, update_operation)
+                self.assertTrue(np.array_equal(pending_update.result(), expected), update_operation)
+                # Workers update a copy
+                self.assertTrue(np.array_equal(frames, self._create_frames(seed)))
+        finally:
+            executor.shutdown()
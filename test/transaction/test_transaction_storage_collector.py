@@ -0,0 +1,121 @@
+import unittest
+import os
+
+from src.transaction.optimized_transaction_manager import OptimizedTransactionManager
+from src.transaction.transaction_storage_collector import TransactionStorageCollector
+from src.transaction.object_update_arguments import ObjectUpdateArguments
+from test.utils.util_functions import ignore_warnings, \
+                                        write_file, \
+                                        clear_petastorm_storage_folder, \
+                                        clear_transaction_storage_folder
+from src.storage.partitioned_petastorm_storage_engine import PartitionedPetastormStorageEngine
+from src.Logging.logical_log_manager import LogicalLogManager
+from src.buffer.buffer_manager import BufferManager
+
+class TransactionStorageCollectorTest(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.storage_engine = PartitionedPetastormStorageEngine()
+
+    def tearDown(self):
+        clear_petastorm_storage_folder()
+        clear_transaction_storage_folder()
+
+    def setUp(self):
+        clear_petastorm_storage_folder()
+        clear_transaction_storage_folder()
+
+    @ignore_warnings
+    def test_should_collect_transactions_after_flush(self):
+        dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
+
+        buffer_mgr = BufferManager(200, self.storage_engine)
+        log_mgr = LogicalLogManager(buffer_mgr)
+        txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                    log_manager_passed=log_mgr,
+                                    buffer_manager_passed=buffer_mgr,
+                                    force_physical_logging=True)
+        collector = TransactionStorageCollector(log_mgr, buffer_mgr)
+
+        txn_id = txn_mgr.begin_transaction()
+        txn_mgr.update_object(txn_id, dataframe_metadata, ObjectUpdateArguments('grayscale', 0, 99))
+        txn_mgr.commit_transaction(txn_id)
+        txn_directory_path = txn_mgr.get_transaction_directory(txn_id)
+
+        # The changes aren't flushed, recovery still needs the images
+        self.assertEqual(collector.collect(), 0)
+        self.assertTrue(os.path.isdir(txn_directory_path))
+        self.assertIn(txn_id, log_mgr.finished_txns)
+
+        buffer_mgr.flush_all_slots()
+        self.assertGreater(collector.collect(), 0)
+        self.assertFalse(os.path.isdir(txn_directory_path))
+        self.assertNotIn(txn_id, log_mgr.finished_txns)
+        self.assertEqual(collector.collect(), 0)
+
+    @ignore_warnings
+    def test_should_collect_aborted_transactions_after_flush(self):
+        dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
+
+        buffer_mgr = BufferManager(200, self.storage_engine)
+        log_mgr = LogicalLogManager(buffer_mgr)
+        txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                    log_manager_passed=log_mgr,
+                                    buffer_manager_passed=buffer_mgr,
+                                    force_physical_logging=True)
+        collector = TransactionStorageCollector(log_mgr, buffer_mgr)
+
+        txn_id = txn_mgr.begin_transaction()
+        txn_mgr.update_object(txn_id, dataframe_metadata, ObjectUpdateArguments('grayscale', 0, 99))
+        txn_mgr.abort_transaction(txn_id)
+        txn_directory_path = txn_mgr.get_transaction_directory(txn_id)
+
+        # The rollback isn't flushed, recovery still needs the images
+        self.assertIn(txn_id, log_mgr.finished_txns)
+        self.assertEqual(collector.collect(), 0)
+        self.assertTrue(os.path.isdir(txn_directory_path))
+
+        buffer_mgr.flush_all_slots()
+        self.assertGreater(collector.collect(), 0)
+        self.assertFalse(os.path.isdir(txn_directory_path))
+        self.assertNotIn(txn_id, log_mgr.finished_txns)
+
+    @ignore_warnings
+    def test_should_keep_transactions_after_oldest_snapshot(self):
+        dataframe_metadata = write_file(self.storage_engine, 'traffic001_6', include_lsn=True)
+
+        buffer_mgr = BufferManager(200, self.storage_engine)
+        log_mgr = LogicalLogManager(buffer_mgr)
+        # Snapshots are retaken whenever a transaction changes their group
+        log_mgr.snapshot_manager.max_log_distance = 0
+        txn_mgr = OptimizedTransactionManager(storage_engine_passed=self.storage_engine,
+                                    log_manager_passed=log_mgr,
+                                    buffer_manager_passed=buffer_mgr,
+                                    force_physical_logging=True,
+                                    snapshot_undo=True)
+        collector = TransactionStorageCollector(log_mgr, buffer_mgr)
+
+        first_txn_id = txn_mgr.begin_transaction()
+        txn_mgr.update_object(first_txn_id, dataframe_metadata, ObjectUpdateArguments('grayscale', 0, 99))
+        txn_mgr.commit_transaction(first_txn_id)
+        first_txn_directory_path = txn_mgr.get_transaction_directory(first_txn_id)
+
+        # Flushed, but its records may be replayed on the snapshots taken
+        # before it
+        buffer_mgr.flush_all_slots()
+        self.assertLess(log_mgr.snapshot_manager.get_oldest_snapshot_lsn(), log_mgr.finished_txns[first_txn_id])
+        self.assertEqual(collector.collect(), 0)
+        self.assertTrue(os.path.isdir(first_txn_directory_path))
+
+        # Snapshots retaken after the first transaction finished
+        second_txn_id = txn_mgr.begin_transaction()
+        txn_mgr.update_object(second_txn_id, dataframe_metadata, ObjectUpdateArguments('grayscale', 0, 99))
+        txn_mgr.commit_transaction(second_txn_id)
+        buffer_mgr.flush_all_slots()
+        self.assertGreater(collector.collect(), 0)
+        self.assertFalse(os.path.isdir(first_txn_directory_path))
+        self.assertNotIn(first_txn_id, log_mgr.finished_txns)
+        self.assertIn(second_txn_id, log_mgr.finished_txns)
+
+if __name__ == '__main__':
+    unittest.main()
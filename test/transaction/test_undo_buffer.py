@@ -0,0 +1,70 @@
+import os
+import shutil
+import unittest
+import numpy as np
+import pandas as pd
+
+from test.utils.util_functions import ignore_warnings, \
+                                        dataframes_equal
+from src.models.storage.batch import Batch
+from src.transaction.delta_image import read_image
+from src.transaction.undo_buffer import UndoBuffer, \
+                                        format_in_memory_image_path, \
+                                        is_in_memory_image_path, \
+                                        parse_in_memory_image_path
+from src.config.constants import TRANSACTION_STORAGE_FOLDER
+
+class UndoBufferTest(unittest.TestCase):
+    def setUp(self):
+        self.directory_path = f'{TRANSACTION_STORAGE_FOLDER}/test_undo_buffer'
+        os.makedirs(self.directory_path, exist_ok=True)
+        self.base_path = f'{self.directory_path}/traffic001.v0'
+
+    def tearDown(self):
+        shutil.rmtree(self.directory_path, ignore_errors=True)
+
+    def _create_frames(self, start_frame: int) -> pd.DataFrame:
+        frames = np.random.RandomState(start_frame).randint(0, 256, size=(10, 12, 16, 3), dtype=np.uint8)
+        return Batch.from_frame_array(frames, columns={'id': list(range(start_frame, start_frame + 10)), 'lsn': [-1] * 10}).frames
+
+    @ignore_warnings
+    def test_should_spill_oldest_images_over_budget(self):
+        frames = [self._create_frames(0), self._create_frames(50)]
+        frame_bytes = 12 * 16 * 3
+        undo_buffer = UndoBuffer(max_bytes=frame_bytes * 15)
+
+        undo_buffer.put(1, 0, self.base_path, frames[0])
+        self.assertEqual(undo_buffer.num_bytes, frame_bytes * 10)
+        self.assertFalse(os.path.exists(f'{self.base_path}_0'))
+
+        undo_buffer.put(1, 1, self.base_path, frames[1])
+        self.assertEqual(undo_buffer.num_bytes, frame_bytes * 10)
+        self.assertEqual(undo_buffer.spilled_bytes, frame_bytes * 10)
+        self.assertTrue(dataframes_equal(read_image(f'{self.base_path}_0'), frames[0]))
+        self.assertFalse(os.path.exists(f'{self.base_path}_1'))
+
+        undo_buffer.spill_all()
+        self.assertEqual(undo_buffer.num_bytes, 0)
+        self.assertTrue(dataframes_equal(read_image(f'{self.base_path}_1'), frames[1]))
+
+    @ignore_warnings
+    def test_should_spill_or_discard_transaction_images(self):
+        undo_buffer = UndoBuffer()
+        undo_buffer.put(1, 0, self.base_path, self._create_frames(0))
+        undo_buffer.put(2, 1, self.base_path, self._create_frames(50))
+
+        undo_buffer.discard_txn(1)
+        undo_buffer.spill_txn(2)
+        self.assertEqual(undo_buffer.num_bytes, 0)
+        self.assertFalse(os.path.exists(f'{self.base_path}_0'))
+        self.assertTrue(os.path.exists(f'{self.base_path}_1'))
+
+    def test_should_format_in_memory_image_path(self):
+        image_path = format_in_memory_image_path(self.base_path, [3, 0, 1])
+        self.assertTrue(is_in_memory_image_path(image_path))
+        self.assertFalse(is_in_memory_image_path(self.base_path))
+        self.assertEqual(parse_in_memory_image_path(image_path), (self.base_path, [0, 1, 3]))
+        self.assertEqual(parse_in_memory_image_path(format_in_memory_image_path(self.base_path, [])), (self.base_path, []))
+
+if __name__ == '__main__':
+    unittest.main()
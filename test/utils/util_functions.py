@@ -7,18 +7,24 @@ import shutil
 import cv2
 
 from src.catalog.models.df_metadata import DataFrameMetadata
+from src.catalog.catalog_manager import CatalogManager
 from src.catalog.models.df_column import DataFrameColumn
 from src.catalog.column_type import ColumnType
+from src.catalog.column_codec import ColumnCodec
 from src.models.storage.batch import Batch
 from src.storage.petastorm_storage_engine import PetastormStorageEngine
 from src.readers.opencv_reader import OpenCVReader
+from src.ingest.ingest_pipeline import IngestPipeline
 from src.transaction.opencv_update_processor import OpenCVUpdateProcessor
 from src.transaction.object_update_arguments import ObjectUpdateArguments
+from src.transaction.delta_image import read_image
 from src.utils.logging_manager import LoggingLevel, LoggingManager
 from src.config.constants import TRANSACTION_STORAGE_FOLDER, \
+                                 CATALOG_FOLDER, \
                                  INPUT_VIDEO_FOLDER, \
                                  PETASTORM_STORAGE_FOLDER, \
-                                 BATCH_SIZE
+                                 BATCH_SIZE, \
+                                 INGEST_WRITERS
 
 def ignore_warnings(test_func):
     def do_test(self, *args, **kwargs):
@@ -28,15 +34,17 @@ def ignore_warnings(test_func):
             test_func(self, *args, **kwargs)
     return do_test
 
-def write_file(storage_engine, file_name, include_lsn=False) -> DataFrameMetadata:
+def write_file(storage_engine, file_name, include_lsn=False, codec=ColumnCodec.RAW, group_size=BATCH_SIZE,
+               num_decoders=1, num_writers=INGEST_WRITERS) -> DataFrameMetadata:
     LoggingManager().log(f'Writing file {file_name}', LoggingLevel.INFO)
-    dataframe_metadata = DataFrameMetadata(file_name, f'{INPUT_VIDEO_FOLDER}/{file_name}.mp4')
+    dataframe_metadata = DataFrameMetadata(file_name, f'{INPUT_VIDEO_FOLDER}/{file_name}.mp4', group_size=group_size)
 
-    reader = OpenCVReader(file_url = dataframe_metadata.file_url, include_lsn=include_lsn, batch_size = BATCH_SIZE)
+    reader = OpenCVReader(file_url = dataframe_metadata.file_url, include_lsn=include_lsn, batch_size = group_size,
+                          num_workers = num_decoders)
 
     dataframe_columns = [
         DataFrameColumn('id', ColumnType.INTEGER),
-        DataFrameColumn('data', ColumnType.NDARRAY, array_dimensions= [reader.video_height(), reader.video_width(), 3])
+        DataFrameColumn('data', ColumnType.NDARRAY, array_dimensions= [reader.video_height(), reader.video_width(), 3], codec=codec)
     ]
     if include_lsn:
         dataframe_columns.append(DataFrameColumn('lsn', ColumnType.INTEGER))
@@ -44,8 +52,11 @@ def write_file(storage_engine, file_name, include_lsn=False) -> DataFrameMetadat
 
     storage_engine.create(dataframe_metadata)
 
-    for batch in reader.read():
-        storage_engine.write(dataframe_metadata, batch)
+    # The non partitioned engine appends to a single dataset, so only one writer
+    if isinstance(storage_engine, PetastormStorageEngine):
+        num_writers = 1
+    frame_count = IngestPipeline(storage_engine, dataframe_metadata, reader, num_writers=num_writers).run()
+    CatalogManager().set_frame_count(dataframe_metadata, frame_count)
     LoggingManager().log(f'Done writing file {file_name}', LoggingLevel.INFO)
     return dataframe_metadata
 
@@ -67,7 +78,7 @@ def read_file_from_image(file_path: str) -> pd.DataFrame:
     LoggingManager().log(f'Reading image {file_path}', LoggingLevel.INFO)
     for name in sorted(glob.glob(f'{file_path}_*')):
         LoggingManager().log(f'Reading batch: {name}', LoggingLevel.INFO)
-        batch = pd.read_pickle(name)
+        batch = read_image(name)
         if first_batch:
             first_batch = False
             df = batch
@@ -141,6 +152,9 @@ def clear_petastorm_storage_folder():
 def clear_transaction_storage_folder():
     clear_folder(TRANSACTION_STORAGE_FOLDER)
 
+def clear_catalog_folder():
+    clear_folder(CATALOG_FOLDER)
+
 def write_dataframe_to_video(df: pd.DataFrame, output_file_path: str) -> None:
     output_df = df.sort_values(by='id')
 
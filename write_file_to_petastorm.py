@@ -6,6 +6,7 @@ from src.catalog.models.df_metadata import DataFrameMetadata
 from src.catalog.models.df_column import DataFrameColumn
 from src.catalog.column_type import ColumnType
 from src.models.storage.batch import Batch
+from src.ingest.ingest_pipeline import IngestPipeline
 
 from src.config.constants import \
     INPUT_VIDEO_FOLDER
@@ -32,8 +33,8 @@ def write_file(file_name: str) -> None:
     storage_engine = PetastormStorageEngine()
     storage_engine.create(dataframe_metadata)
 
-    for batch in reader.read():
-        storage_engine.write(dataframe_metadata, batch)
+    # Only one writer, the storage engine appends to a single dataset
+    IngestPipeline(storage_engine, dataframe_metadata, reader, num_writers=1).run()
 
 def main() -> None:
     parser = init_argparse()